@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""Classroom load test: many students voting while projectors refresh the leaderboard.
+
+Runs entirely against an offline backend (in-memory by default, or SQLite) so it needs no
+credentials. Each simulated student submits a ballot and then edits it ``--edit-rate`` times on
+average; each simulated viewer keeps scoring the session the way the projector does until the
+students finish. Latency percentiles and throughput are reported per operation.
+
+    python load_test.py --voters 150 --viewers 6 --teams 8 --categories 5 --edit-rate 1.5
+    python load_test.py --backend sqlite:///loadtest.db --json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from streamlit_app import data, storage
+from streamlit_app.cache import metadata
+from streamlit_app.ui_leaderboard import _build_leaderboard_rows
+
+CLASS_ID = "loadtest"
+
+
+def print_status(message: str) -> None:
+    """Prefix log lines for easy scanning."""
+    print(f"[load_test] {message}")
+
+
+@dataclass
+class Scenario:
+    voters: int = 150
+    teams: int = 8
+    categories: int = 5
+    edit_rate: float = 1.0
+    viewers: int = 4
+    view_interval: float = 0.2
+    think_time: float = 0.0
+    seed: int = 7
+
+
+@dataclass
+class Recorder:
+    """Thread-safe latency samples (seconds) and error counts per operation."""
+
+    samples: Dict[str, List[float]] = field(default_factory=dict)
+    errors: Dict[str, int] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def timed(self, op: str, fn: Callable, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self.errors[op] = self.errors.get(op, 0) + 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.samples.setdefault(op, []).append(elapsed)
+
+    def report(self, wall_seconds: float) -> List[Dict]:
+        rows = []
+        for op, values in sorted(self.samples.items()):
+            ms = np.array(values) * 1000
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            rows.append({
+                "operation": op,
+                "count": len(values),
+                "errors": self.errors.get(op, 0),
+                "throughput_per_s": round(len(values) / wall_seconds, 1) if wall_seconds else 0.0,
+                "p50_ms": round(float(p50), 2),
+                "p95_ms": round(float(p95), 2),
+                "p99_ms": round(float(p99), 2),
+                "max_ms": round(float(ms.max()), 2),
+            })
+        return rows
+
+
+def seed_session(scenario: Scenario) -> Dict:
+    """Create a class, its teams and an open session with the requested categories."""
+    data.class_ref(CLASS_ID).set({"id": CLASS_ID, "name": "Load test", "archived": False})
+    for i in range(scenario.teams):
+        data.team_ref(CLASS_ID, f"team{i}").set({"name": f"Team {i + 1}"})
+    categories = [{"id": f"cat{i}", "label": f"Category {i + 1}", "weight": 1.0} for i in range(scenario.categories)]
+    session = data.create_session(CLASS_ID, {
+        "title": "Load test session",
+        "categories": categories,
+        "weighting": {"teacherPct": 50, "peersPct": 50},
+        "status": "open",
+    })
+    metadata.clear()
+    return session
+
+
+def _student(index: int, session: Dict, scenario: Scenario, recorder: Recorder) -> None:
+    rng = random.Random(scenario.seed * 100_003 + index)
+    edits = int(scenario.edit_rate) + (rng.random() < scenario.edit_rate % 1)
+    for _ in range(1 + edits):
+        if scenario.think_time:
+            time.sleep(rng.uniform(0, scenario.think_time))
+        team_id = f"team{rng.randrange(scenario.teams)}"
+        ratings = {c["id"]: rng.randint(1, 5) for c in session["categories"]}
+        recorder.timed("submit_vote", data.submit_vote, CLASS_ID, session["id"], f"student{index}", team_id, ratings)
+
+
+def _viewer(session: Dict, scenario: Scenario, recorder: Recorder, done: threading.Event) -> None:
+    weighting = session["weighting"]
+    while not done.is_set():
+        recorder.timed(
+            "aggregate_scores", data.aggregate_scores,
+            CLASS_ID, session["id"], session["categories"], weighting["teacherPct"], weighting["peersPct"],
+        )
+        recorder.timed("build_leaderboard_rows", _build_leaderboard_rows, CLASS_ID, session)
+        done.wait(scenario.view_interval)
+
+
+def run_scenario(scenario: Scenario) -> Dict:
+    """Run one scenario against the configured backend and return the per-operation report."""
+    session = seed_session(scenario)
+    recorder = Recorder()
+    done = threading.Event()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=scenario.viewers + scenario.voters) as pool:
+        viewers = [pool.submit(_viewer, session, scenario, recorder, done) for _ in range(scenario.viewers)]
+        students = [pool.submit(_student, i, session, scenario, recorder) for i in range(scenario.voters)]
+        for future in students:
+            future.exception()
+        done.set()
+        for future in viewers:
+            future.exception()
+    wall = time.perf_counter() - start
+
+    weighting = session["weighting"]
+    scores = data.aggregate_scores(CLASS_ID, session["id"], session["categories"], weighting["teacherPct"], weighting["peersPct"])
+    return {
+        "scenario": scenario.__dict__,
+        "wall_seconds": round(wall, 3),
+        "teams_scored": len(scores),
+        "operations": recorder.report(wall),
+    }
+
+
+def print_report(result: Dict) -> None:
+    print_status(f"Wall time {result['wall_seconds']}s, {result['teams_scored']} teams scored.")
+    header = f"{'operation':<24}{'count':>8}{'errors':>8}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for row in result["operations"]:
+        print(
+            f"{row['operation']:<24}{row['count']:>8}{row['errors']:>8}{row['throughput_per_s']:>10}"
+            f"{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}{row['max_ms']:>10}"
+        )
+
+
+def parse_args() -> argparse.Namespace:
+    defaults = Scenario()
+    parser = argparse.ArgumentParser(description="Concurrent voting/projection load test for the Class Leaderboard.")
+    parser.add_argument("--backend", default="memory", help="Storage URL: memory (default) or sqlite:///path.db.")
+    parser.add_argument("--voters", type=int, default=defaults.voters, help="Simulated students voting at once.")
+    parser.add_argument("--teams", type=int, default=defaults.teams, help="Teams in the class.")
+    parser.add_argument("--categories", type=int, default=defaults.categories, help="Rating categories per ballot.")
+    parser.add_argument("--edit-rate", type=float, default=defaults.edit_rate, help="Average edits per student after the first vote.")
+    parser.add_argument("--viewers", type=int, default=defaults.viewers, help="Leaderboard viewers refreshing concurrently.")
+    parser.add_argument("--view-interval", type=float, default=defaults.view_interval, help="Seconds between a viewer's refreshes.")
+    parser.add_argument("--think-time", type=float, default=defaults.think_time, help="Max random pause before each student submission.")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Random seed for ballots.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.backend.partition(":")[0].lower() == "firestore":
+        raise SystemExit("Refusing to load test Firestore; use memory or sqlite:///path.db.")
+    storage.set_backend(storage.create_backend(args.backend))
+    scenario = Scenario(
+        voters=args.voters,
+        teams=args.teams,
+        categories=args.categories,
+        edit_rate=args.edit_rate,
+        viewers=args.viewers,
+        view_interval=args.view_interval,
+        think_time=args.think_time,
+        seed=args.seed,
+    )
+    print_status(f"Running {scenario} against {args.backend}.")
+    result = run_scenario(scenario)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
+
+
+if __name__ == "__main__":
+    main()
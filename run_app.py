@@ -26,6 +26,7 @@ APP_PATH = ROOT / "streamlit_app" / "app.py"
 SECRETS_PATH = ROOT / "streamlit_app" / ".streamlit" / "secrets.toml"
 LEADERBOARD_URL = "http://localhost:8501/?view=leaderboard"
 MAIN_URL = "http://localhost:8501"
+FEED_PORT = 8502
 
 
 def print_status(message: str) -> None:
@@ -148,20 +149,46 @@ def launch_streamlit_process(use_conda: bool) -> subprocess.Popen:
     return process
 
 
-def start_streamlit(use_conda: bool) -> int:
+def launch_feed_process(use_conda: bool, port: int) -> subprocess.Popen:
+    """Start the read-only JSON/SSE leaderboard feed next to Streamlit."""
+    module = ["-m", "streamlit_app.feed", "--port", str(port)]
+    if use_conda:
+        cmd = ["conda", "run", "-n", ENV_NAME, "python", *module]
+    else:
+        cmd = [sys.executable, *module]
+    env = os.environ.copy()
+    existing = env.get("PYTHONPATH", "")
+    env["PYTHONPATH"] = str(ROOT) if not existing else f"{ROOT}{os.pathsep}{existing}"
+    process = subprocess.Popen(cmd, cwd=ROOT, env=env)
+    print_status(f"Leaderboard feed started with PID={process.pid}: http://localhost:{port}/classes/<class>/sessions/<session>/leaderboard")
+    return process
+
+
+def stop_process(process: subprocess.Popen) -> None:
+    try:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=5)
+    except Exception:
+        process.kill()
+        process.wait()
+
+
+def start_streamlit(use_conda: bool, feed_port: int | None = None) -> int:
     """Launch Streamlit (optionally via conda run) and stream logs until exit."""
+    if feed_port and os.environ.get("LEADERBOARD_STORAGE", "").lower().startswith("memory"):
+        print_status("Skipping the leaderboard feed: it runs in its own process and cannot see the in-memory store.")
+        feed_port = None
+    feed = launch_feed_process(use_conda, feed_port) if feed_port else None
     process = launch_streamlit_process(use_conda)
     try:
         return process.wait()
     except KeyboardInterrupt:
         print_status("Keyboard interrupt received; shutting down Streamlit.")
-        try:
-            process.send_signal(signal.SIGTERM)
-            process.wait(timeout=5)
-        except Exception:
-            process.kill()
-            process.wait()
+        stop_process(process)
         return 0
+    finally:
+        if feed is not None and feed.poll() is None:
+            stop_process(feed)
 
 
 def run_test_cycle(use_conda: bool) -> bool:
@@ -218,6 +245,39 @@ def run_test_cycle(use_conda: bool) -> bool:
                 process.wait()
 
 
+def profile_imports(module: str, top: int = 15) -> dict:
+    """Measure cold-start import cost of `module` in a fresh interpreter via `python -X importtime`."""
+    env = os.environ.copy()
+    existing = env.get("PYTHONPATH", "")
+    env["PYTHONPATH"] = str(ROOT) if not existing else f"{ROOT}{os.pathsep}{existing}"
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line.replace("import time:", "", 1).split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append({"module": name.strip(), "depth": depth, "self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000})
+    target = next((m for m in reversed(modules) if m["module"] == module), None)
+    heaviest = sorted((m for m in modules if m["depth"] <= 1), key=lambda m: m["cumulative_ms"], reverse=True)[:top]
+    return {
+        "module": module,
+        "import_ms": round(target["cumulative_ms"], 1) if target else None,
+        "process_wall_ms": round(wall_ms, 1),
+        "heaviest": [{"module": m["module"], "cumulative_ms": round(m["cumulative_ms"], 1)} for m in heaviest],
+    }
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Launcher for the Class Leaderboard Streamlit app.")
     parser.add_argument(
@@ -225,12 +285,44 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Run a short validation cycle that starts Streamlit, verifies it, and exits.",
     )
+    parser.add_argument(
+        "--import-profile",
+        nargs="?",
+        const="streamlit_app.app",
+        metavar="MODULE",
+        help="Report cold-start import time for MODULE (default: the login page entrypoint) and exit.",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="With --import-profile, print the measurement as JSON for tracking over time.",
+    )
+    parser.add_argument(
+        "--feed-port",
+        type=int,
+        default=FEED_PORT,
+        help=f"Port for the read-only JSON/SSE leaderboard feed (default {FEED_PORT}).",
+    )
+    parser.add_argument(
+        "--no-feed",
+        action="store_true",
+        help="Do not start the leaderboard feed alongside Streamlit.",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     """Entrypoint orchestrating environment checks and process management."""
     args = parse_args()
+    if args.import_profile:
+        report = profile_imports(args.import_profile)
+        if args.json:
+            print(json.dumps(report, indent=2))
+            return
+        print_status(f"Cold import of {report['module']}: {report['import_ms']} ms (interpreter wall {report['process_wall_ms']} ms).")
+        for entry in report["heaviest"]:
+            print_status(f"  {entry['cumulative_ms']:>8.1f} ms  {entry['module']}")
+        return
     print_status("Checking environment...")
     check_environment()
     kill_existing_streamlit()
@@ -245,7 +337,7 @@ def main() -> None:
             raise SystemExit(1)
         print_status("Test mode completed successfully.")
         return
-    exit_code = start_streamlit(env_available)
+    exit_code = start_streamlit(env_available, None if args.no_feed else args.feed_port)
     if exit_code:
         raise SystemExit(exit_code)
 
@@ -3,12 +3,27 @@ import streamlit as st
 # Must be called first, before any other Streamlit commands
 st.set_page_config(page_title="Class Leaderboard", page_icon="🏁", layout="wide")
 
-from streamlit_app.auth import signin, signup, send_password_reset
-from streamlit_app.firebase import admin_emails
-from streamlit_app.ui_student import student_view
-from streamlit_app.ui_admin import admin_view
-from streamlit_app.ui_leaderboard import leaderboard_view
-from streamlit_app.ui_settings import settings_view
+from streamlit_app.auth import current_id_token, signin, signup, send_password_reset, store_tokens
+from streamlit_app import profiles
+
+# The views pull in pandas, altair and the data layer (and through it the storage client).
+# Import them on first use so the login page only pays for auth.
+
+def student_view(user):
+    from streamlit_app.ui_student import student_view as view
+    view(user)
+
+def admin_view(user):
+    from streamlit_app.ui_admin import admin_view as view
+    view(user)
+
+def leaderboard_view(role: str = "student"):
+    from streamlit_app.ui_leaderboard import leaderboard_view as view
+    view(role=role)
+
+def settings_view(user):
+    from streamlit_app.ui_settings import settings_view as view
+    view(user)
 
 def normalize_email(value: str) -> str:
     value = (value or "").strip()
@@ -33,7 +48,8 @@ def login_box():
                 if err:
                     st.error(err)
                 else:
-                    st.session_state.user = {"email": data["email"]}
+                    profiles.login(data["email"])
+                    store_tokens(data)
                     st.rerun()
         with cols[2]:
             st.write("")
@@ -97,8 +113,7 @@ def main():
     view_value = _first_query_value(params.get("view"))
     user = st.session_state.get("user")
     if view_value.lower() == "leaderboard":
-        role = "admin" if user and user["email"].lower() in admin_emails() else "student"
-        leaderboard_view(role=role)
+        leaderboard_view(role=profiles.role(user))
         st.stop()
 
     st.title("🏁 Class Leaderboard")
@@ -106,8 +121,9 @@ def main():
         login_box()
         st.stop()
 
-    admin_list = admin_emails()
-    is_admin = user["email"].lower() in admin_list
+    current_id_token()  # renews the Firebase ID token shortly before it expires
+
+    is_admin = profiles.is_admin(user)
     if is_admin:
         nav_options = ["Leaderboard", "Admin Console"]
     else:
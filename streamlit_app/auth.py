@@ -1,6 +1,74 @@
+import threading
+import time
+
 import streamlit as st, requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 AUTH_URL = "https://identitytoolkit.googleapis.com/v1"
+TOKEN_URL = "https://securetoken.googleapis.com/v1/token"
+TIMEOUT_SECONDS = 10
+REFRESH_MARGIN_SECONDS = 300  # refresh the ID token this long before it expires
+TOKENS_KEY = "auth_tokens"
+
+# One pooled, retrying client per process: the login rush at the start of class reuses warm
+# TLS connections instead of opening one per request. Tests swap it via `set_http_session`.
+_http = None
+_http_lock = threading.Lock()
+
+# Creating an account or sending a reset email is not idempotent: a 5xx may hide a request
+# that went through, so these only retry when throttled (429 always means "not processed").
+_NON_IDEMPOTENT_ENDPOINTS = ("accounts:signUp", "accounts:sendOobCode")
+
+def _adapter(statuses, pool_maxsize: int) -> HTTPAdapter:
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=statuses,
+        allowed_methods=frozenset({"POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    return HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry)
+
+def _build_http_session() -> requests.Session:
+    session = requests.Session()
+    adapter = _adapter((429, 500, 502, 503, 504), pool_maxsize=32)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    throttled = _adapter((429,), pool_maxsize=8)
+    for endpoint in _NON_IDEMPOTENT_ENDPOINTS:  # requests picks the longest matching prefix
+        session.mount(f"{AUTH_URL}/{endpoint}", throttled)
+    return session
+
+def http_session():
+    global _http
+    if _http is None:
+        with _http_lock:
+            if _http is None:
+                _http = _build_http_session()
+    return _http
+
+def set_http_session(session) -> None:
+    """Install the HTTP client (anything with ``post``); ``None`` rebuilds the default next time."""
+    global _http
+    with _http_lock:
+        _http = session
+
+def _post(url: str, **kwargs):
+    """POST through the shared client; returns ``None`` when the network is unreachable."""
+    try:
+        return http_session().post(url, timeout=TIMEOUT_SECONDS, **kwargs)
+    except requests.RequestException:
+        return None
+
+def _error_message(r, default: str) -> str:
+    if r is None:
+        return "Could not reach the sign-in service. Please try again."
+    try:
+        return r.json().get("error", {}).get("message", default)
+    except ValueError:
+        return default
 
 def _get_api_key():
     return st.secrets.get("FIREBASE_WEB_API_KEY")
@@ -22,19 +90,59 @@ def signup(email: str, password: str):
     if not _domain_ok(email):
         return None, "This app is restricted to the university domain."
     url = f"{AUTH_URL}/accounts:signUp?key={_get_api_key()}"
-    r = requests.post(url, json={"email": email, "password": password, "returnSecureToken": True}, timeout=10)
-    if r.ok:
+    r = _post(url, json={"email": email, "password": password, "returnSecureToken": True})
+    if r is not None and r.ok:
         return r.json(), None
-    return None, r.json().get("error", {}).get("message", "Signup failed")
+    return None, _error_message(r, "Signup failed")
 
 def signin(email: str, password: str):
     url = f"{AUTH_URL}/accounts:signInWithPassword?key={_get_api_key()}"
-    r = requests.post(url, json={"email": email, "password": password, "returnSecureToken": True}, timeout=10)
-    if r.ok:
+    r = _post(url, json={"email": email, "password": password, "returnSecureToken": True})
+    if r is not None and r.ok:
         return r.json(), None
-    return None, r.json().get("error", {}).get("message", "Login failed")
+    return None, _error_message(r, "Login failed")
 
 def send_password_reset(email: str):
     url = f"{AUTH_URL}/accounts:sendOobCode?key={_get_api_key()}"
-    r = requests.post(url, json={"requestType":"PASSWORD_RESET","email":email}, timeout=10)
-    return r.ok
+    r = _post(url, json={"requestType":"PASSWORD_RESET","email":email})
+    return r is not None and r.ok
+
+def store_tokens(data: dict, now: float | None = None) -> dict:
+    """Keep the ID/refresh token pair from a sign-in (or refresh) response in session state."""
+    now = time.time() if now is None else now
+    tokens = {
+        "idToken": data["idToken"],
+        "refreshToken": data["refreshToken"],
+        "expiresAt": now + int(data.get("expiresIn", 3600)),
+    }
+    st.session_state[TOKENS_KEY] = tokens
+    return tokens
+
+def refresh_tokens(refresh_token: str, now: float | None = None):
+    """Exchange a refresh token for a new ID token via the Secure Token API."""
+    url = f"{TOKEN_URL}?key={_get_api_key()}"
+    r = _post(url, data={"grant_type": "refresh_token", "refresh_token": refresh_token})
+    if r is None or not r.ok:
+        return None, _error_message(r, "Token refresh failed")
+    body = r.json()
+    tokens = store_tokens(
+        {"idToken": body["id_token"], "refreshToken": body["refresh_token"], "expiresIn": body.get("expires_in", 3600)},
+        now=now,
+    )
+    return tokens, None
+
+def current_id_token(now: float | None = None):
+    """Return a usable ID token, refreshing it shortly before expiry; ``None`` once it can't be renewed."""
+    tokens = st.session_state.get(TOKENS_KEY)
+    if not tokens:
+        return None
+    now = time.time() if now is None else now
+    if tokens["expiresAt"] - now > REFRESH_MARGIN_SECONDS:
+        return tokens["idToken"]
+    fresh, _ = refresh_tokens(tokens["refreshToken"], now=now)
+    if fresh is None:
+        if tokens["expiresAt"] > now:
+            return tokens["idToken"]  # still valid; try refreshing again on the next run
+        st.session_state.pop(TOKENS_KEY, None)
+        return None
+    return fresh["idToken"]
@@ -0,0 +1,65 @@
+"""Process-wide TTL cache for slow-changing Firestore metadata (classes, sessions, teams)."""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Tuple
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries also expire after a per-entry TTL."""
+
+    def __init__(self, maxsize: int = 512, ttl: float = 30.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[Tuple[Hashable, ...], Tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: Tuple[Hashable, ...], loader: Callable[[], Any], ttl: float | None = None) -> Any:
+        now = time.monotonic()
+        hit = self._lookup(key, now)
+        if hit is not None:
+            return hit[0]
+        value = loader()
+        self._store(key, value, now, ttl)
+        return value
+
+    async def get_or_load_async(
+        self, key: Tuple[Hashable, ...], loader: Callable[[], Awaitable[Any]], ttl: float | None = None,
+    ) -> Any:
+        """`get_or_load` for coroutine loaders; shares entries (and invalidation) with sync callers."""
+        now = time.monotonic()
+        hit = self._lookup(key, now)
+        if hit is not None:
+            return hit[0]
+        value = await loader()
+        self._store(key, value, now, ttl)
+        return value
+
+    def _lookup(self, key: Tuple[Hashable, ...], now: float) -> Tuple[Any] | None:
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is not None and hit[0] > now:
+                self._entries.move_to_end(key)
+                return (hit[1],)
+        return None
+
+    def _store(self, key: Tuple[Hashable, ...], value: Any, now: float, ttl: float | None) -> None:
+        with self._lock:
+            self._entries[key] = (now + (self.ttl if ttl is None else ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *prefix: Hashable) -> None:
+        """Drop every entry whose key starts with `prefix` (all entries if no prefix is given)."""
+        with self._lock:
+            for key in [k for k in self._entries if k[:len(prefix)] == prefix]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        self.invalidate()
+
+
+metadata = TTLCache()
@@ -0,0 +1,108 @@
+"""Stable Vega-Lite specs for the projected leaderboard charts.
+
+The specs below never embed data, team order or team colors: ordering comes from the ``Rank``
+field and colors from ``TeamColor`` (``scale: None``). Between refreshes the spec is therefore
+identical and the frontend only swaps the dataset, so bars move to their new rank in place
+instead of the chart being torn down and rebuilt.
+"""
+from __future__ import annotations
+
+import copy
+
+import pandas as pd
+
+TEACHER_BAR_COLOR = "#3B82F6"
+PEER_BAR_COLOR = "#16A34A"
+COMPONENTS = ["Teacher", "Peers", "Combined"]
+
+_BY_RANK = {"field": "Rank", "op": "min", "order": "ascending"}
+
+RANKING_SPEC = {
+    "mark": {"type": "bar", "cornerRadiusTopRight": 6, "cornerRadiusBottomRight": 6},
+    "encoding": {
+        "y": {"field": "Team", "type": "nominal", "sort": _BY_RANK, "title": "Team",
+              "axis": {"labelFontSize": 16, "titleFontSize": 18}},
+        "x": {"field": "Combined", "type": "quantitative", "title": "Weighted Score",
+              "axis": {"labelFontSize": 16, "titleFontSize": 18}},
+        "color": {"field": "TeamColor", "type": "nominal", "scale": None, "legend": None},
+        "tooltip": [
+            {"field": "Rank", "type": "ordinal", "title": "Rank"},
+            {"field": "Team", "type": "nominal", "title": "Team"},
+            {"field": "Combined", "type": "quantitative", "title": "Weighted Score"},
+        ],
+    },
+}
+
+_COMPONENT_MARK = {"type": "bar", "cornerRadiusTopLeft": 2, "cornerRadiusTopRight": 2}
+
+COMPONENT_SPEC = {
+    "height": 420,
+    "encoding": {
+        "x": {"field": "Team", "type": "nominal", "sort": _BY_RANK, "title": "Team",
+              "axis": {"labelFontSize": 14, "labelAngle": -20}},
+        "y": {"field": "Value", "type": "quantitative", "title": "Score"},
+        "xOffset": {"field": "ScoreType", "type": "nominal", "sort": COMPONENTS},
+    },
+    "layer": [
+        {
+            "transform": [{"filter": "datum.ScoreType !== 'Combined'"}],
+            "mark": _COMPONENT_MARK,
+            "encoding": {
+                "color": {"field": "ScoreType", "type": "nominal",
+                          "scale": {"domain": ["Teacher", "Peers"], "range": [TEACHER_BAR_COLOR, PEER_BAR_COLOR]},
+                          "legend": {"title": "Components"}},
+                "tooltip": [
+                    {"field": "Team", "type": "nominal", "title": "Team"},
+                    {"field": "ScoreType", "type": "nominal", "title": "Component"},
+                    {"field": "Value", "type": "quantitative", "title": "Score"},
+                ],
+            },
+        },
+        {
+            "transform": [{"filter": "datum.ScoreType === 'Combined'"}],
+            "mark": _COMPONENT_MARK,
+            "encoding": {
+                "color": {"field": "TeamColor", "type": "nominal", "scale": None, "legend": None},
+                "tooltip": [
+                    {"field": "Team", "type": "nominal", "title": "Team"},
+                    {"field": "Combined", "type": "quantitative", "title": "Weighted"},
+                    {"field": "Teacher", "type": "quantitative", "title": "Teacher Sum"},
+                    {"field": "Peers", "type": "quantitative", "title": "Student Sum"},
+                ],
+            },
+        },
+    ],
+    "resolve": {"scale": {"color": "independent"}},
+    "config": {"axis": {"labelFontSize": 14, "titleFontSize": 16}},
+}
+
+
+def ranking_height(team_count: int) -> int:
+    return max(280, 70 * team_count)
+
+
+def ranking_spec(team_count: int) -> dict:
+    """Horizontal ranking bars; only the height depends on the data (and only on team count)."""
+    spec = copy.deepcopy(RANKING_SPEC)
+    spec["height"] = ranking_height(team_count)
+    return spec
+
+
+def component_spec() -> dict:
+    return copy.deepcopy(COMPONENT_SPEC)
+
+
+def ranking_frame(df: pd.DataFrame) -> pd.DataFrame:
+    return df[["Rank", "Team", "Combined", "TeamColor"]]
+
+
+def component_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Long format (one row per team and component) for the grouped admin chart."""
+    long = df.melt(
+        id_vars=["Rank", "Team", "TeamColor"],
+        value_vars=COMPONENTS,
+        var_name="ScoreType",
+        value_name="Value",
+        ignore_index=False,
+    )
+    return long.join(df[COMPONENTS]).reset_index(drop=True)
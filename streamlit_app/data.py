@@ -1,100 +1,494 @@
+import csv
 import hashlib
+import io
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
-from typing import List, Dict
+from typing import BinaryIO, Dict, Iterable, Iterator, List
 from datetime import datetime
-from .firebase import get_db
+from . import scoring, storage
+from .cache import metadata
 
-db = get_db()
+logger = logging.getLogger(__name__)
 
-def class_ref(class_id): return db.collection("classes").document(class_id)
+CLASSES_TTL_SECONDS = 60
+SESSIONS_TTL_SECONDS = 15
+TEAMS_TTL_SECONDS = 60
+VISIBLE_STATUSES = ("open", "scheduled", "closed")
+SESSION_PAGE_SIZE = 20
+FINAL_STATUSES = ("closed", "archived")
+ROLLUPS_TTL_SECONDS = 3600
+SEASON_FETCH_WORKERS = 8
+IO_WORKERS = 8
+# Vote fields each reader needs; projected reads skip legacy `editedHistory` arrays and the rest.
+SCORING_VOTE_FIELDS = ("teamId", "ratings")
+EXPORT_VOTE_FIELDS = ("userId", "teamId", "ratings", "createdAt", "updatedAt")
+
+def backend() -> storage.StorageBackend:
+    """The configured document store (Firestore unless LEADERBOARD_STORAGE/STORAGE_BACKEND says otherwise)."""
+    return storage.get_backend()
+
+def class_ref(class_id): return backend().collection("classes").document(class_id)
 def session_ref(class_id, session_id): return class_ref(class_id).collection("sessions").document(session_id)
 def vote_ref(class_id, session_id, user_id): return session_ref(class_id, session_id).collection("votes").document(user_id)
 def teacher_vote_ref(class_id, session_id, admin_id): return session_ref(class_id, session_id).collection("teacherVotes").document(admin_id)
 def team_ref(class_id, team_id): return class_ref(class_id).collection("teams").document(team_id)
 def user_ref(class_id, user_id): return class_ref(class_id).collection("users").document(user_id)
+def totals_ref(class_id, session_id): return session_ref(class_id, session_id).collection("aggregates").document("totals")
+def leaderboard_ref(class_id, session_id): return session_ref(class_id, session_id).collection("aggregates").document("leaderboard")
+def vote_history_ref(class_id, session_id, user_id): return session_ref(class_id, session_id).collection("voteHistory").document(user_id)
+def rollup_ref(class_id, session_id): return class_ref(class_id).collection("rollups").document(session_id)
+
+def _run_transaction(fn):
+    return backend().run_transaction(fn)
+
+_io_pool = None
+_io_pool_lock = threading.Lock()
+
+def fetch_concurrently(**reads):
+    """Run independent reads side by side and join them: latency is the slowest read, not the sum.
+
+    Only pass leaf reads (no nested `fetch_concurrently`); they share one small process-wide pool.
+    """
+    global _io_pool
+    if _io_pool is None:
+        with _io_pool_lock:
+            if _io_pool is None:
+                _io_pool = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="data-io")
+    futures = {name: _io_pool.submit(read) for name, read in reads.items()}
+    return {name: future.result() for name, future in futures.items()}
+
+def _cached_docs(key, ttl, stream):
+    docs = metadata.get_or_load(key, lambda: [{**d.to_dict(), "id": d.id} for d in stream()], ttl)
+    return [dict(d) for d in docs]
 
 def list_teams(class_id):
-    return [{**d.to_dict(), "id": d.id} for d in class_ref(class_id).collection("teams").stream()]
+    return _cached_docs(("teams", class_id), TEAMS_TTL_SECONDS, class_ref(class_id).collection("teams").stream)
+
+def create_team(class_id, name: str, color: str | None = None):
+    ref = class_ref(class_id).collection("teams").document()
+    payload = {"name": name, **({"color": color} if color else {})}
+    ref.set(payload)
+    metadata.invalidate("teams", class_id)
+    return {**payload, "id": ref.id}
 
 def get_session(class_id, session_id):
     doc = session_ref(class_id, session_id).get()
     return ({**doc.to_dict(), "id": doc.id} if doc.exists else None)
 
+def _votes_query(class_id, session_id, name, fields):
+    return session_ref(class_id, session_id).collection(name).select(list(fields))
+
+def _stream_dicts(class_id, session_id, name, fields=EXPORT_VOTE_FIELDS):
+    return [d.to_dict() for d in _votes_query(class_id, session_id, name, fields).stream()]
+
+def load_session_bundle(class_id, session_id) -> Dict:
+    """Session metadata, both vote collections and the class's teams, fetched concurrently."""
+    return fetch_concurrently(
+        session=lambda: get_session(class_id, session_id),
+        votes=lambda: _stream_dicts(class_id, session_id, "votes"),
+        teacherVotes=lambda: _stream_dicts(class_id, session_id, "teacherVotes"),
+        teams=lambda: list_teams(class_id),
+    )
+
 def list_classes():
-    return [ {**d.to_dict(), "id": d.id} for d in db.collection("classes").where("archived","==",False).stream() ]
+    return _cached_docs(("classes",), CLASSES_TTL_SECONDS, backend().collection("classes").where("archived","==",False).stream)
 
-def list_sessions(class_id):
-    return [ {**d.to_dict(), "id": d.id} for d in class_ref(class_id).collection("sessions").order_by("createdAt").stream() ]
+def _sessions_query(class_id, statuses):
+    query = class_ref(class_id).collection("sessions")
+    return query.where("status", "in", list(statuses)) if statuses else query
+
+def list_sessions(class_id, statuses=None):
+    """Every session of a class, oldest first; `statuses` filters server-side."""
+    statuses = tuple(statuses) if statuses else None
+    query = _sessions_query(class_id, statuses).order_by("createdAt")
+    return _cached_docs(("sessions", class_id, statuses), SESSIONS_TTL_SECONDS, query.stream)
+
+def page_sessions(class_id, statuses=None, page_size: int = SESSION_PAGE_SIZE, after=None):
+    """One page of sessions, newest first: ``(sessions, cursor)``.
+
+    Pass the returned cursor back as `after` for the next page; it is ``None`` on the last page.
+    It is the last session's ``(createdAt, id)``: the document id breaks ``createdAt`` ties, so
+    sessions created in the same instant are never skipped at a page boundary.
+    Needs the ``status`` + ``createdAt`` composite indexes in ``firestore.indexes.json``.
+    """
+    statuses = tuple(statuses) if statuses else None
+    query = (
+        _sessions_query(class_id, statuses)
+        .order_by("createdAt", direction="DESCENDING")
+        .order_by("__name__", direction="DESCENDING")
+        .limit(page_size + 1)
+    )
+    if after is not None:
+        created_at, session_id = after
+        query = query.start_after({"createdAt": created_at, "__name__": class_ref(class_id).collection("sessions").document(session_id)})
+    docs = _cached_docs(("sessions", class_id, statuses, page_size, after), SESSIONS_TTL_SECONDS, query.stream)
+    page = docs[:page_size]
+    return page, ((page[-1]["createdAt"], page[-1]["id"]) if len(docs) > page_size else None)
+
+def recent_sessions(class_id, include=(), statuses=VISIBLE_STATUSES):
+    """The newest page of sessions, plus any `include` ids (current session, linked session)
+    that fall on older pages; this is all the session pickers read on the hot path."""
+    sessions, _ = page_sessions(class_id, statuses)
+    for session_id in include:
+        if session_id and all(s["id"] != session_id for s in sessions):
+            pinned = get_session(class_id, session_id)
+            if pinned and pinned.get("status") in statuses:
+                sessions.append(pinned)
+    return sessions
+
+def create_class(name: str):
+    ref = backend().collection("classes").document()
+    payload = {"id": ref.id, "name": name, "archived": False, "createdAt": datetime.utcnow()}
+    ref.set(payload)
+    metadata.invalidate("classes")
+    return payload
 
 def create_session(class_id, payload: dict):
     payload["createdAt"] = datetime.utcnow()
+    if payload.get("status") == "open":
+        metadata.invalidate("teams", class_id)
+        payload["roster"] = roster_from_teams(list_teams(class_id))
     doc = class_ref(class_id).collection("sessions").document()
     payload["id"] = doc.id
     doc.set(payload)
+    totals_ref(class_id, doc.id).set({"teams": {}, "seeded": True, "version": 0, "updatedAt": payload["createdAt"]})
+    if payload.get("status") == "open":
+        _set_current_session(class_id, doc.id)
+    metadata.invalidate("sessions", class_id)
+    _refresh_leaderboard_quietly(class_id, doc.id)
     return payload
 
 def set_session_status(class_id, session_id, status: str):
     stamp = {"status": status}
     if status == "open":
         stamp["openedAt"] = datetime.utcnow()
+        metadata.invalidate("teams", class_id)  # snapshot the roster as it is right now
+        stamp["roster"] = roster_from_teams(list_teams(class_id))
     elif status == "closed":
         stamp["closedAt"] = datetime.utcnow()
     session_ref(class_id, session_id).update(stamp)
+    _bump_version(class_id, session_id)
+    if status == "open":
+        _set_current_session(class_id, session_id)
+    elif status == "archived":
+        _set_current_session(class_id, None, only_if=session_id)
+    metadata.invalidate("sessions", class_id)
+    if status in FINAL_STATUSES:
+        try:
+            finalize_session(class_id, session_id)  # also refreshes the leaderboard
+        except Exception:
+            logger.exception("Finalizing %s/%s failed", class_id, session_id)
+    else:
+        if status == "open":
+            rollup_ref(class_id, session_id).delete()  # reopened: its totals are live again
+        _refresh_leaderboard_quietly(class_id, session_id)
+    metadata.invalidate("rollups", class_id)
 
-def submit_vote(class_id, session_id, user_id, team_id, ratings: Dict[str,int], super_vote=False):
-    now = datetime.utcnow()
+def _set_current_session(class_id, session_id, only_if=None):
+    """Point ``classes/{cid}.currentSessionId`` at the session pickers should default to."""
+    if only_if is not None:
+        snap = class_ref(class_id).get()
+        if not snap.exists or (snap.to_dict() or {}).get("currentSessionId") != only_if:
+            return
+    class_ref(class_id).set({"currentSessionId": session_id}, merge=True)
+    metadata.invalidate("classes")
+
+def _bump_version(class_id, session_id):
+    """Tell viewers the session changed without touching any scores (e.g. it was closed)."""
+    totals_ref(class_id, session_id).set({"version": backend().increment(1)}, merge=True)
+
+def _rating_deltas(kind: str, prev: dict | None, new: dict | None) -> Dict[str, dict]:
+    """Per-team changes to the running totals when a voter's ballot goes from `prev` to `new`."""
+    deltas = {}
+    for doc, sign in ((prev, -1), (new, 1)):
+        if not doc:
+            continue
+        entry = deltas.setdefault(doc["teamId"], {kind: {}, f"{kind}Votes": 0})
+        entry[f"{kind}Votes"] += sign
+        for cid, score in doc.get("ratings", {}).items():
+            entry[kind][cid] = entry[kind].get(cid, 0) + sign * int(score)
+    for entry in deltas.values():
+        entry[kind] = {cid: n for cid, n in entry[kind].items() if n}
+    return {t: e for t, e in deltas.items() if e[kind] or e[f"{kind}Votes"]}
+
+def _merge_delta(deltas: Dict[str, dict], kind: str, team: str, entry: dict) -> None:
+    slot = deltas.setdefault(team, {})
+    slot[f"{kind}Votes"] = slot.get(f"{kind}Votes", 0) + entry[f"{kind}Votes"]
+    sums = slot.setdefault(kind, {})
+    for cid, n in entry[kind].items():
+        sums[cid] = sums.get(cid, 0) + n
+
+def _totals_patch(kind: str, deltas: Dict[str, dict], increment=None) -> Dict[str, dict]:
+    increment = increment or backend().increment
+    patch = {}
+    for team, entry in deltas.items():
+        fields = {}
+        changed = {cid: increment(n) for cid, n in entry[kind].items() if n}
+        if changed:
+            fields[kind] = changed
+        if entry[f"{kind}Votes"]:
+            fields[f"{kind}Votes"] = increment(entry[f"{kind}Votes"])
+        if fields:
+            patch[team] = fields
+    return patch
+
+VOTE_HISTORY_LIMIT = 20
+
+def _history_doc(prev: dict, history: dict | None, now) -> dict:
+    """Capped edit log kept beside the vote; legacy in-document `editedHistory` is folded in on first edit."""
+    entries = list(history["entries"]) if history else list(prev.get("editedHistory", []))
+    entries.append({"ts": now, "teamId": prev.get("teamId"), "ratings": prev.get("ratings", {})})
+    return {"userId": prev.get("userId"), "entries": entries[-VOTE_HISTORY_LIMIT:], "updatedAt": now}
+
+def _check_team(class_id, session: dict | None, team_id: str) -> None:
+    roster = session_roster(class_id, session) if session else {}
+    if roster and team_id not in roster:  # an empty roster (no team docs yet) cannot be checked
+        raise ValueError(f"Unknown team {team_id!r}")
+
+def _upsert_vote(ref, totals, kind: str, build, history_ref=None, session=None):
+    """Write the vote returned by `build(prev)` and apply its delta to the session totals atomically.
+
+    The vote, its edit log and the session (for the team roster) are read in a single ``get_all``;
+    the write is guarded by preconditions so a concurrent double submit cannot slip between the
+    read and the commit: first votes use ``create`` (fails if the doc appeared) and edits require
+    the read's update time. `session` is ``(class_id, session_id)`` to check the vote's team.
+    """
+    sref = session_ref(*session) if session is not None else None
+    status = []
+
+    def _apply(transaction):
+        refs = [ref] + [r for r in (history_ref, sref) if r is not None]
+        snaps = {snap.reference.path: snap for snap in transaction.get_all(refs)}
+        snap = snaps.get(ref.path)
+        prev = snap.to_dict() if snap is not None and snap.exists else None
+        vote = build(prev)
+        if sref is not None:
+            session_snap = snaps.get(sref.path)
+            session_doc = session_snap.to_dict() if session_snap is not None and session_snap.exists else None
+            _check_team(session[0], session_doc, vote["teamId"])
+            status[:] = [(session_doc or {}).get("status")]
+        patch = _totals_patch(kind, _rating_deltas(kind, prev, vote))
+        if prev is None:
+            transaction.create(ref, vote)
+        else:
+            update = {**vote, "editedHistory": backend().DELETE_FIELD} if "editedHistory" in prev else vote
+            transaction.update(ref, update, option=backend().write_option(last_update_time=snap.update_time))
+            if history_ref is not None:
+                hist = snaps.get(history_ref.path)
+                hist = hist.to_dict() if hist is not None and hist.exists else None
+                transaction.set(history_ref, _history_doc(prev, hist, vote["updatedAt"]))
+        update = {"version": backend().increment(1), "updatedAt": vote["updatedAt"]}
+        if patch:
+            update["teams"] = patch
+        transaction.set(totals, update, merge=True)
+        return vote
+    vote = _run_transaction(_apply)
+    if status and status[0] in FINAL_STATUSES:
+        metadata.invalidate("rollups", session[0])  # a late ballot: season standings re-finalize
+    return vote
+
+def _peer_vote_doc(prev, user_id, team_id, ratings, super_vote, now):
     vote = {"userId": user_id, "teamId": team_id, "ratings": ratings, "superVote": super_vote, "updatedAt": now}
-    doc = vote_ref(class_id, session_id, user_id).get()
-    if doc.exists:
-        prev = doc.to_dict()
-        history = prev.get("editedHistory", [])
-        history.append({"ts": now, "ratings": prev.get("ratings", {})})
-        vote["editedHistory"] = history
-        vote["createdAt"] = prev.get("createdAt")
-    else:
-        vote["createdAt"] = now
-    vote_ref(class_id, session_id, user_id).set(vote)
+    vote["createdAt"] = prev.get("createdAt") if prev else now
     return vote
 
-def submit_teacher_vote(class_id, session_id, admin_id, team_id, ratings: Dict[str,int]):
+def _teacher_vote_doc(prev, admin_id, team_id, ratings, now):
+    return {"userId": admin_id, "teamId": team_id, "ratings": ratings, "updatedAt": now, "createdAt": now}
+
+def _clean_teacher_ratings(ratings: Dict[str,int]) -> Dict[str,int]:
     clean = {}
     for cid, score in ratings.items():
         value = int(score)
         if value < 1 or value > 5:
             raise ValueError("Teacher rating must be between 1 and 5")
         clean[cid] = value
-    now = datetime.utcnow()
-    doc = {"userId": admin_id, "teamId": team_id, "ratings": clean, "updatedAt": now, "createdAt": now}
-    teacher_vote_ref(class_id, session_id, admin_id).set(doc)
-    return doc
+    return clean
+
+def submit_vote(class_id, session_id, user_id, team_id, ratings: Dict[str,int], super_vote=False):
+    if not team_id:
+        raise ValueError("A presenting team is required")
+    build = lambda prev: _peer_vote_doc(prev, user_id, team_id, ratings, super_vote, datetime.utcnow())
+    vote = _upsert_vote(
+        vote_ref(class_id, session_id, user_id), totals_ref(class_id, session_id), "peer", build,
+        history_ref=vote_history_ref(class_id, session_id, user_id), session=(class_id, session_id),
+    )
+    return vote
+
+def submit_teacher_vote(class_id, session_id, admin_id, team_id, ratings: Dict[str,int]):
+    clean = _clean_teacher_ratings(ratings)
+    build = lambda prev: _teacher_vote_doc(prev, admin_id, team_id, clean, datetime.utcnow())
+    vote = _upsert_vote(
+        teacher_vote_ref(class_id, session_id, admin_id), totals_ref(class_id, session_id), "teacher", build,
+        session=(class_id, session_id),
+    )
+    return vote
+
+BULK_BATCH_SIZE = 200  # Firestore caps a batch at 500 writes; a peer edit takes two plus the totals update
+BULK_WRITE_ATTEMPTS = 3  # re-reads of a batch whose ballots changed under it
+
+def _validate_ballot(row: dict, categories: List[dict]) -> dict:
+    kind = row.get("voteType") or "peer"
+    if kind not in ("peer", "teacher"):
+        raise ValueError(f"Unknown vote type {kind!r}")
+    if not row.get("userId"):
+        raise ValueError("Missing voter id")
+    if not row.get("teamId"):
+        raise ValueError("Missing team id")
+    ratings = row.get("ratings") or {}
+    cat_ids = [c["id"] for c in categories]
+    unknown = sorted(set(ratings) - set(cat_ids))
+    if unknown:
+        raise ValueError(f"Unknown categories: {', '.join(unknown)}")
+    missing = [cid for cid in cat_ids if ratings.get(cid) is None]
+    if missing:
+        raise ValueError(f"Missing ratings for: {', '.join(missing)}")
+    clean = {}
+    for cid in cat_ids:
+        try:
+            value = int(ratings[cid])
+        except (TypeError, ValueError):
+            raise ValueError(f"Rating for {cid} is not a number") from None
+        if value < 1 or value > 5:
+            raise ValueError(f"Rating for {cid} must be between 1 and 5")
+        clean[cid] = value
+    return {"voteType": kind, "userId": str(row["userId"]), "teamId": str(row["teamId"]), "ratings": clean, "superVote": bool(row.get("superVote", False))}
+
+def _commit_ballot_chunk(class_id, session_id, ballots: List[dict]) -> None:
+    """Write one batch of validated ballots and their totals delta.
+
+    The deltas are computed from a plain ``get_all``, so every vote write carries the
+    precondition that read implies: ``create`` for a new ballot, ``last_update_time`` for an
+    existing one. If a live vote lands in between, the whole batch is rejected and re-read
+    instead of counting that voter twice.
+    """
+    store = backend()
+    totals = totals_ref(class_id, session_id)
+    refs = [
+        (vote_ref if b["voteType"] == "peer" else teacher_vote_ref)(class_id, session_id, b["userId"])
+        for b in ballots
+    ]
+    history_refs = {b["userId"]: vote_history_ref(class_id, session_id, b["userId"]) for b in ballots if b["voteType"] == "peer"}
+    for attempt in range(BULK_WRITE_ATTEMPTS):
+        snaps = {snap.reference.path: snap for snap in store.get_all(refs + list(history_refs.values())) if snap.exists}
+        now = datetime.utcnow()
+        batch = store.batch()
+        deltas = {"peer": {}, "teacher": {}}
+        for b, ref in zip(ballots, refs):
+            snap = snaps.get(ref.path)
+            prev = snap.to_dict() if snap else None
+            if b["voteType"] == "peer":
+                vote = _peer_vote_doc(prev, b["userId"], b["teamId"], b["ratings"], b["superVote"], now)
+                if prev:
+                    history_ref = history_refs[b["userId"]]
+                    hist = snaps.get(history_ref.path)
+                    batch.set(history_ref, _history_doc(prev, hist.to_dict() if hist else None, now))
+            else:
+                vote = _teacher_vote_doc(prev, b["userId"], b["teamId"], b["ratings"], now)
+            if prev is None:
+                batch.create(ref, vote)
+            else:
+                update = {**vote, "editedHistory": store.DELETE_FIELD} if "editedHistory" in prev else vote
+                batch.update(ref, update, option=store.write_option(last_update_time=snap.update_time))
+            kind_deltas = deltas[b["voteType"]]
+            for team, entry in _rating_deltas(b["voteType"], prev, vote).items():
+                _merge_delta(kind_deltas, b["voteType"], team, entry)
+        patch = {}
+        for kind, kind_deltas in deltas.items():
+            for team, fields in _totals_patch(kind, kind_deltas).items():
+                patch.setdefault(team, {}).update(fields)
+        update = {"version": store.increment(1), "updatedAt": now}
+        if patch:
+            update["teams"] = patch
+        batch.set(totals, update, merge=True)
+        try:
+            batch.commit()
+            return
+        except store.conflict_errors:
+            if attempt + 1 == BULK_WRITE_ATTEMPTS:
+                raise
+
+def bulk_submit_votes(class_id, session_id, rows: List[dict]) -> Dict:
+    """Validate and write many ballots with batched writes, keeping the session totals in step.
+
+    Each row is ``{"userId", "teamId", "ratings", "voteType": "peer"|"teacher"}``. Rows are checked
+    against the session's categories; invalid ones are reported as ``{"row", "userId", "error"}``
+    and skipped. Existing votes are read in one ``get_all`` per batch so re-imports replace them
+    (peer edits keep their history) instead of double counting, and a batch that races a live
+    vote is re-read rather than committed with stale deltas.
+    """
+    session = get_session(class_id, session_id)
+    if not session:
+        raise ValueError("Session not found")
+    categories = session.get("categories", [])
+    report = {"written": 0, "errors": []}
+    roster = session_roster(class_id, session)
+
+    valid, seen = [], set()
+    for index, row in enumerate(rows):
+        try:
+            ballot = _validate_ballot(row, categories)
+            if roster and ballot["teamId"] not in roster:
+                raise ValueError(f"Unknown team {ballot['teamId']!r}")
+            key = (ballot["voteType"], ballot["userId"])
+            if key in seen:
+                raise ValueError("Duplicate ballot for this voter in the upload")
+            seen.add(key)
+            valid.append((index, ballot))
+        except ValueError as exc:
+            report["errors"].append({"row": index, "userId": row.get("userId", ""), "error": str(exc)})
+
+    for start in range(0, len(valid), BULK_BATCH_SIZE):
+        chunk = valid[start:start + BULK_BATCH_SIZE]
+        try:
+            _commit_ballot_chunk(class_id, session_id, [b for _, b in chunk])
+            report["written"] += len(chunk)
+        except Exception as exc:  # surface the failure per row; earlier batches stay committed
+            report["errors"].extend({"row": i, "userId": b["userId"], "error": f"Write failed: {exc}"} for i, b in chunk)
+    report["errors"].sort(key=lambda e: e["row"])
+    if report["written"]:
+        _refresh_leaderboard_quietly(class_id, session_id)
+        if session.get("status") in FINAL_STATUSES:
+            metadata.invalidate("rollups", class_id)
+    return report
+
+def _totals_from_votes(votes, tvotes) -> dict:
+    teams = {}
+    for kind, docs in (("peer", votes), ("teacher", tvotes)):
+        for d in docs:
+            for team, entry in _rating_deltas(kind, None, d).items():
+                _merge_delta(teams, kind, team, entry)
+    return teams
+
+def rebuild_score_totals(class_id, session_id) -> dict:
+    """Recompute a session's running totals from its votes (backfills sessions created before totals existed)."""
+    ref = totals_ref(class_id, session_id)
+    def _apply(transaction):
+        # Read (and so lock) the totals doc so concurrent increments cannot be overwritten.
+        current = next(iter(transaction.get_all([ref])), None)
+        version = ((current.to_dict() if current is not None and current.exists else None) or {}).get("version") or 0
+        votes = [s.to_dict() for s in transaction.get(_votes_query(class_id, session_id, "votes", SCORING_VOTE_FIELDS))]
+        tvotes = [s.to_dict() for s in transaction.get(_votes_query(class_id, session_id, "teacherVotes", SCORING_VOTE_FIELDS))]
+        totals = {"teams": _totals_from_votes(votes, tvotes), "seeded": True, "version": version + 1, "updatedAt": datetime.utcnow()}
+        transaction.set(ref, totals)
+        return totals
+    return _run_transaction(_apply)
+
+def scores_from_totals(totals: dict, categories: List[dict], teacherPct: int, peersPct: int):
+    return scoring.score_totals(totals, categories, teacherPct, peersPct)
 
 def aggregate_scores(class_id, session_id, categories: List[dict], teacherPct: int, peersPct: int):
-    cats = [c["id"] for c in categories]
-    votes = list(session_ref(class_id, session_id).collection("votes").stream())
-    tvotes = list(session_ref(class_id, session_id).collection("teacherVotes").stream())
-
-    per_team = {}
-    for v in votes:
-        d = v.to_dict()
-        t = d["teamId"]
-        per_team.setdefault(t, {"peer_sum":0, "teacher_sum":0, "cats":{cid:{"peer":0,"teacher":0} for cid in cats}})
-        s = sum(int(d["ratings"].get(cid,0)) for cid in cats)
-        per_team[t]["peer_sum"] += s
-        for cid in cats:
-            per_team[t]["cats"][cid]["peer"] += int(d["ratings"].get(cid,0))
-
-    for tv in tvotes:
-        d = tv.to_dict()
-        t = d["teamId"]
-        per_team.setdefault(t, {"peer_sum":0, "teacher_sum":0, "cats":{cid:{"peer":0,"teacher":0} for cid in cats}})
-        s = sum(int(d["ratings"].get(cid,0)) for cid in cats)
-        per_team[t]["teacher_sum"] += s
-        for cid in cats:
-            per_team[t]["cats"][cid]["teacher"] += int(d["ratings"].get(cid,0))
-
-    for t,vals in per_team.items():
-        vals["combined"] = int(vals["peer_sum"] * (peersPct/100.0) + vals["teacher_sum"] * (teacherPct/100.0))
-    return per_team
+    snap = totals_ref(class_id, session_id).get()
+    totals = snap.to_dict() if snap.exists else None
+    if not totals or not totals.get("seeded"):
+        totals = rebuild_score_totals(class_id, session_id)
+    return scores_from_totals(totals, categories, teacherPct, peersPct)
 
 
 _TEAM_COLOR_PALETTE = [
@@ -124,11 +518,241 @@ def get_team_color(team_name: str) -> str:
     return _TEAM_COLOR_PALETTE[index]
 
 
+def roster_from_teams(teams: List[dict]) -> Dict[str, dict]:
+    """Index teams as ``{team_id: {"name", "color"}}``; a session stores this as its ``roster``."""
+    roster = {}
+    for t in teams:
+        name = t.get("name") or t["id"]
+        roster[t["id"]] = {"name": name, "color": t.get("color") or get_team_color(name)}
+    return roster
+
+
+def session_roster(class_id: str, session: dict) -> Dict[str, dict]:
+    """The roster frozen when the session opened; sessions that never opened (or predate
+    roster snapshots) fall back to the class's current teams."""
+    roster = session.get("roster")
+    return roster if roster is not None else roster_from_teams(list_teams(class_id))
+
+
+def leaderboard_rows(scores: Dict[str, dict], roster: Dict[str, dict]) -> List[dict]:
+    """Ranked rows for every rostered team (teams without votes score zero), best first."""
+    rows = []
+    for team_id in sorted({*scores.keys(), *roster.keys()}):
+        metrics = scores.get(team_id, {})
+        team = roster.get(team_id) or {"name": team_id, "color": get_team_color(team_id)}
+        rows.append({
+            "rank": 0,
+            "teamId": team_id,
+            "name": team["name"],
+            "color": team["color"],
+            "combined": metrics.get("combined", 0),
+            "teacher": metrics.get("teacher_sum", 0),
+            "peers": metrics.get("peer_sum", 0),
+        })
+    rows.sort(key=lambda r: r["combined"], reverse=True)
+    for rank, row in enumerate(rows, start=1):
+        row["rank"] = rank
+    return rows
+
+
+def _board(session_id: str, session: dict, totals: dict, roster: Dict[str, dict]) -> Dict:
+    """The materialized leaderboard document for a session's running totals."""
+    weighting = session.get("weighting", {})
+    scores = scores_from_totals(
+        totals, session.get("categories", []),
+        int(weighting.get("teacherPct", 50)), int(weighting.get("peersPct", 50)),
+    )
+    return {
+        "sessionId": session_id,
+        "title": session.get("title", ""),
+        "status": session.get("status", ""),
+        "weighting": weighting,
+        "version": totals.get("version") or 0,
+        "rows": leaderboard_rows(scores, roster),
+        "updatedAt": datetime.utcnow(),
+    }
+
+
+LEADERBOARD_WRITE_ATTEMPTS = 3
+
+
+def _board_is_current(board: dict | None, session: dict, totals: dict) -> bool:
+    return bool(board) and board.get("version", -1) >= (totals.get("version") or 0) and board.get("status") == session.get("status", "")
+
+
+def refresh_leaderboard(class_id: str, session_id: str) -> Dict | None:
+    """Bring the session's materialized leaderboard document up to date with its running totals.
+
+    Projector clients render from this single document instead of re-reading sessions, teams
+    and votes. Votes only touch the totals; the board is rebuilt by whoever reads it while its
+    ``version`` trails the totals'. The write is a precondition-guarded create/update rather
+    than a transaction, so it never locks the documents voters write, and a refresh that lost
+    the race re-reads instead of putting an older ranking back.
+    """
+    ref = leaderboard_ref(class_id, session_id)
+    sref, tref = session_ref(class_id, session_id), totals_ref(class_id, session_id)
+    store = backend()
+    board = None
+    for _ in range(LEADERBOARD_WRITE_ATTEMPTS):
+        snaps = {snap.reference.path: snap for snap in store.get_all([sref, tref, ref])}
+        session_snap, totals_snap, board_snap = snaps[sref.path], snaps[tref.path], snaps[ref.path]
+        if not session_snap.exists:
+            return None
+        totals = totals_snap.to_dict() if totals_snap.exists else None
+        if not totals or not totals.get("seeded"):  # session predates running totals: backfill once
+            totals = rebuild_score_totals(class_id, session_id)
+        session, current = session_snap.to_dict(), board_snap.to_dict() if board_snap.exists else None
+        if _board_is_current(current, session, totals):
+            return current
+        board = _board(session_id, session, totals, session_roster(class_id, session))
+        try:
+            if current is None:
+                ref.create(board)
+            else:
+                ref.update(board, option=store.write_option(last_update_time=board_snap.update_time))
+            return board
+        except store.conflict_errors:
+            continue  # another reader refreshed first; check whether it already caught up
+    return board
+
+
+def _refresh_leaderboard_quietly(class_id: str, session_id: str) -> None:
+    # The leaderboard is derived data: a failed refresh must not fail the vote that triggered it.
+    try:
+        refresh_leaderboard(class_id, session_id)
+    except Exception:
+        logger.exception("Leaderboard refresh failed for %s/%s", class_id, session_id)
+
+
+def session_version(class_id: str, session_id: str) -> int:
+    """The session's change version alone: a projected read viewers poll before fetching the board."""
+    snap = totals_ref(class_id, session_id).get(field_paths=["version"])
+    return ((snap.to_dict() if snap.exists else None) or {}).get("version") or 0
+
+
+def session_status(class_id: str, session_id: str) -> str | None:
+    """The session's ``status`` alone, for live viewers that hold the totals but not the session."""
+    snap = session_ref(class_id, session_id).get(field_paths=["status"])
+    return (snap.to_dict() or {}).get("status") if snap.exists else None
+
+
+def get_leaderboard(class_id: str, session_id: str) -> Dict | None:
+    """Board and totals in one read for projector clients; rebuilds the board once votes move past it."""
+    ref, tref = leaderboard_ref(class_id, session_id), totals_ref(class_id, session_id)
+    snaps = {snap.reference.path: snap for snap in backend().get_all([ref, tref])}
+    board = snaps[ref.path].to_dict() if snaps[ref.path].exists else None
+    totals = snaps[tref.path].to_dict() if snaps[tref.path].exists else None
+    if board and totals and board.get("version", -1) >= (totals.get("version") or 0):
+        return board
+    return refresh_leaderboard(class_id, session_id)
+
+
+def _rollup_from_board(board: Dict) -> Dict:
+    teams = {
+        r["teamId"]: {k: r[k] for k in ("name", "color", "combined", "teacher", "peers")}
+        for r in board.get("rows", [])
+    }
+    return {"sessionId": board.get("sessionId"), "title": board.get("title", ""), "teams": teams}
+
+
+def finalize_session(class_id: str, session_id: str) -> Dict | None:
+    """Store a closed session's final per-team totals so season standings never re-score it.
+
+    The rollup keeps the totals ``version`` it was built from; ballots imported after the close
+    move the totals past it and `_final_rollups` finalizes the session again.
+    """
+    board = refresh_leaderboard(class_id, session_id)
+    if board is None:
+        return None
+    rollup = {**_rollup_from_board(board), "version": board.get("version", 0), "finalizedAt": datetime.utcnow()}
+    rollup_ref(class_id, session_id).set(rollup)
+    return rollup
+
+
+def _final_rollups(class_id: str, session_ids: List[str]) -> Dict[str, Dict]:
+    """Rollups of finalized sessions, read with their totals in one ``get_all``. Sessions whose
+    totals moved past their rollup (late ballots) or that were closed before rollups existed are
+    finalized again, in parallel."""
+    def _load():
+        rollup_refs = {sid: rollup_ref(class_id, sid) for sid in session_ids}
+        totals_refs = {sid: totals_ref(class_id, sid) for sid in session_ids}
+        refs = list(rollup_refs.values()) + list(totals_refs.values())
+        snaps = {snap.reference.path: snap for snap in (backend().get_all(refs) if refs else [])}
+        found, stale = {}, []
+        for sid in session_ids:
+            rollup, totals = snaps[rollup_refs[sid].path], snaps[totals_refs[sid].path]
+            version = ((totals.to_dict() if totals.exists else None) or {}).get("version") or 0
+            if rollup.exists and rollup.to_dict().get("version", -1) >= version:
+                found[sid] = rollup.to_dict()
+            else:
+                stale.append(sid)
+        with ThreadPoolExecutor(max_workers=SEASON_FETCH_WORKERS) as pool:
+            for sid, rollup in zip(stale, pool.map(lambda sid: finalize_session(class_id, sid), stale)):
+                if rollup is not None:
+                    found[sid] = rollup
+        return found
+    return metadata.get_or_load(("rollups", class_id, tuple(sorted(session_ids))), _load, ROLLUPS_TTL_SECONDS)
+
+
+def season_standings(class_id: str) -> Dict:
+    """Class-wide standings summed over every session that has started.
+
+    Finalized (closed/archived) sessions come from their cached rollups; only open sessions are
+    read live, from their materialized boards, concurrently. Rows match `leaderboard_rows` plus a
+    ``sessions`` count of sessions the team scored in.
+    """
+    sessions = list_sessions(class_id, statuses=("open",) + FINAL_STATUSES)
+    final_ids = [s["id"] for s in sessions if s.get("status") in FINAL_STATUSES]
+    open_ids = [s["id"] for s in sessions if s.get("status") == "open"]
+    fetched = fetch_concurrently(
+        final=lambda: _final_rollups(class_id, final_ids),
+        **{sid: (lambda sid=sid: get_leaderboard(class_id, sid)) for sid in open_ids},
+    )
+    rollups = dict(fetched.pop("final"))
+    rollups.update({sid: _rollup_from_board(board) for sid, board in fetched.items() if board is not None})
+
+    standings: Dict[str, dict] = {}
+    for session in sessions:  # oldest first, so the latest name and color win
+        for team_id, team in rollups.get(session["id"], {}).get("teams", {}).items():
+            row = standings.setdefault(team_id, {"teamId": team_id, "combined": 0, "teacher": 0, "peers": 0, "sessions": 0})
+            row.update(name=team["name"], color=team["color"])
+            for key in ("combined", "teacher", "peers"):
+                row[key] += team[key]
+            row["sessions"] += 1 if (team["combined"] or team["teacher"] or team["peers"]) else 0
+    rows = sorted(standings.values(), key=lambda r: (-r["combined"], r["teamId"]))
+    for rank, row in enumerate(rows, start=1):
+        row["rank"] = rank
+    return {"classId": class_id, "sessions": len(rollups), "open": len(open_ids), "rows": rows}
+
+
 def export_session_data(class_id: str, session_id: str) -> Dict:
-    """Export all data for a session including votes, teams, and scores."""
-    import pandas as pd
+    """Export all data for a session including votes, teams, and scores.
 
-    session = get_session(class_id, session_id)
+    Session, votes, teacher votes and teams are fetched concurrently; votes are streamed once and
+    reused for both the vote records and the score summary.
+    """
+    return _export_from_bundle(load_session_bundle(class_id, session_id))
+
+
+def _vote_record(vote: dict, vote_type: str, categories: List[dict], team_lookup: Dict[str, str]) -> dict:
+    """One row of the export's Votes sheet."""
+    team_id = vote.get("teamId", "")
+    record = {
+        "voter_id": vote.get("userId", ""),
+        "team_id": team_id,
+        "team_name": team_lookup.get(team_id, team_id),
+        "vote_type": vote_type,
+        "created_at": vote.get("createdAt", ""),
+        "updated_at": vote.get("updatedAt", ""),
+    }
+    for cat in categories:
+        record[f"rating_{cat['id']}"] = vote.get("ratings", {}).get(cat["id"], 0)
+    return record
+
+
+def _export_from_bundle(bundle: Dict) -> Dict:
+    """Vote records and the score summary for a `load_session_bundle` result."""
+    session = bundle["session"]
     if not session:
         return {"error": "Session not found"}
 
@@ -137,46 +761,16 @@ def export_session_data(class_id: str, session_id: str) -> Dict:
     teacher_pct = int(weighting.get("teacherPct", 50))
     peers_pct = int(weighting.get("peersPct", 50))
 
-    # Get votes
-    votes = list(session_ref(class_id, session_id).collection("votes").stream())
-    teacher_votes = list(session_ref(class_id, session_id).collection("teacherVotes").stream())
-    teams = list_teams(class_id)
-    team_lookup = {t["id"]: t.get("name", t["id"]) for t in teams}
+    votes, teacher_votes = bundle["votes"], bundle["teacherVotes"]
+    roster = session["roster"] if session.get("roster") is not None else roster_from_teams(bundle["teams"])
+    team_lookup = {tid: t["name"] for tid, t in roster.items()}
 
     # Build vote records
-    vote_records = []
-    for v in votes:
-        d = v.to_dict()
-        record = {
-            "voter_id": d.get("userId", ""),
-            "team_id": d.get("teamId", ""),
-            "team_name": team_lookup.get(d.get("teamId", ""), d.get("teamId", "")),
-            "vote_type": "peer",
-            "created_at": d.get("createdAt", ""),
-            "updated_at": d.get("updatedAt", ""),
-        }
-        for cat in categories:
-            cat_id = cat["id"]
-            record[f"rating_{cat_id}"] = d.get("ratings", {}).get(cat_id, 0)
-        vote_records.append(record)
-
-    for tv in teacher_votes:
-        d = tv.to_dict()
-        record = {
-            "voter_id": d.get("userId", ""),
-            "team_id": d.get("teamId", ""),
-            "team_name": team_lookup.get(d.get("teamId", ""), d.get("teamId", "")),
-            "vote_type": "teacher",
-            "created_at": d.get("createdAt", ""),
-            "updated_at": d.get("updatedAt", ""),
-        }
-        for cat in categories:
-            cat_id = cat["id"]
-            record[f"rating_{cat_id}"] = d.get("ratings", {}).get(cat_id, 0)
-        vote_records.append(record)
+    vote_records = [_vote_record(d, "peer", categories, team_lookup) for d in votes]
+    vote_records += [_vote_record(d, "teacher", categories, team_lookup) for d in teacher_votes]
 
     # Build scores summary
-    scores = aggregate_scores(class_id, session_id, categories, teacher_pct, peers_pct)
+    scores = scoring.score_votes(votes, teacher_votes, categories, teacher_pct, peers_pct)
     score_records = []
     for team_id, metrics in scores.items():
         score_records.append({
@@ -186,47 +780,83 @@ def export_session_data(class_id: str, session_id: str) -> Dict:
             "teacher_score": metrics.get("teacher_sum", 0),
             "combined_score": metrics.get("combined", 0),
         })
+    category_records = [
+        {
+            "team_id": team_id,
+            "team_name": team_lookup.get(team_id, team_id),
+            "category_id": cat_id,
+            "peer_sum": sums["peer"],
+            "teacher_sum": sums["teacher"],
+        }
+        for team_id, metrics in scores.items()
+        for cat_id, sums in metrics.get("cats", {}).items()
+    ]
 
     return {
         "session": session,
         "votes": vote_records,
         "scores": score_records,
+        "category_scores": category_records,
         "categories": categories,
     }
 
 
-def export_to_csv(class_id: str, session_id: str) -> bytes:
-    """Export session data to CSV format."""
+def ballots_from_csv(buffer) -> List[dict]:
+    """Read ballots laid out like the export's Votes sheet (voter_id, team_id, vote_type, rating_<category>).
+
+    Blank cells and the export's ``0`` both mean unrated, so a re-imported partial ballot is
+    reported as missing those ratings; complete ballots round-trip unchanged.
+    """
     import pandas as pd
-    import io
 
-    data = export_session_data(class_id, session_id)
-    if "error" in data:
-        return b""
+    frame = pd.read_csv(buffer, dtype=str, keep_default_na=False)
+    rating_cols = [c for c in frame.columns if c.startswith("rating_")]
+    rows = []
+    for record in frame.to_dict(orient="records"):
+        rows.append({
+            "userId": record.get("voter_id", "").strip(),
+            "teamId": record.get("team_id", "").strip(),
+            "voteType": record.get("vote_type", "").strip() or "peer",
+            "ratings": {c[len("rating_"):]: record[c].strip() for c in rating_cols if record[c].strip() not in ("", "0")},
+        })
+    return rows
+
+
+_SCORE_COLUMNS = ["team_id", "team_name", "peer_score", "teacher_score", "combined_score"]
+
 
-    # Create scores DataFrame
-    scores_df = pd.DataFrame(data["scores"])
+def _rankings_frame(data: Dict):
+    import pandas as pd
+
+    scores_df = pd.DataFrame(data["scores"], columns=_SCORE_COLUMNS)
     scores_df = scores_df.sort_values("combined_score", ascending=False).reset_index(drop=True)
     scores_df.insert(0, "rank", range(1, len(scores_df) + 1))
+    return scores_df
+
+
+def export_to_csv(class_id: str, session_id: str, data: Dict | None = None) -> bytes:
+    """Export session data to CSV format (pass `data` to reuse an `export_session_data` result)."""
+    data = data or export_session_data(class_id, session_id)
+    if "error" in data:
+        return b""
+
+    scores_df = _rankings_frame(data)
 
     output = io.StringIO()
     scores_df.to_csv(output, index=False)
     return output.getvalue().encode("utf-8")
 
 
-def export_to_excel(class_id: str, session_id: str) -> bytes:
-    """Export session data to Excel format with multiple sheets."""
+def export_to_excel(class_id: str, session_id: str, data: Dict | None = None) -> bytes:
+    """Export session data to Excel format with multiple sheets (pass `data` to reuse a fetch)."""
     import pandas as pd
-    import io
 
-    data = export_session_data(class_id, session_id)
+    data = data or export_session_data(class_id, session_id)
     if "error" in data:
         return b""
 
     # Create DataFrames
-    scores_df = pd.DataFrame(data["scores"])
-    scores_df = scores_df.sort_values("combined_score", ascending=False).reset_index(drop=True)
-    scores_df.insert(0, "rank", range(1, len(scores_df) + 1))
+    scores_df = _rankings_frame(data)
 
     votes_df = pd.DataFrame(data["votes"])
 
@@ -237,3 +867,244 @@ def export_to_excel(class_id: str, session_id: str) -> bytes:
             votes_df.to_excel(writer, sheet_name="Votes", index=False)
 
     return output.getvalue()
+
+
+CSV_CHUNK_ROWS = 500
+_VOTE_COLUMNS = ["voter_id", "team_id", "team_name", "vote_type", "created_at", "updated_at"]
+_SESSION_INDEX_COLUMNS = ["session_id", "title", "status", "created_at", "folder"]
+
+
+def _csv_chunks(header: List[str], rows: Iterable[list], chunk_rows: int | None = None) -> Iterator[bytes]:
+    """Encode `rows` as UTF-8 CSV (same dialect as the pandas exports), a chunk every `chunk_rows` rows."""
+    chunk_rows = chunk_rows or CSV_CHUNK_ROWS
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(header)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % chunk_rows == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def iter_votes_csv(class_id: str, session_id: str, session: Dict | None = None) -> Iterator[bytes]:
+    """Stream a session's raw votes (the Votes sheet layout) as CSV chunks while they are read.
+
+    Peer and teacher votes are streamed straight from their projected queries, so only one chunk
+    of rows is held at a time. Pass `session` when the caller already has the session document.
+    """
+    session = session or get_session(class_id, session_id)
+    if session is None:
+        return
+    categories = session.get("categories", [])
+    team_lookup = {tid: t["name"] for tid, t in session_roster(class_id, session).items()}
+    columns = _VOTE_COLUMNS + [f"rating_{cat['id']}" for cat in categories]
+
+    def rows():
+        for name, vote_type in (("votes", "peer"), ("teacherVotes", "teacher")):
+            for snap in _votes_query(class_id, session_id, name, EXPORT_VOTE_FIELDS).stream():
+                record = _vote_record(snap.to_dict(), vote_type, categories, team_lookup)
+                yield [record[c] for c in columns]
+    yield from _csv_chunks(columns, rows())
+
+
+def iter_rankings_csv(class_id: str, session_id: str, session: Dict | None = None) -> Iterator[bytes]:
+    """A session's rankings (the `export_to_csv` layout), scored from the running totals."""
+    session = session or get_session(class_id, session_id)
+    if session is None:
+        return
+    weighting = session.get("weighting", {})
+    scores = aggregate_scores(
+        class_id, session_id, session.get("categories", []),
+        int(weighting.get("teacherPct", 50)), int(weighting.get("peersPct", 50)),
+    )
+    roster = session_roster(class_id, session)
+    ranked = sorted(scores.items(), key=lambda item: item[1].get("combined", 0), reverse=True)
+    rows = (
+        [rank, team_id, roster.get(team_id, {}).get("name", team_id),
+         metrics.get("peer_sum", 0), metrics.get("teacher_sum", 0), metrics.get("combined", 0)]
+        for rank, (team_id, metrics) in enumerate(ranked, start=1)
+    )
+    yield from _csv_chunks(["rank"] + _SCORE_COLUMNS, rows)
+
+
+def _archive_folder(session: Dict) -> str:
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", session.get("title", "")).strip("-").lower()[:40]
+    return f"{slug}_{session['id']}" if slug else session["id"]
+
+
+def write_class_archive(class_id: str, fileobj: BinaryIO, statuses=None) -> int:
+    """Write every session's rankings and raw votes into a ZIP on `fileobj`; returns the session count.
+
+    Sessions are exported one after another and each CSV is streamed into its archive member,
+    so peak memory is one chunk of rows however many sessions and votes the class has. Writing
+    to a file (or any non-seekable stream) keeps the archive itself out of memory too.
+    """
+    sessions = list_sessions(class_id, statuses)
+    index = []
+    with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for session in sessions:
+            folder = _archive_folder(session)
+            for name, chunks in (
+                ("rankings.csv", iter_rankings_csv(class_id, session["id"], session)),
+                ("votes.csv", iter_votes_csv(class_id, session["id"], session)),
+            ):
+                with archive.open(f"{folder}/{name}", "w") as member:
+                    for chunk in chunks:
+                        member.write(chunk)
+            index.append([session["id"], session.get("title", ""), session.get("status", ""), session.get("createdAt", ""), folder])
+        archive.writestr("sessions.csv", b"".join(_csv_chunks(_SESSION_INDEX_COLUMNS, index)))
+    return len(sessions)
+
+
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "leaderboard-exports")
+EXPORT_TTL_SECONDS = 3600  # prepared class exports older than this are deleted on the next build
+
+
+def _sweep_exports(now: float) -> None:
+    """Delete prepared exports nobody downloaded in time; sessions that end never clean up."""
+    for entry in os.scandir(EXPORT_DIR):
+        try:
+            if entry.is_file() and now - entry.stat().st_mtime > EXPORT_TTL_SECONDS:
+                os.unlink(entry.path)
+        except FileNotFoundError:
+            pass  # another build swept it first
+
+
+def _write_temp_zip(prefix: str, write) -> str:
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    _sweep_exports(time.time())
+    handle = tempfile.NamedTemporaryFile(prefix=prefix, suffix=".zip", dir=EXPORT_DIR, delete=False)
+    try:
+        with handle:
+            write(handle)
+    except BaseException:
+        os.unlink(handle.name)
+        raise
+    return handle.name
+
+
+def export_class_zip(class_id: str, statuses=None) -> str:
+    """`write_class_archive` into a temporary file for download buttons; returns its path.
+
+    The archive goes to disk under `EXPORT_DIR`, not memory, so callers can keep just the path
+    around. Files older than `EXPORT_TTL_SECONDS` are swept on the next build.
+    """
+    return _write_temp_zip(f"class_{class_id}_", lambda handle: write_class_archive(class_id, handle, statuses))
+
+
+def _arrow_schemas(pa) -> Dict[str, "pa.Schema"]:
+    """Typed layout of the columnar export: one table per kind, rows from every exported session."""
+    ts = pa.timestamp("us", tz="UTC")
+    keys = [("class_id", pa.string()), ("session_id", pa.string())]
+    vote = pa.schema(keys + [
+        ("voter_id", pa.string()), ("team_id", pa.string()), ("team_name", pa.string()),
+        ("category_id", pa.string()), ("rating", pa.int16()),
+        ("created_at", ts), ("updated_at", ts),
+    ])
+    return {
+        "sessions": pa.schema(keys + [
+            ("title", pa.string()), ("status", pa.string()), ("created_at", ts),
+            ("teacher_pct", pa.int16()), ("peers_pct", pa.int16()), ("category_ids", pa.list_(pa.string())),
+        ]),
+        "votes": vote,
+        "teacher_votes": vote,
+        "scores": pa.schema(keys + [
+            ("rank", pa.int32()), ("team_id", pa.string()), ("team_name", pa.string()),
+            ("peer_score", pa.float64()), ("teacher_score", pa.float64()), ("combined_score", pa.int64()),
+        ]),
+        "category_scores": pa.schema(keys + [
+            ("team_id", pa.string()), ("team_name", pa.string()), ("category_id", pa.string()),
+            ("peer_sum", pa.int64()), ("teacher_sum", pa.int64()),
+        ]),
+    }
+
+
+def _timestamp(value):
+    return value if isinstance(value, datetime) else None  # exports use "" for a missing time
+
+
+def _arrow_rows(class_id: str, data: Dict) -> Dict[str, List[dict]]:
+    session = data["session"]
+    keys = {"class_id": class_id, "session_id": session["id"]}
+    weighting = session.get("weighting", {})
+    rows = {
+        "sessions": [{
+            **keys,
+            "title": session.get("title", ""),
+            "status": session.get("status", ""),
+            "created_at": _timestamp(session.get("createdAt")),
+            "teacher_pct": int(weighting.get("teacherPct", 50)),
+            "peers_pct": int(weighting.get("peersPct", 50)),
+            "category_ids": [cat["id"] for cat in data["categories"]],
+        }],
+        "votes": [],
+        "teacher_votes": [],
+        "scores": [{**keys, **record} for record in _rankings_frame(data).to_dict(orient="records")],
+        "category_scores": [{**keys, **record} for record in data.get("category_scores", [])],
+    }
+    for vote in data["votes"]:
+        table = rows["votes" if vote["vote_type"] == "peer" else "teacher_votes"]
+        for cat in data["categories"]:
+            rating = vote.get(f"rating_{cat['id']}")  # the CSV's 0 means unrated; ratings run 1-5
+            table.append({
+                **keys,
+                "voter_id": vote["voter_id"],
+                "team_id": vote["team_id"],
+                "team_name": vote["team_name"],
+                "category_id": cat["id"],
+                "rating": int(rating) if rating else None,
+                "created_at": _timestamp(vote["created_at"]),
+                "updated_at": _timestamp(vote["updated_at"]),
+            })
+    return rows
+
+
+def export_arrow_tables(class_id: str, session_id: str | None = None, data: Dict | None = None) -> Dict[str, "pa.Table"]:
+    """Typed Arrow tables (sessions, votes, teacher_votes, scores, category_scores) built from
+    `export_session_data`: for one session (pass `data` to reuse a fetch) or, without
+    `session_id`, for every session of the class, stacked with ``class_id``/``session_id`` keys.
+    Votes are long: one row per vote and category, so sessions with different categories share
+    a schema."""
+    import pyarrow as pa
+
+    if session_id is not None:
+        exports = [data or export_session_data(class_id, session_id)]
+    else:
+        exports = (export_session_data(class_id, s["id"]) for s in list_sessions(class_id))
+    schemas = _arrow_schemas(pa)
+    batches = {name: [] for name in schemas}
+    for export in exports:
+        if "error" in export:
+            continue
+        for name, rows in _arrow_rows(class_id, export).items():
+            batches[name].append(pa.Table.from_pylist(rows, schema=schemas[name]))
+    return {
+        name: pa.concat_tables(tables) if tables else schemas[name].empty_table()
+        for name, tables in batches.items()
+    }
+
+
+def write_parquet_archive(class_id: str, fileobj: BinaryIO, session_id: str | None = None, data: Dict | None = None) -> None:
+    """`export_arrow_tables` as one Parquet file per table, zipped onto `fileobj` (``votes.parquet``, ...)."""
+    import pyarrow.parquet as pq
+
+    with zipfile.ZipFile(fileobj, "w") as archive:  # Parquet pages are already compressed
+        for name, table in export_arrow_tables(class_id, session_id, data).items():
+            with archive.open(f"{name}.parquet", "w") as member:
+                pq.write_table(table, member, compression="zstd")
+
+
+def export_to_parquet(class_id: str, session_id: str | None = None, data: Dict | None = None) -> bytes:
+    """`write_parquet_archive` into memory, for a single session's download button."""
+    output = io.BytesIO()
+    write_parquet_archive(class_id, output, session_id, data)
+    return output.getvalue()
+
+
+def export_class_parquet(class_id: str) -> str:
+    """The whole class as `write_parquet_archive`, in a temporary file; returns its path."""
+    return _write_temp_zip(f"class_{class_id}_parquet_", lambda handle: write_parquet_archive(class_id, handle))
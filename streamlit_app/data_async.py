@@ -0,0 +1,229 @@
+"""Coroutine counterpart of `streamlit_app.data` for async servers.
+
+Same documents, same cache and the same scoring as the sync module. Vote deltas, the
+leaderboard document and the export records all come from `data`'s helpers; only the I/O
+is different. Reads go through the async Firestore client (`storage.aio`), so one event
+loop can serve many classrooms, and independent reads are awaited together instead of
+being handed to a thread pool.
+
+    board = await data_async.refresh_leaderboard(class_id, session_id)
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+from typing import Dict, List
+
+from . import data, scoring
+from .cache import metadata
+from .storage.aio import AsyncStorageBackend, get_async_backend
+
+
+def backend() -> AsyncStorageBackend:
+    """Async view of the configured document store (see `data.backend`)."""
+    return get_async_backend()
+
+def class_ref(class_id): return backend().collection("classes").document(class_id)
+def session_ref(class_id, session_id): return class_ref(class_id).collection("sessions").document(session_id)
+def vote_ref(class_id, session_id, user_id): return session_ref(class_id, session_id).collection("votes").document(user_id)
+def teacher_vote_ref(class_id, session_id, admin_id): return session_ref(class_id, session_id).collection("teacherVotes").document(admin_id)
+def totals_ref(class_id, session_id): return session_ref(class_id, session_id).collection("aggregates").document("totals")
+def leaderboard_ref(class_id, session_id): return session_ref(class_id, session_id).collection("aggregates").document("leaderboard")
+def vote_history_ref(class_id, session_id, user_id): return session_ref(class_id, session_id).collection("voteHistory").document(user_id)
+
+
+def _snap_dict(snap) -> dict | None:
+    return snap.to_dict() if snap is not None and snap.exists else None
+
+
+async def _cached_docs(key, ttl, query):
+    async def _load():
+        return [{**d.to_dict(), "id": d.id} async for d in query.stream()]
+    docs = await metadata.get_or_load_async(key, _load, ttl)
+    return [dict(d) for d in docs]
+
+
+async def list_classes():
+    query = backend().collection("classes").where("archived", "==", False)
+    return await _cached_docs(("classes",), data.CLASSES_TTL_SECONDS, query)
+
+
+async def list_teams(class_id):
+    return await _cached_docs(("teams", class_id), data.TEAMS_TTL_SECONDS, class_ref(class_id).collection("teams"))
+
+
+async def list_sessions(class_id, statuses=None):
+    """Every session of a class, oldest first; `statuses` filters server-side."""
+    statuses = tuple(statuses) if statuses else None
+    query = class_ref(class_id).collection("sessions")
+    if statuses:
+        query = query.where("status", "in", list(statuses))
+    return await _cached_docs(("sessions", class_id, statuses), data.SESSIONS_TTL_SECONDS, query.order_by("createdAt"))
+
+
+async def get_session(class_id, session_id):
+    doc = await session_ref(class_id, session_id).get()
+    return ({**doc.to_dict(), "id": doc.id} if doc.exists else None)
+
+
+def _votes_query(class_id, session_id, name, fields):
+    return session_ref(class_id, session_id).collection(name).select(list(fields))
+
+
+async def _stream_dicts(class_id, session_id, name, fields=data.EXPORT_VOTE_FIELDS):
+    return [d.to_dict() async for d in _votes_query(class_id, session_id, name, fields).stream()]
+
+
+async def load_session_bundle(class_id, session_id) -> Dict:
+    """Session metadata, both vote collections and the class's teams, awaited together."""
+    session, votes, teacher_votes, teams = await asyncio.gather(
+        get_session(class_id, session_id),
+        _stream_dicts(class_id, session_id, "votes"),
+        _stream_dicts(class_id, session_id, "teacherVotes"),
+        list_teams(class_id),
+    )
+    return {"session": session, "votes": votes, "teacherVotes": teacher_votes, "teams": teams}
+
+
+async def session_roster(class_id: str, session: dict) -> Dict[str, dict]:
+    roster = session.get("roster")
+    return roster if roster is not None else data.roster_from_teams(await list_teams(class_id))
+
+
+async def _check_team(class_id, session: dict | None, team_id: str) -> None:
+    roster = await session_roster(class_id, session) if session else {}
+    if roster and team_id not in roster:
+        raise ValueError(f"Unknown team {team_id!r}")
+
+
+async def _upsert_vote(ref, totals, kind: str, build, history_ref=None, session=None):
+    """Async `data._upsert_vote`: same single read, same preconditions, same totals delta."""
+    store = backend()
+    sref = session_ref(*session) if session is not None else None
+    status = []
+
+    async def _apply(transaction):
+        refs = [ref] + [r for r in (history_ref, sref) if r is not None]
+        snaps = {snap.reference.path: snap async for snap in await transaction.get_all(refs)}
+        snap = snaps.get(ref.path)
+        prev = _snap_dict(snap)
+        vote = build(prev)
+        if sref is not None:
+            session_doc = _snap_dict(snaps.get(sref.path))
+            await _check_team(session[0], session_doc, vote["teamId"])
+            status[:] = [(session_doc or {}).get("status")]
+        patch = data._totals_patch(kind, data._rating_deltas(kind, prev, vote), increment=store.increment)
+        if prev is None:
+            transaction.create(ref, vote)
+        else:
+            update = {**vote, "editedHistory": store.DELETE_FIELD} if "editedHistory" in prev else vote
+            transaction.update(ref, update, option=store.write_option(last_update_time=snap.update_time))
+            if history_ref is not None:
+                hist = _snap_dict(snaps.get(history_ref.path))
+                transaction.set(history_ref, data._history_doc(prev, hist, vote["updatedAt"]))
+        update = {"version": store.increment(1), "updatedAt": vote["updatedAt"]}
+        if patch:
+            update["teams"] = patch
+        transaction.set(totals, update, merge=True)
+        return vote
+    vote = await store.run_transaction(_apply)
+    if status and status[0] in data.FINAL_STATUSES:
+        metadata.invalidate("rollups", session[0])
+    return vote
+
+
+async def submit_vote(class_id, session_id, user_id, team_id, ratings: Dict[str, int], super_vote=False):
+    if not team_id:
+        raise ValueError("A presenting team is required")
+    build = lambda prev: data._peer_vote_doc(prev, user_id, team_id, ratings, super_vote, datetime.utcnow())
+    vote = await _upsert_vote(
+        vote_ref(class_id, session_id, user_id), totals_ref(class_id, session_id), "peer", build,
+        history_ref=vote_history_ref(class_id, session_id, user_id), session=(class_id, session_id),
+    )
+    return vote
+
+
+async def submit_teacher_vote(class_id, session_id, admin_id, team_id, ratings: Dict[str, int]):
+    clean = data._clean_teacher_ratings(ratings)
+    build = lambda prev: data._teacher_vote_doc(prev, admin_id, team_id, clean, datetime.utcnow())
+    vote = await _upsert_vote(
+        teacher_vote_ref(class_id, session_id, admin_id), totals_ref(class_id, session_id), "teacher", build,
+        session=(class_id, session_id),
+    )
+    return vote
+
+
+async def rebuild_score_totals(class_id, session_id) -> dict:
+    """Recompute a session's running totals from its votes (see `data.rebuild_score_totals`)."""
+    ref = totals_ref(class_id, session_id)
+
+    async def _apply(transaction):
+        current = [snap async for snap in await transaction.get_all([ref])]
+        version = (_snap_dict(current[0] if current else None) or {}).get("version") or 0
+        votes, tvotes = [
+            [s.to_dict() async for s in await transaction.get(_votes_query(class_id, session_id, name, data.SCORING_VOTE_FIELDS))]
+            for name in ("votes", "teacherVotes")
+        ]
+        totals = {"teams": data._totals_from_votes(votes, tvotes), "seeded": True, "version": version + 1, "updatedAt": datetime.utcnow()}
+        transaction.set(ref, totals)
+        return totals
+    return await backend().run_transaction(_apply)
+
+
+async def aggregate_scores(class_id, session_id, categories: List[dict], teacherPct: int, peersPct: int):
+    totals = _snap_dict(await totals_ref(class_id, session_id).get())
+    if not totals or not totals.get("seeded"):
+        totals = await rebuild_score_totals(class_id, session_id)
+    return scoring.score_totals(totals, categories, teacherPct, peersPct)
+
+
+async def refresh_leaderboard(class_id: str, session_id: str) -> Dict | None:
+    """Bring the materialized leaderboard up to date with a guarded write (see `data.refresh_leaderboard`)."""
+    ref = leaderboard_ref(class_id, session_id)
+    sref, tref = session_ref(class_id, session_id), totals_ref(class_id, session_id)
+    store = backend()
+    board = None
+    for _ in range(data.LEADERBOARD_WRITE_ATTEMPTS):
+        snaps = {snap.reference.path: snap for snap in await store.get_all([sref, tref, ref])}
+        session = _snap_dict(snaps.get(sref.path))
+        if session is None:
+            return None
+        totals = _snap_dict(snaps.get(tref.path))
+        if not totals or not totals.get("seeded"):
+            totals = await rebuild_score_totals(class_id, session_id)
+        board_snap = snaps.get(ref.path)
+        current = _snap_dict(board_snap)
+        if data._board_is_current(current, session, totals):
+            return current
+        board = data._board(session_id, session, totals, await session_roster(class_id, session))
+        try:
+            if current is None:
+                await ref.create(board)
+            else:
+                await ref.update(board, option=store.write_option(last_update_time=board_snap.update_time))
+            return board
+        except store.conflict_errors:
+            continue
+    return board
+
+
+async def get_leaderboard(class_id: str, session_id: str) -> Dict | None:
+    ref, tref = leaderboard_ref(class_id, session_id), totals_ref(class_id, session_id)
+    snaps = {snap.reference.path: snap for snap in await backend().get_all([ref, tref])}
+    board, totals = _snap_dict(snaps.get(ref.path)), _snap_dict(snaps.get(tref.path))
+    if board and totals and board.get("version", -1) >= (totals.get("version") or 0):
+        return board
+    return await refresh_leaderboard(class_id, session_id)
+
+
+async def export_session_data(class_id: str, session_id: str) -> Dict:
+    """Export all data for a session (same records as `data.export_session_data`)."""
+    return data._export_from_bundle(await load_session_bundle(class_id, session_id))
+
+
+async def export_to_csv(class_id: str, session_id: str) -> bytes:
+    return data.export_to_csv(class_id, session_id, data=await export_session_data(class_id, session_id))
+
+
+async def export_to_excel(class_id: str, session_id: str) -> bytes:
+    return data.export_to_excel(class_id, session_id, data=await export_session_data(class_id, session_id))
@@ -0,0 +1,222 @@
+"""Read-only leaderboard feed served outside Streamlit (JSON and Server-Sent Events).
+
+    GET /classes/<class_id>/sessions/<session_id>/leaderboard     -> current standings as JSON
+    GET ... with ``Accept: text/event-stream`` (or ``?stream=1``)  -> SSE stream of standings
+
+Every subscriber of a session shares one `live.LiveSession` listener and one computed payload
+per change, so a room full of phones costs one aggregation per vote rather than one per viewer.
+
+    python -m streamlit_app.feed --port 8502
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import re
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from . import data, live
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8502
+KEEPALIVE_SECONDS = 15
+SQLITE_POLL_SECONDS = 1
+MAX_CHANNELS = 200  # sessions watched at once; each holds a listener (a polling thread on SQLite)
+_ROUTE = re.compile(r"^/classes/(?P<class_id>[^/]+)/sessions/(?P<session_id>[^/]+)/leaderboard/?$")
+
+
+class Channel:
+    """Latest standings for one session, recomputed once per listener change and shared."""
+
+    def __init__(self, class_id: str, session_id: str) -> None:
+        self.class_id = class_id
+        self.session_id = session_id
+        self._lock = threading.Lock()
+        self._revision: Tuple[int, int] | None = None
+        self._payload: Dict | None = None
+
+    def state(self) -> live.LiveSession:
+        # Re-watching keeps the listener alive while anyone is subscribed.
+        return live.watch(self.class_id, self.session_id)
+
+    def payload(self) -> Tuple[Tuple[int, int], Dict | None]:
+        """Return ``(revision, payload)``; ``None`` if the session does not exist.
+
+        Keyed on the listener's `revision`, not its bare version: an idle listener that was
+        dropped and recreated restarts its version count and must not match the cached payload.
+        """
+        state = self.state()
+        with self._lock:
+            revision = state.revision
+            if revision != self._revision:
+                self._payload = self._build(state)
+                self._revision = revision
+            return self._revision, self._payload
+
+    def _build(self, state: live.LiveSession) -> Dict | None:
+        session = data.get_session(self.class_id, self.session_id)
+        if session is None:
+            return None
+        weighting = session.get("weighting", {})
+        scores = state.scores(
+            session.get("categories", []), int(weighting.get("teacherPct", 50)), int(weighting.get("peersPct", 50)),
+        )
+        return {
+            "classId": self.class_id,
+            "sessionId": self.session_id,
+            "title": session.get("title", ""),
+            "status": session.get("status", ""),
+            "weighting": weighting,
+            "rows": data.leaderboard_rows(scores, data.session_roster(self.class_id, session)),
+            "generatedAt": datetime.utcnow().isoformat() + "Z",
+        }
+
+
+class FeedBusy(RuntimeError):
+    """Raised when `MAX_CHANNELS` sessions are already being watched."""
+
+
+_channels: Dict[Tuple[str, str], Channel] = {}
+_channels_lock = threading.Lock()
+
+
+def channel(class_id: str, session_id: str) -> Channel | None:
+    """The shared channel of a session, or ``None`` if the session does not exist.
+
+    The port is public, so a session is looked up before any channel or listener is allocated
+    for it. Channels whose listener went idle are dropped, and at most `MAX_CHANNELS` sessions
+    are watched at once (`FeedBusy` beyond that).
+    """
+    key = (class_id, session_id)
+    with _channels_lock:
+        if key in _channels:
+            return _channels[key]
+    if data.get_session(class_id, session_id) is None:
+        return None
+    with _channels_lock:
+        watched = live.watched()
+        for stale in [k for k in _channels if k not in watched]:
+            del _channels[stale]
+        if key not in _channels:
+            if len(_channels) >= MAX_CHANNELS:
+                raise FeedBusy(f"already watching {MAX_CHANNELS} sessions")
+            _channels[key] = Channel(class_id, session_id)
+        return _channels[key]
+
+
+def _encode(payload) -> bytes:
+    return json.dumps(payload, default=str, separators=(",", ":")).encode("utf-8")
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    server_version = "LeaderboardFeed/1.0"
+
+    def do_GET(self) -> None:  # noqa: N802 - BaseHTTPRequestHandler API
+        url = urlsplit(self.path)
+        if url.path == "/healthz":
+            self._send_json(200, {"ok": True})
+            return
+        match = _ROUTE.match(url.path)
+        if not match:
+            self._send_json(404, {"error": "Not found"})
+            return
+        wants_stream = "text/event-stream" in self.headers.get("Accept", "") or parse_qs(url.query).get("stream") == ["1"]
+        try:
+            feed = channel(match["class_id"], match["session_id"])
+            if feed is None:
+                self._send_json(404, {"error": "Session not found"})
+            elif wants_stream:
+                self._stream(feed)
+            else:
+                _, payload = feed.payload()
+                if payload is None:
+                    self._send_json(404, {"error": "Session not found"})
+                else:
+                    self._send_json(200, payload)
+        except FeedBusy:
+            self._send_json(503, {"error": "Too many sessions are being watched"})
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # viewer went away
+        except Exception:
+            logger.exception("Feed request failed for %s", url.path)
+            self._send_json(500, {"error": "Internal error"})
+
+    def _send_json(self, status: int, payload: Dict) -> None:
+        body = _encode(payload)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, feed: Channel) -> None:
+        revision, payload = feed.payload()
+        if payload is None:
+            self._send_json(404, {"error": "Session not found"})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.end_headers()
+        self.close_connection = True
+        while True:
+            self.wfile.write(b"event: leaderboard\nid: %d-%d\ndata: %s\n\n" % (*revision, _encode(payload)))
+            self.wfile.flush()
+            if payload is None or payload.get("status") == "closed":
+                return  # final standings sent; nothing else will change
+            epoch, version = revision
+            state = feed.state()
+            while state.epoch == epoch and not state.wait_for_change(version, timeout=KEEPALIVE_SECONDS):
+                self.wfile.write(b": keepalive\n\n")
+                self.wfile.flush()
+                state = feed.state()
+            revision, payload = feed.payload()
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002 - BaseHTTPRequestHandler API
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def configure_for_backend(name: str, fail) -> None:
+    """The feed runs in its own process: it cannot see an in-memory store at all, and SQLite
+    listeners only report this process's writes, so on SQLite the totals are polled instead."""
+    if name == "memory":
+        fail("the in-memory store lives inside the Streamlit process; run the feed on Firestore or SQLite")
+    if name == "sqlite":
+        live.poll_totals(SQLITE_POLL_SECONDS)
+
+
+def make_server(host: str = "0.0.0.0", port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), FeedHandler)
+    server.daemon_threads = True
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Read-only JSON/SSE leaderboard feed.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    configure_for_backend(data.backend().name, parser.error)
+    server = make_server(args.host, args.port)
+    logger.info("Leaderboard feed listening on http://%s:%d", args.host, args.port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        live.stop_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,36 @@
+from functools import lru_cache
+
 import streamlit as st
-from google.cloud import firestore
-from google.oauth2 import service_account
 
-@st.cache_resource
-def get_db():
+def _credentials():
+    from google.oauth2 import service_account
+
     creds_info = st.secrets.get("gcp_service_account")
     if not creds_info:
         raise RuntimeError("Missing gcp_service_account in secrets.")
-    creds = service_account.Credentials.from_service_account_info(creds_info)
-    return firestore.Client(credentials=creds, project=st.secrets.get("FIREBASE_PROJECT_ID"))
+    return service_account.Credentials.from_service_account_info(creds_info)
+
+@st.cache_resource
+def get_db():
+    # Imported here so pages that never touch Firestore (login, offline backends) skip the client libraries.
+    from google.cloud import firestore
+
+    return firestore.Client(credentials=_credentials(), project=st.secrets.get("FIREBASE_PROJECT_ID"))
+
+@lru_cache(maxsize=1)
+def get_async_db():
+    """Async Firestore client for code running on an event loop (see `streamlit_app.data_async`)."""
+    from google.cloud import firestore
+
+    return firestore.AsyncClient(credentials=_credentials(), project=st.secrets.get("FIREBASE_PROJECT_ID"))
 
 def allowed_domain():
     return st.secrets.get("ALLOWED_EMAIL_DOMAIN", "@example.edu").lower()
 
 def admin_emails():
-    raw = st.secrets.get("ADMIN_EMAILS", "")
-    return {e.strip().lower() for e in raw.split(",") if e.strip()}
+    return _parse_emails(st.secrets.get("ADMIN_EMAILS", ""))
+
+@lru_cache(maxsize=8)
+def _parse_emails(raw: str) -> frozenset:
+    # Keyed on the raw secret, so an edited secrets.toml is picked up without explicit invalidation.
+    return frozenset(e.strip().lower() for e in raw.split(",") if e.strip())
@@ -0,0 +1,143 @@
+"""Process-wide snapshot listeners that keep live leaderboard totals in memory."""
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from typing import Dict, Tuple
+
+from . import data
+
+IDLE_UNSUBSCRIBE_SECONDS = 600
+FIRST_SNAPSHOT_SECONDS = 2
+
+_epochs = itertools.count(1)
+_poll_seconds: float | None = None
+
+
+def poll_totals(seconds: float | None) -> None:
+    """Read totals every `seconds` instead of listening (``None`` restores listeners).
+
+    For processes that share a SQLite file with the process taking votes: SQLite listeners only
+    see writes made by their own process. Applies to listeners started after the call.
+    """
+    global _poll_seconds
+    _poll_seconds = seconds
+
+
+class _Poller:
+    """Listener stand-in that re-reads a document on a timer and reports it like ``on_snapshot``."""
+
+    def __init__(self, ref, callback, seconds: float) -> None:
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(ref, callback, seconds), daemon=True, name="live-poll")
+        self._thread.start()
+
+    def _run(self, ref, callback, seconds: float) -> None:
+        while True:
+            callback([ref.get()], [], None)
+            if self._stop.wait(seconds):
+                return
+
+    def unsubscribe(self) -> None:
+        self._stop.set()
+
+
+class LiveSession:
+    """Latest score totals for one session, fed by a single Firestore listener."""
+
+    def __init__(self, class_id: str, session_id: str) -> None:
+        self.class_id = class_id
+        self.session_id = session_id
+        self.totals: Dict | None = None
+        self.received = False
+        self.version = 0
+        # Idle listeners are dropped and recreated with `version` back at zero; the epoch tells
+        # a recreated listener apart so cached views keyed on `revision` never match stale state.
+        self.epoch = next(_epochs)
+        self.last_seen = time.monotonic()
+        self._changed = threading.Condition()
+        self._watch = None
+
+    def start(self) -> None:
+        ref = data.totals_ref(self.class_id, self.session_id)
+        if _poll_seconds:
+            self._watch = _Poller(ref, self._on_snapshot, _poll_seconds)
+        else:
+            self._watch = ref.on_snapshot(self._on_snapshot)
+
+    def stop(self) -> None:
+        if self._watch is not None:
+            self._watch.unsubscribe()
+            self._watch = None
+
+    def _on_snapshot(self, docs, changes, read_time) -> None:
+        totals = next((d.to_dict() for d in docs if d.exists), None)
+        with self._changed:
+            if self.received and totals == self.totals:
+                return
+            self.received = True  # the first snapshot counts even when the document is missing
+            self.totals = totals
+            self.version += 1
+            self._changed.notify_all()
+
+    @property
+    def revision(self) -> Tuple[int, int]:
+        """Change marker that is unique across listener recreation (unlike `version` alone)."""
+        return self.epoch, self.version
+
+    def wait_for_change(self, seen_version: int, timeout: float) -> bool:
+        """Block until the totals move past `seen_version`; False if `timeout` elapsed first."""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.version != seen_version, timeout=timeout)
+
+    def scores(self, categories, teacher_pct: int, peers_pct: int) -> Dict:
+        self.last_seen = time.monotonic()
+        totals = self.totals
+        if not totals or not totals.get("seeded"):
+            # Legacy sessions get backfilled once; the listener then sees the seeded document.
+            return data.aggregate_scores(self.class_id, self.session_id, categories, teacher_pct, peers_pct)
+        return data.scores_from_totals(totals, categories, teacher_pct, peers_pct)
+
+
+_sessions: Dict[Tuple[str, str], LiveSession] = {}
+_lock = threading.Lock()
+
+
+def watch(class_id: str, session_id: str) -> LiveSession:
+    """Return the shared live state for a session, starting its listener on first use."""
+    now = time.monotonic()
+    started = False
+    with _lock:
+        _drop_idle(now)
+        live = _sessions.get((class_id, session_id))
+        if live is None:
+            live = LiveSession(class_id, session_id)
+            live.start()
+            _sessions[(class_id, session_id)] = live
+            started = True
+        live.last_seen = now
+    if started:
+        live.wait_for_change(0, timeout=FIRST_SNAPSHOT_SECONDS)
+    return live
+
+
+def _drop_idle(now: float) -> None:
+    for key, live in list(_sessions.items()):
+        if now - live.last_seen > IDLE_UNSUBSCRIBE_SECONDS:
+            live.stop()
+            del _sessions[key]
+
+
+def watched() -> set:
+    """``(class_id, session_id)`` of every running listener, after stopping the idle ones."""
+    with _lock:
+        _drop_idle(time.monotonic())
+        return set(_sessions)
+
+
+def stop_all() -> None:
+    with _lock:
+        for live in _sessions.values():
+            live.stop()
+        _sessions.clear()
@@ -0,0 +1,81 @@
+"""User profiles resolved once at login: role, display name, team membership and settings.
+
+Membership lives in each class's ``users`` subcollection (``classes/{cid}/users/{email}``, see
+`data.user_ref`) as ``{"displayName", "teamId", "settings"}``. The resolved profile is cached
+process-wide and kept in ``st.session_state.user``, so pages read the role with a dict lookup
+instead of re-parsing secrets. Anything that writes a membership calls `invalidate`.
+"""
+from __future__ import annotations
+
+from typing import Dict
+
+import streamlit as st
+
+from .cache import metadata
+from .firebase import admin_emails
+
+PROFILE_TTL_SECONDS = 300
+
+
+def _resolve(email: str) -> Dict:
+    # The data layer (and the storage client behind it) is only needed once someone logs in.
+    from . import data
+
+    classes = data.list_classes()
+    refs = [data.user_ref(c["id"], email) for c in classes]
+    class_by_path = {ref.path: c["id"] for ref, c in zip(refs, classes)}
+    memberships = {}
+    for snap in data.backend().get_all(refs) if refs else []:
+        if snap.exists:
+            memberships[class_by_path[snap.reference.path]] = snap.to_dict()
+    names = [m["displayName"] for m in memberships.values() if m.get("displayName")]
+    return {
+        "email": email,
+        "role": "admin" if email in admin_emails() else "student",
+        "displayName": names[0] if names else email.split("@")[0],
+        "teams": {cid: m["teamId"] for cid, m in memberships.items() if m.get("teamId")},
+        "settings": {cid: dict(m.get("settings", {})) for cid, m in memberships.items()},
+    }
+
+
+def load_profile(email: str) -> Dict:
+    email = email.strip().lower()
+    profile = metadata.get_or_load(("profiles", email), lambda: _resolve(email), PROFILE_TTL_SECONDS)
+    return {**profile, "teams": dict(profile["teams"]), "settings": {k: dict(v) for k, v in profile["settings"].items()}}
+
+
+def login(email: str) -> Dict:
+    """Resolve the profile for a freshly signed-in user and keep it in session state."""
+    profile = load_profile(email)
+    st.session_state.user = profile
+    return profile
+
+
+def role(user: Dict | None) -> str:
+    if not user:
+        return "student"
+    if "role" not in user:  # sessions that logged in before profiles existed
+        return "admin" if user["email"].lower() in admin_emails() else "student"
+    return user["role"]
+
+
+def is_admin(user: Dict | None) -> bool:
+    return role(user) == "admin"
+
+
+def invalidate(email: str) -> None:
+    """Drop the cached profile; the signed-in user's copy is re-resolved on the spot."""
+    email = email.strip().lower()
+    metadata.invalidate("profiles", email)
+    user = st.session_state.get("user")
+    if user and user.get("email", "").lower() == email:
+        st.session_state.user = load_profile(email)
+
+
+def save_membership(class_id: str, email: str, **fields) -> None:
+    """Merge ``displayName``/``teamId``/``settings`` into the user's membership doc for a class."""
+    from . import data
+
+    email = email.strip().lower()
+    data.user_ref(class_id, email).set({"email": email, **fields}, merge=True)
+    invalidate(email)
@@ -0,0 +1,93 @@
+"""Vectorized scoring engine shared by live aggregation, exports and archive replays."""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+
+def _number(value: float) -> int | float:
+    """Keep integral scores as ints (the historical output type); round weighted fractions."""
+    value = float(value)
+    return int(value) if value.is_integer() else round(value, 2)
+
+
+def category_weights(categories: Sequence[dict]) -> np.ndarray:
+    return np.array([float(c.get("weight", 1.0)) for c in categories], dtype=float)
+
+
+def rating_matrix(votes: Iterable[dict], cat_ids: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+    """Build the votes × categories matrix once; returns the team id of each row alongside it."""
+    teams: List[str] = []
+    rows: List[List[int]] = []
+    for vote in votes:
+        ratings = vote.get("ratings", {})
+        teams.append(vote["teamId"])
+        rows.append([int(ratings.get(cid, 0)) for cid in cat_ids])
+    return teams, np.array(rows, dtype=np.int64).reshape(len(rows), len(cat_ids))
+
+
+def _team_sums(teams: List[str], matrix: np.ndarray, order: Dict[str, int]) -> np.ndarray:
+    for team in teams:
+        order.setdefault(team, len(order))
+    index = np.array([order[t] for t in teams], dtype=np.intp)
+    sums = np.zeros((len(order), matrix.shape[1]), dtype=np.int64)
+    np.add.at(sums, index, matrix)
+    return sums
+
+
+def score_matrices(
+    team_ids: Sequence[str],
+    peer: np.ndarray,
+    teacher: np.ndarray,
+    categories: Sequence[dict],
+    teacher_pct: int,
+    peers_pct: int,
+) -> Dict[str, dict]:
+    """Score team × category sum matrices; output matches `data.aggregate_scores`."""
+    cat_ids = [c["id"] for c in categories]
+    weights = category_weights(categories)
+    peer_sum = peer @ weights
+    teacher_sum = teacher @ weights
+    combined = np.trunc(peer_sum * (peers_pct / 100.0) + teacher_sum * (teacher_pct / 100.0)).astype(np.int64)
+
+    per_team = {}
+    for row, team in enumerate(team_ids):
+        per_team[team] = {
+            "peer_sum": _number(peer_sum[row]),
+            "teacher_sum": _number(teacher_sum[row]),
+            "cats": {cid: {"peer": int(peer[row, col]), "teacher": int(teacher[row, col])} for col, cid in enumerate(cat_ids)},
+            "combined": int(combined[row]),
+        }
+    return per_team
+
+
+def score_votes(
+    votes: Iterable[dict],
+    teacher_votes: Iterable[dict],
+    categories: Sequence[dict],
+    teacher_pct: int,
+    peers_pct: int,
+) -> Dict[str, dict]:
+    """Score raw vote documents in bulk (archive replays, exports, multi-session rollups)."""
+    cat_ids = [c["id"] for c in categories]
+    order: Dict[str, int] = {}
+    peer_teams, peer_rows = rating_matrix(votes, cat_ids)
+    teacher_teams, teacher_rows = rating_matrix(teacher_votes, cat_ids)
+    peer = _team_sums(peer_teams, peer_rows, order)
+    teacher = _team_sums(teacher_teams, teacher_rows, order)
+    size = (len(order), len(cat_ids))
+    peer = np.pad(peer, ((0, size[0] - peer.shape[0]), (0, 0)))
+    teacher = np.pad(teacher, ((0, size[0] - teacher.shape[0]), (0, 0)))
+    return score_matrices(list(order), peer, teacher, categories, teacher_pct, peers_pct)
+
+
+def score_totals(totals: dict, categories: Sequence[dict], teacher_pct: int, peers_pct: int) -> Dict[str, dict]:
+    """Score a session's running totals document (see `data.totals_ref`)."""
+    cat_ids = [c["id"] for c in categories]
+    team_ids = [t for t, e in totals.get("teams", {}).items() if e.get("peerVotes") or e.get("teacherVotes")]
+    entries = [totals["teams"][t] for t in team_ids]
+    peer = np.array([[int(e.get("peer", {}).get(cid, 0)) for cid in cat_ids] for e in entries], dtype=np.int64)
+    teacher = np.array([[int(e.get("teacher", {}).get(cid, 0)) for cid in cat_ids] for e in entries], dtype=np.int64)
+    size = (len(team_ids), len(cat_ids))
+    return score_matrices(team_ids, peer.reshape(size), teacher.reshape(size), categories, teacher_pct, peers_pct)
@@ -0,0 +1,122 @@
+"""Pluggable document storage behind the data layer.
+
+Firestore is the production backend. The in-memory and SQLite backends implement the same
+subset of the Firestore client API that `streamlit_app.data` uses (document/collection
+references, simple queries, transactions, batches and document listeners), so the app,
+tests and benchmarks can run offline without credentials.
+
+Pick a backend with the ``LEADERBOARD_STORAGE`` environment variable or the
+``STORAGE_BACKEND`` secret: ``firestore`` (default), ``memory`` or ``sqlite:///path/to.db``
+(three slashes for a relative path, four for an absolute one).
+"""
+from __future__ import annotations
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Iterable, List
+
+DEFAULT_SQLITE_PATH = "leaderboard.db"
+
+
+class StorageError(RuntimeError):
+    """Base class for errors raised by the local backends."""
+
+
+class AlreadyExists(StorageError):
+    pass
+
+
+class NotFound(StorageError):
+    pass
+
+
+class FailedPrecondition(StorageError):
+    pass
+
+
+class StorageBackend(ABC):
+    """What the data layer needs from a document store."""
+
+    name = "abstract"
+    # Raised when a guarded write loses a race: ``create`` on an existing document or an
+    # ``update`` whose ``last_update_time`` precondition no longer holds.
+    conflict_errors: tuple = (AlreadyExists, FailedPrecondition)
+
+    @abstractmethod
+    def collection(self, name: str):
+        """Return a top-level collection reference."""
+
+    @abstractmethod
+    def run_transaction(self, fn: Callable[[Any], Any]) -> Any:
+        """Run `fn(transaction)` atomically, retrying on contention where the backend supports it."""
+
+    @abstractmethod
+    def get_all(self, refs: Iterable) -> List:
+        """Fetch several documents in one round trip."""
+
+    @abstractmethod
+    def batch(self):
+        """Return a write batch with ``set``/``create``/``update``/``delete`` and ``commit``."""
+
+    @abstractmethod
+    def write_option(self, **kwargs):
+        """Build a write precondition (``last_update_time=`` or ``exists=``)."""
+
+    @abstractmethod
+    def increment(self, value: int | float):
+        """Sentinel that adds `value` to a numeric field on write."""
+
+    @property
+    @abstractmethod
+    def DELETE_FIELD(self):  # noqa: N802 - mirrors firestore.DELETE_FIELD
+        """Sentinel that removes a field on update."""
+
+
+_backend: StorageBackend | None = None
+_lock = threading.Lock()
+
+
+def _configured_url() -> str:
+    url = os.environ.get("LEADERBOARD_STORAGE")
+    if url:
+        return url
+    try:
+        import streamlit as st
+        return st.secrets.get("STORAGE_BACKEND", "firestore")
+    except FileNotFoundError:  # no secrets.toml: nothing configured
+        return "firestore"
+
+
+def create_backend(url: str) -> StorageBackend:
+    """Build a backend from a URL: ``firestore``, ``memory`` or ``sqlite[:///path]``."""
+    scheme, _, rest = url.partition(":")
+    scheme = scheme.strip().lower()
+    if scheme == "firestore":
+        from .firestore import FirestoreBackend
+        return FirestoreBackend()
+    if scheme == "memory":
+        from .memory import MemoryBackend
+        return MemoryBackend()
+    if scheme == "sqlite":
+        from .sqlite import SQLiteBackend
+        path = rest[3:] if rest.startswith("///") else rest  # sqlite:///relative.db, sqlite:////abs.db
+        return SQLiteBackend(path or DEFAULT_SQLITE_PATH)
+    raise ValueError(f"Unknown storage backend: {url!r}")
+
+
+def get_backend() -> StorageBackend:
+    """Return the process-wide backend, creating it from configuration on first use."""
+    global _backend
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                _backend = create_backend(_configured_url())
+    return _backend
+
+
+def set_backend(backend: StorageBackend | None) -> None:
+    """Install a backend explicitly (tests, tools); ``None`` re-reads the configuration next time."""
+    global _backend
+    with _lock:
+        _backend = backend
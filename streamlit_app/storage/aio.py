@@ -0,0 +1,221 @@
+"""Coroutine view of the storage backends, for callers that run on an event loop.
+
+Mirrors the slice of ``google.cloud.firestore.AsyncClient`` that `streamlit_app.data_async`
+uses: ``await ref.get()``, ``async for snap in query.stream()``, ``await ref.set(...)`` and
+async transactions whose reads are awaited (``await transaction.get_all(refs)`` yields
+snapshots) while writes are buffered synchronously. Firestore is served by its native async
+client; the in-memory and SQLite engines are wrapped so the async data layer reads and writes
+the same documents as the synchronous one.
+
+The local engines do their work in-process and never suspend, so a local async transaction
+runs start to finish under the engine lock. SQLite still touches disk on the loop's thread;
+it is meant for tests and single-box demos, not for serving many classrooms.
+"""
+from __future__ import annotations
+
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, List
+
+from . import StorageBackend, get_backend
+from .local import CollectionReference, DocumentReference, DocumentSnapshot, LocalBackend, Query, Transaction
+
+
+class AsyncStorageBackend(ABC):
+    """What the async data layer needs from a document store."""
+
+    name = "abstract"
+    conflict_errors: tuple = StorageBackend.conflict_errors
+
+    @abstractmethod
+    def collection(self, name: str):
+        """Return a top-level async collection reference."""
+
+    @abstractmethod
+    async def run_transaction(self, fn: Callable[[Any], Awaitable[Any]]) -> Any:
+        """Await `fn(transaction)` atomically, retrying on contention where the backend supports it."""
+
+    @abstractmethod
+    async def get_all(self, refs: Iterable) -> List:
+        """Fetch several documents in one round trip."""
+
+    @abstractmethod
+    def write_option(self, **kwargs):
+        """Build a write precondition (``last_update_time=`` or ``exists=``)."""
+
+    @abstractmethod
+    def increment(self, value: int | float):
+        """Sentinel that adds `value` to a numeric field on write."""
+
+    @property
+    @abstractmethod
+    def DELETE_FIELD(self):  # noqa: N802 - mirrors firestore.DELETE_FIELD
+        """Sentinel that removes a field on update."""
+
+
+async def _iterate(items: Iterable) -> AsyncIterator:
+    for item in items:
+        yield item
+
+
+class AsyncDocumentReference:
+    def __init__(self, ref: DocumentReference) -> None:
+        self._ref = ref
+
+    @property
+    def id(self) -> str:
+        return self._ref.id
+
+    @property
+    def path(self) -> str:
+        return self._ref.path
+
+    def collection(self, name: str) -> "AsyncCollectionReference":
+        return AsyncCollectionReference(self._ref.collection(name))
+
+    async def get(self, field_paths=None) -> DocumentSnapshot:
+        return self._ref.get(field_paths)
+
+    async def set(self, data: dict, merge: bool = False) -> None:
+        self._ref.set(data, merge=merge)
+
+    async def create(self, data: dict) -> None:
+        self._ref.create(data)
+
+    async def update(self, fields: dict, option=None) -> None:
+        self._ref.update(fields, option=option)
+
+    async def delete(self) -> None:
+        self._ref.delete()
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, AsyncDocumentReference) and other.path == self.path
+
+    def __hash__(self) -> int:
+        return hash(self.path)
+
+
+class AsyncQuery:
+    def __init__(self, query: Query) -> None:
+        self._query = query
+
+    def where(self, field: str, op: str, value: Any) -> "AsyncQuery":
+        return AsyncQuery(self._query.where(field, op, value))
+
+    def order_by(self, field: str, direction: str = "ASCENDING") -> "AsyncQuery":
+        return AsyncQuery(self._query.order_by(field, direction=direction))
+
+    def limit(self, count: int) -> "AsyncQuery":
+        return AsyncQuery(self._query.limit(count))
+
+    def select(self, field_paths) -> "AsyncQuery":
+        return AsyncQuery(self._query.select(field_paths))
+
+    def start_after(self, document) -> "AsyncQuery":
+        return AsyncQuery(self._query.start_after(document))
+
+    async def stream(self) -> AsyncIterator[DocumentSnapshot]:
+        for snap in self._query.stream():
+            yield snap
+
+    async def get(self) -> List[DocumentSnapshot]:
+        return self._query.get()
+
+
+class AsyncCollectionReference(AsyncQuery):
+    def __init__(self, collection: CollectionReference) -> None:
+        super().__init__(collection)
+
+    @property
+    def id(self) -> str:
+        return self._query.id
+
+    def document(self, document_id: str | None = None) -> AsyncDocumentReference:
+        return AsyncDocumentReference(self._query.document(document_id))
+
+
+def _unwrap(ref):
+    return ref._ref if isinstance(ref, AsyncDocumentReference) else ref
+
+
+class AsyncTransaction:
+    """Awaitable reads over a local transaction; writes are buffered until the commit."""
+
+    def __init__(self, transaction: Transaction) -> None:
+        self._transaction = transaction
+
+    async def get_all(self, refs) -> AsyncIterator[DocumentSnapshot]:
+        return _iterate(self._transaction.get_all([_unwrap(r) for r in refs]))
+
+    async def get(self, ref_or_query) -> AsyncIterator[DocumentSnapshot]:
+        if isinstance(ref_or_query, AsyncDocumentReference):
+            return _iterate([ref_or_query._ref.get()])
+        return _iterate(ref_or_query._query.stream())
+
+    def set(self, ref, data: dict, merge: bool = False) -> None:
+        self._transaction.set(_unwrap(ref), data, merge=merge)
+
+    def create(self, ref, data: dict) -> None:
+        self._transaction.create(_unwrap(ref), data)
+
+    def update(self, ref, fields: dict, option=None) -> None:
+        self._transaction.update(_unwrap(ref), fields, option=option)
+
+    def delete(self, ref) -> None:
+        self._transaction.delete(_unwrap(ref))
+
+
+class AsyncLocalBackend(AsyncStorageBackend):
+    """Async facade over a local engine; shares its documents and listeners with sync callers."""
+
+    def __init__(self, backend: LocalBackend) -> None:
+        self.sync = backend
+        self.name = backend.name
+
+    def collection(self, name: str) -> AsyncCollectionReference:
+        return AsyncCollectionReference(self.sync.collection(name))
+
+    async def run_transaction(self, fn: Callable[[AsyncTransaction], Awaitable[Any]]) -> Any:
+        with self.sync._atomic():
+            transaction = Transaction(self.sync)
+            result = await fn(AsyncTransaction(transaction))
+            self.sync._commit(transaction._writes)
+        return result
+
+    async def get_all(self, refs) -> List[DocumentSnapshot]:
+        return self.sync.get_all([_unwrap(r) for r in refs])
+
+    def write_option(self, **kwargs):
+        return self.sync.write_option(**kwargs)
+
+    def increment(self, value):
+        return self.sync.increment(value)
+
+    @property
+    def DELETE_FIELD(self):  # noqa: N802
+        return self.sync.DELETE_FIELD
+
+
+def create_async_backend(backend: StorageBackend) -> AsyncStorageBackend:
+    """The async counterpart of a configured backend (same project or same local documents)."""
+    if isinstance(backend, LocalBackend):
+        return AsyncLocalBackend(backend)
+    if backend.name == "firestore":
+        from .firestore import AsyncFirestoreBackend
+        return AsyncFirestoreBackend()
+    raise ValueError(f"No async variant of storage backend {backend.name!r}")
+
+
+_async_backend: AsyncStorageBackend | None = None
+_async_source: StorageBackend | None = None
+_lock = threading.Lock()
+
+
+def get_async_backend() -> AsyncStorageBackend:
+    """Return the async view of the process-wide backend, following `set_backend` swaps."""
+    global _async_backend, _async_source
+    backend = get_backend()
+    with _lock:
+        if _async_source is not backend:
+            _async_backend, _async_source = create_async_backend(backend), backend
+        return _async_backend
@@ -0,0 +1,73 @@
+"""Firestore backend: a thin adapter over the client built from Streamlit secrets."""
+from __future__ import annotations
+
+from google.api_core import exceptions
+from google.cloud import firestore
+
+from . import StorageBackend
+from .aio import AsyncStorageBackend
+
+
+class FirestoreBackend(StorageBackend):
+    name = "firestore"
+    conflict_errors = (exceptions.Conflict, exceptions.FailedPrecondition)
+
+    def __init__(self, client: firestore.Client | None = None) -> None:
+        if client is None:
+            from ..firebase import get_db
+            client = get_db()
+        self.client = client
+
+    def collection(self, name: str):
+        return self.client.collection(name)
+
+    def run_transaction(self, fn):
+        return firestore.transactional(fn)(self.client.transaction())
+
+    def get_all(self, refs):
+        return list(self.client.get_all(list(refs)))
+
+    def batch(self):
+        return self.client.batch()
+
+    def write_option(self, **kwargs):
+        return self.client.write_option(**kwargs)
+
+    def increment(self, value):
+        return firestore.Increment(value)
+
+    @property
+    def DELETE_FIELD(self):  # noqa: N802
+        return firestore.DELETE_FIELD
+
+
+class AsyncFirestoreBackend(AsyncStorageBackend):
+    """Firestore through its native async client: awaited reads and transactions, no worker threads."""
+
+    name = "firestore"
+    conflict_errors = (exceptions.Conflict, exceptions.FailedPrecondition)
+
+    def __init__(self, client: firestore.AsyncClient | None = None) -> None:
+        if client is None:
+            from ..firebase import get_async_db
+            client = get_async_db()
+        self.client = client
+
+    def collection(self, name: str):
+        return self.client.collection(name)
+
+    async def run_transaction(self, fn):
+        return await firestore.async_transactional(fn)(self.client.transaction())
+
+    async def get_all(self, refs):
+        return [snap async for snap in self.client.get_all(list(refs))]
+
+    def write_option(self, **kwargs):
+        return self.client.write_option(**kwargs)
+
+    def increment(self, value):
+        return firestore.Increment(value)
+
+    @property
+    def DELETE_FIELD(self):  # noqa: N802
+        return firestore.DELETE_FIELD
@@ -0,0 +1,444 @@
+"""Firestore-compatible document engine shared by the in-memory and SQLite backends.
+
+Only the slice of the Firestore client used by the data layer is implemented. Documents are
+plain dicts addressed by slash-separated paths; subclasses supply the raw storage
+(`_atomic`, `_read`, `_children`, `_write`) and this module provides references, queries,
+transactions, batches, write sentinels and document listeners on top of it.
+"""
+from __future__ import annotations
+
+import copy
+import threading
+import time
+import uuid
+from abc import abstractmethod
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from . import AlreadyExists, FailedPrecondition, NotFound, StorageBackend
+
+
+class Increment:
+    def __init__(self, value: int | float) -> None:
+        self.value = value
+
+    def __repr__(self) -> str:
+        return f"Increment({self.value!r})"
+
+
+class _DeleteField:
+    def __repr__(self) -> str:
+        return "DELETE_FIELD"
+
+
+DELETE_FIELD = _DeleteField()
+DOCUMENT_ID = "__name__"  # order_by / cursor key for the document id, as in Firestore
+
+
+def _resolve(value: Any, current: Any) -> Any:
+    if isinstance(value, Increment):
+        return (current if isinstance(current, (int, float)) else 0) + value.value
+    if isinstance(value, dict):
+        return {k: _resolve(v, None) for k, v in value.items() if v is not DELETE_FIELD}
+    return copy.deepcopy(value)
+
+
+def _merge(target: dict, patch: dict) -> None:
+    """`set(..., merge=True)`: nested maps merge field by field."""
+    for key, value in patch.items():
+        if value is DELETE_FIELD:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = _resolve(value, target.get(key))
+
+
+def _update(target: dict, fields: dict) -> None:
+    """`update(...)`: dotted keys address nested fields, and a map value replaces the field."""
+    for key, value in fields.items():
+        *parents, leaf = key.split(".")
+        node = target
+        for part in parents:
+            node = node.setdefault(part, {})
+        if value is DELETE_FIELD:
+            node.pop(leaf, None)
+        else:
+            node[leaf] = _resolve(value, node.get(leaf))
+
+
+def _lookup(data: dict, field: str) -> Tuple[bool, Any]:
+    node: Any = data
+    for part in field.split("."):
+        if not isinstance(node, dict) or part not in node:
+            return False, None
+        node = node[part]
+    return True, node
+
+
+def _project(data: dict, fields: Tuple[str, ...]) -> dict:
+    """Keep only `fields` (dotted paths allowed), like a Firestore ``select``."""
+    projected: dict = {}
+    for field in fields:
+        found, value = _lookup(data, field)
+        if found:
+            *parents, leaf = field.split(".")
+            node = projected
+            for part in parents:
+                node = node.setdefault(part, {})
+            node[leaf] = value
+    return projected
+
+
+_OPERATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "in": lambda a, b: a in b,
+    "not-in": lambda a, b: a not in b,
+    "array_contains": lambda a, b: isinstance(a, list) and b in a,
+    "array_contains_any": lambda a, b: isinstance(a, list) and any(x in a for x in b),
+}
+
+
+class WriteOption:
+    def __init__(self, last_update_time: int | None = None, exists: bool | None = None) -> None:
+        self.last_update_time = last_update_time
+        self.exists = exists
+
+
+class DocumentSnapshot:
+    def __init__(self, reference: "DocumentReference", data: dict | None, update_time: int | None) -> None:
+        self.reference = reference
+        self._data = data
+        self.update_time = update_time
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> dict | None:
+        return copy.deepcopy(self._data)
+
+    def get(self, field: str) -> Any:
+        return _lookup(self._data or {}, field)[1]
+
+
+class DocumentReference:
+    def __init__(self, backend: "LocalBackend", path: str) -> None:
+        self._backend = backend
+        self.path = path
+
+    @property
+    def id(self) -> str:
+        return self.path.rsplit("/", 1)[-1]
+
+    def collection(self, name: str) -> "CollectionReference":
+        return CollectionReference(self._backend, f"{self.path}/{name}")
+
+    def get(self, field_paths=None, transaction=None) -> DocumentSnapshot:
+        snap = self._backend._snapshot(self)
+        if field_paths is None or not snap.exists:
+            return snap
+        return DocumentSnapshot(self, _project(snap._data, tuple(field_paths)), snap.update_time)
+
+    def set(self, data: dict, merge: bool = False) -> None:
+        self._backend._commit([("set", self, data, merge)])
+
+    def create(self, data: dict) -> None:
+        self._backend._commit([("create", self, data, None)])
+
+    def update(self, fields: dict, option: WriteOption | None = None) -> None:
+        self._backend._commit([("update", self, fields, option)])
+
+    def delete(self) -> None:
+        self._backend._commit([("delete", self, None, None)])
+
+    def on_snapshot(self, callback: Callable) -> "Watch":
+        return self._backend._listen(self, callback)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, DocumentReference) and other.path == self.path
+
+    def __hash__(self) -> int:
+        return hash(self.path)
+
+
+class _Descending:
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return other.value < self.value
+
+    def __gt__(self, other: "_Descending") -> bool:
+        return other.value > self.value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and other.value == self.value
+
+
+class Query:
+    ASCENDING = "ASCENDING"
+    DESCENDING = "DESCENDING"
+
+    def __init__(
+        self, backend: "LocalBackend", path: str, filters=(), orders=(), limit=None, cursor=None, projection=None,
+    ) -> None:
+        self._backend = backend
+        self._path = path
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._cursor = cursor
+        self._projection = projection
+
+    def _copy(self, **changes) -> "Query":
+        state = {
+            "filters": self._filters, "orders": self._orders, "limit": self._limit, "cursor": self._cursor,
+            "projection": self._projection,
+        }
+        state.update(changes)
+        return Query(self._backend, self._path, **state)
+
+    def where(self, field: str, op: str, value: Any) -> "Query":
+        if op not in _OPERATORS:
+            raise ValueError(f"Unsupported operator {op!r}")
+        return self._copy(filters=self._filters + ((field, op, value),))
+
+    def order_by(self, field: str, direction: str = ASCENDING) -> "Query":
+        return self._copy(orders=self._orders + ((field, direction),))
+
+    def limit(self, count: int) -> "Query":
+        return self._copy(limit=count)
+
+    def select(self, field_paths) -> "Query":
+        return self._copy(projection=tuple(field_paths))
+
+    def start_after(self, document) -> "Query":
+        if isinstance(document, DocumentSnapshot):
+            return self._copy(cursor=(document.to_dict(), document.id))
+        values = dict(document)
+        name = values.pop(DOCUMENT_ID, None)
+        return self._copy(cursor=(values, name.id if isinstance(name, DocumentReference) else name))
+
+    def _sort_key(self, data: dict, doc_id: str | None) -> tuple:
+        key = []
+        for field, direction in self._orders:
+            value = doc_id or "" if field == DOCUMENT_ID else _lookup(data, field)[1]
+            key.append(_Descending(value) if direction == self.DESCENDING else value)
+        key.append(doc_id or "")
+        return tuple(key)
+
+    def stream(self, transaction=None) -> Iterator[DocumentSnapshot]:
+        rows = []
+        for path, data, update_time in self._backend._children(self._path):
+            if any(f != DOCUMENT_ID and not _lookup(data, f)[0] for f, _ in self._orders):
+                continue
+            if all(_lookup(data, f)[0] and _OPERATORS[op](_lookup(data, f)[1], v) for f, op, v in self._filters):
+                rows.append(DocumentSnapshot(DocumentReference(self._backend, path), data, update_time))
+        rows.sort(key=lambda s: self._sort_key(s._data, s.id))
+        if self._cursor is not None:
+            values, doc_id = self._cursor
+            bound = self._sort_key(values, doc_id)
+            if doc_id is None:  # cursor from plain values: skip every document equal on the order fields
+                bound = bound[:-1]
+                rows = [s for s in rows if self._sort_key(s._data, s.id)[:-1] > bound]
+            else:
+                rows = [s for s in rows if self._sort_key(s._data, s.id) > bound]
+        if self._limit is not None:
+            rows = rows[: self._limit]
+        if self._projection is not None:
+            rows = [DocumentSnapshot(s.reference, _project(s._data, self._projection), s.update_time) for s in rows]
+        return iter(rows)
+
+    def get(self, transaction=None) -> List[DocumentSnapshot]:
+        return list(self.stream())
+
+
+class CollectionReference(Query):
+    def __init__(self, backend: "LocalBackend", path: str) -> None:
+        super().__init__(backend, path)
+
+    @property
+    def id(self) -> str:
+        return self._path.rsplit("/", 1)[-1]
+
+    def document(self, document_id: str | None = None) -> DocumentReference:
+        return DocumentReference(self._backend, f"{self._path}/{document_id or uuid.uuid4().hex[:20]}")
+
+
+class _Writes:
+    """Buffered writes shared by transactions and batches."""
+
+    def __init__(self, backend: "LocalBackend") -> None:
+        self._backend = backend
+        self._writes: List[tuple] = []
+
+    def set(self, ref: DocumentReference, data: dict, merge: bool = False) -> None:
+        self._writes.append(("set", ref, data, merge))
+
+    def create(self, ref: DocumentReference, data: dict) -> None:
+        self._writes.append(("create", ref, data, None))
+
+    def update(self, ref: DocumentReference, fields: dict, option: WriteOption | None = None) -> None:
+        self._writes.append(("update", ref, fields, option))
+
+    def delete(self, ref: DocumentReference) -> None:
+        self._writes.append(("delete", ref, None, None))
+
+
+class WriteBatch(_Writes):
+    def commit(self) -> None:
+        self._backend._commit(self._writes)
+        self._writes = []
+
+
+class Transaction(_Writes):
+    def get(self, ref_or_query):
+        if isinstance(ref_or_query, DocumentReference):
+            return ref_or_query.get()
+        return ref_or_query.stream()
+
+    def get_all(self, refs) -> Iterator[DocumentSnapshot]:
+        return iter(self._backend.get_all(refs))
+
+
+class Watch:
+    def __init__(self, backend: "LocalBackend", path: str, callback: Callable) -> None:
+        self._backend = backend
+        self._path = path
+        self._callback = callback
+
+    def unsubscribe(self) -> None:
+        self._backend._unlisten(self._path, self._callback)
+
+
+class LocalBackend(StorageBackend):
+    """Firestore-like semantics over a simple path → (data, update_time) store."""
+
+    def __init__(self) -> None:
+        self._listeners: Dict[str, List[Callable]] = {}
+        self._listeners_lock = threading.Lock()
+        self._clock_lock = threading.Lock()
+        self._last_time = 0
+
+    # -- raw storage supplied by subclasses -------------------------------------------------
+    @abstractmethod
+    def _atomic(self):
+        """Context manager that serializes reads-then-writes against other writers."""
+
+    @abstractmethod
+    def _read(self, path: str) -> Tuple[dict, int] | None:
+        """Return (data, update_time) for a document, or None."""
+
+    @abstractmethod
+    def _children(self, collection_path: str) -> List[Tuple[str, dict, int]]:
+        """Return (path, data, update_time) for the direct documents of a collection."""
+
+    @abstractmethod
+    def _write(self, path: str, data: dict | None, update_time: int) -> None:
+        """Store a document (``None`` deletes it)."""
+
+    # -- StorageBackend ---------------------------------------------------------------------
+    def collection(self, name: str) -> CollectionReference:
+        return CollectionReference(self, name)
+
+    def run_transaction(self, fn: Callable[[Transaction], Any]) -> Any:
+        with self._atomic():
+            transaction = Transaction(self)
+            result = fn(transaction)
+            self._commit(transaction._writes)
+        return result
+
+    def get_all(self, refs) -> List[DocumentSnapshot]:
+        with self._atomic():
+            return [self._snapshot(ref) for ref in refs]
+
+    def batch(self) -> WriteBatch:
+        return WriteBatch(self)
+
+    def write_option(self, **kwargs) -> WriteOption:
+        return WriteOption(**kwargs)
+
+    def increment(self, value):
+        return Increment(value)
+
+    @property
+    def DELETE_FIELD(self):  # noqa: N802
+        return DELETE_FIELD
+
+    # -- engine -----------------------------------------------------------------------------
+    def _next_time(self) -> int:
+        with self._clock_lock:
+            self._last_time = max(self._last_time + 1, time.time_ns())
+            return self._last_time
+
+    def _snapshot(self, ref: DocumentReference) -> DocumentSnapshot:
+        stored = self._read(ref.path)
+        if stored is None:
+            return DocumentSnapshot(ref, None, None)
+        return DocumentSnapshot(ref, stored[0], stored[1])
+
+    def _commit(self, writes: List[tuple]) -> None:
+        if not writes:
+            return
+        with self._atomic():
+            staged: Dict[str, Tuple[dict | None, int | None]] = {}
+            for op, ref, payload, extra in writes:
+                if ref.path not in staged:
+                    stored = self._read(ref.path)
+                    staged[ref.path] = stored if stored is not None else (None, None)
+                current, update_time = staged[ref.path]
+                if op == "create" and current is not None:
+                    raise AlreadyExists(ref.path)
+                if op == "update":
+                    if current is None:
+                        raise NotFound(ref.path)
+                    if extra is not None and extra.last_update_time is not None and extra.last_update_time != update_time:
+                        raise FailedPrecondition(f"{ref.path} changed since it was read")
+                    if extra is not None and extra.exists is not None and extra.exists != (current is not None):
+                        raise FailedPrecondition(ref.path)
+                if op == "delete":
+                    new = None
+                elif op == "update":
+                    new = copy.deepcopy(current)
+                    _update(new, payload)
+                elif op == "set" and extra and current is not None:
+                    new = copy.deepcopy(current)
+                    _merge(new, payload)
+                else:
+                    new = _resolve(payload, None)
+                staged[ref.path] = (new, update_time)
+            now = self._next_time()
+            for path, (data, _) in staged.items():
+                self._write(path, data, now)
+        self._notify(staged)
+
+    def _listen(self, ref: DocumentReference, callback: Callable) -> Watch:
+        with self._listeners_lock:
+            self._listeners.setdefault(ref.path, []).append(callback)
+        callback([self._snapshot(ref)], [], self._last_time)
+        return Watch(self, ref.path, callback)
+
+    def _unlisten(self, path: str, callback: Callable) -> None:
+        with self._listeners_lock:
+            callbacks = self._listeners.get(path, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    def _notify(self, staged: Dict[str, Any]) -> None:
+        with self._listeners_lock:
+            pending = [(path, list(self._listeners.get(path, []))) for path in staged if self._listeners.get(path)]
+        for path, callbacks in pending:
+            snapshot = self._snapshot(DocumentReference(self, path))
+            for callback in callbacks:
+                callback([snapshot], [], snapshot.update_time)
@@ -0,0 +1,37 @@
+"""In-memory backend for tests, benchmarks and offline demos (data lives as long as the process)."""
+from __future__ import annotations
+
+import threading
+from typing import Dict, List, Tuple
+
+from .local import LocalBackend
+
+
+class MemoryBackend(LocalBackend):
+    name = "memory"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._docs: Dict[str, Tuple[dict, int]] = {}
+        self._lock = threading.RLock()
+
+    def _atomic(self):
+        return self._lock
+
+    def _read(self, path: str) -> Tuple[dict, int] | None:
+        return self._docs.get(path)
+
+    def _children(self, collection_path: str) -> List[Tuple[str, dict, int]]:
+        prefix = collection_path + "/"
+        with self._lock:
+            return [
+                (path, data, update_time)
+                for path, (data, update_time) in self._docs.items()
+                if path.startswith(prefix) and "/" not in path[len(prefix):]
+            ]
+
+    def _write(self, path: str, data: dict | None, update_time: int) -> None:
+        if data is None:
+            self._docs.pop(path, None)
+        else:
+            self._docs[path] = (data, update_time)
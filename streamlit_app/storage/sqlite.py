@@ -0,0 +1,95 @@
+"""SQLite backend for hosting a small class on a single box with local-disk latency.
+
+Documents are stored as JSON rows keyed by path. Listeners only observe writes made by this
+process; run one app process per database file.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, List, Tuple
+
+from .local import LocalBackend
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    path TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    data TEXT NOT NULL,
+    update_time INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_parent ON documents (parent);
+"""
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    raise TypeError(f"Cannot store {type(value).__name__} in SQLite backend")
+
+
+def _decode(obj: dict) -> Any:
+    if set(obj) == {"$datetime"}:
+        return datetime.fromisoformat(obj["$datetime"])
+    return obj
+
+
+class SQLiteBackend(LocalBackend):
+    name = "sqlite"
+
+    def __init__(self, path: str) -> None:
+        super().__init__()
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.RLock()
+        self._depth = 0
+
+    @contextmanager
+    def _atomic(self):
+        with self._lock:
+            outermost = self._depth == 0
+            if outermost:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield
+            except BaseException:
+                self._depth -= 1
+                if outermost:
+                    self._conn.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if outermost:
+                self._conn.execute("COMMIT")
+
+    def _read(self, path: str) -> Tuple[dict, int] | None:
+        with self._lock:
+            row = self._conn.execute("SELECT data, update_time FROM documents WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0], object_hook=_decode), row[1]
+
+    def _children(self, collection_path: str) -> List[Tuple[str, dict, int]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, data, update_time FROM documents WHERE parent = ?", (collection_path,)
+            ).fetchall()
+        return [(path, json.loads(data, object_hook=_decode), update_time) for path, data, update_time in rows]
+
+    def _write(self, path: str, data: dict | None, update_time: int) -> None:
+        if data is None:
+            self._conn.execute("DELETE FROM documents WHERE path = ?", (path,))
+            return
+        self._conn.execute(
+            "INSERT OR REPLACE INTO documents (path, parent, data, update_time) VALUES (?, ?, ?, ?)",
+            (path, path.rsplit("/", 1)[0], json.dumps(data, default=_encode), update_time),
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
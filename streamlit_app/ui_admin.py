@@ -1,7 +1,7 @@
 import streamlit as st
 from . import data
 from .models import Category
-from datetime import datetime
+from .ui_exports import class_archive_button, export_buttons
 
 CATEGORIES_POOL = [
     ("clarity","Clarity & Structure"),
@@ -26,17 +26,30 @@ def admin_view(user):
         new_name = st.text_input("New class name")
         if st.button("Create Class"):
             if new_name:
-                from .firebase import get_db
-                db = get_db()
-                ref = db.collection("classes").document()
-                ref.set({"id":ref.id,"name":new_name,"archived":False,"createdAt":datetime.utcnow()})
+                data.create_class(new_name)
                 st.success("Class created"); st.rerun()
 
     if not class_id:
         st.stop()
 
+    with st.expander("Teams"):
+        teams = data.list_teams(class_id)
+        if teams:
+            st.dataframe([{"Team ID": t["id"], "Name": t.get("name", "")} for t in teams], hide_index=True, use_container_width=True)
+        team_name = st.text_input("New team name")
+        if st.button("Add Team") and team_name:
+            data.create_team(class_id, team_name)
+            st.success("Team added"); st.rerun()
+        st.caption("Each session keeps the roster it had when it was opened; reopen a session to pick up new teams.")
+
     st.subheader("Sessions")
-    sessions = data.list_sessions(class_id)
+    sessions, older = data.page_sessions(class_id)
+    if older is not None and st.toggle("Show older sessions", key=f"older_sessions_{class_id}"):
+        sessions = data.list_sessions(class_id)[::-1]
+
+    with st.expander("Export all sessions"):
+        st.caption("One ZIP with every session's rankings and raw votes (CSV) for end-of-term grading, plus typed Parquet tables for analysis.")
+        class_archive_button(class_id, key_prefix="admin")
 
     with st.expander("Create Session"):
         title = st.text_input("Title")
@@ -50,7 +63,7 @@ def admin_view(user):
         if st.button("Create Session", type="primary"):
             cats = [Category(id=k,label=v).model_dump() for (k,v) in chosen]
             payload = {
-                "title": title or f"Session {len(sessions)+1}",
+                "title": title or f"Session {len(data.list_sessions(class_id))+1}",  # every page, not just the one shown
                 "description": desc,
                 "tags": [],
                 "categories": cats,
@@ -79,38 +92,27 @@ def admin_view(user):
 
         if pick:
             st.subheader("Export Data")
-            export_cols = st.columns(3)
-            with export_cols[0]:
-                csv_data = data.export_to_csv(class_id, pick)
-                if csv_data:
-                    st.download_button(
-                        label="Export CSV",
-                        data=csv_data,
-                        file_name=f"session_{pick}_rankings.csv",
-                        mime="text/csv",
-                        key=f"export_csv_{pick}",
-                    )
-                else:
-                    st.button("Export CSV", disabled=True, key=f"export_csv_disabled_{pick}")
-            with export_cols[1]:
-                excel_data = data.export_to_excel(class_id, pick)
-                if excel_data:
-                    st.download_button(
-                        label="Export Excel",
-                        data=excel_data,
-                        file_name=f"session_{pick}_rankings.xlsx",
-                        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                        key=f"export_excel_{pick}",
-                    )
-                else:
-                    st.button("Export Excel", disabled=True, key=f"export_excel_disabled_{pick}")
+            export_buttons(class_id, pick, key_prefix="admin")
+
+            with st.expander("Import Ballots"):
+                st.caption("CSV with voter_id, team_id, vote_type (peer/teacher) and one rating_<category> column per category — the same layout as the exported Votes sheet. Every category needs a 1–5 rating; rows with blanks or 0 (unrated) are skipped and listed.")
+                upload = st.file_uploader("Ballot CSV", type=["csv"], key=f"ballots_{pick}")
+                if upload is not None and st.button("Import Ballots", key=f"ballots_import_{pick}"):
+                    with st.spinner("Importing ballots..."):
+                        report = data.bulk_submit_votes(class_id, pick, data.ballots_from_csv(upload))
+                    st.success(f"Imported {report['written']} ballot(s).")
+                    if report["errors"]:
+                        st.warning(f"{len(report['errors'])} row(s) were skipped.")
+                        st.dataframe(report["errors"], hide_index=True, use_container_width=True)
 
             st.subheader("Teacher Voting")
+            roster = data.session_roster(class_id, s)
+            if not roster:
+                st.info("Add teams to this class before voting.")
+                return
             team_cols = st.columns([2, 1])
             with team_cols[0]:
-                # Get actual teams from current session votes
-                teams = ["Team Alpha", "Team Beta", "Team Gamma"]  # TODO: get from session data
-                st.selectbox("Team", teams, key=f"teacher_team_{pick}")
+                st.selectbox("Team", list(roster), format_func=lambda t: roster[t]["name"], key=f"teacher_team_{pick}")
             with team_cols[1]:
                 st.caption("Rate each category 1-5")
             slider_cols = st.columns(2)
@@ -0,0 +1,102 @@
+"""On-demand session export buttons shared by the admin console and admin leaderboard."""
+from __future__ import annotations
+
+import os
+from datetime import datetime
+
+import streamlit as st
+
+from . import data
+
+EXCEL_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _build_exports(class_id: str, session_id: str) -> dict:
+    export = data.export_session_data(class_id, session_id)
+    if "error" in export:
+        return {"error": export["error"]}
+    return {
+        "csv": data.export_to_csv(class_id, session_id, export),
+        "excel": data.export_to_excel(class_id, session_id, export),
+        "parquet": data.export_to_parquet(class_id, session_id, export),
+        "preparedAt": datetime.now().strftime("%H:%M:%S"),
+    }
+
+
+def export_buttons(class_id: str, session_id: str, key_prefix: str) -> None:
+    """Render export controls; files are only built (from a single fetch) when the user asks for them."""
+    state_key = f"{key_prefix}_exports_{class_id}_{session_id}"
+    cols = st.columns([1, 1, 1, 1])
+    with cols[0]:
+        label = "Refresh export" if state_key in st.session_state else "Prepare export"
+        if st.button(label, key=f"{key_prefix}_prepare_{session_id}"):
+            with st.spinner("Building export…"):
+                st.session_state[state_key] = _build_exports(class_id, session_id)
+
+    prepared = st.session_state.get(state_key)
+    if not prepared:
+        return
+    if "error" in prepared:
+        st.error(prepared["error"])
+        return
+    with cols[1]:
+        st.download_button(
+            label="Export CSV",
+            data=prepared["csv"],
+            file_name=f"session_{session_id}_rankings.csv",
+            mime="text/csv",
+            key=f"{key_prefix}_csv_{session_id}",
+        )
+    with cols[2]:
+        st.download_button(
+            label="Export Excel",
+            data=prepared["excel"],
+            file_name=f"session_{session_id}_rankings.xlsx",
+            mime=EXCEL_MIME,
+            key=f"{key_prefix}_excel_{session_id}",
+        )
+    with cols[3]:
+        st.download_button(
+            label="Export Parquet",
+            data=prepared["parquet"],
+            file_name=f"session_{session_id}_parquet.zip",
+            mime="application/zip",
+            key=f"{key_prefix}_parquet_{session_id}",
+            help="Typed tables for notebooks: pandas.read_parquet on each file in the ZIP.",
+        )
+    st.caption(f"Export prepared at {prepared['preparedAt']}")
+
+
+def _file_export(class_id: str, key_prefix: str, kind: str, label: str, build, download_label: str, help=None) -> None:
+    """One class-wide export, built on demand into a temp file; session state keeps only its path."""
+    state_key = f"{key_prefix}_{kind}_{class_id}"
+    prepared = st.session_state.get(state_key)
+    cols = st.columns([1, 1])
+    with cols[0]:
+        if st.button(f"Refresh {label}" if prepared else f"Prepare {label}", key=f"{key_prefix}_{kind}_prepare_{class_id}"):
+            with st.spinner(f"Building {label}…"):
+                path = build(class_id)
+            if prepared and os.path.exists(prepared["path"]):
+                os.unlink(prepared["path"])
+            prepared = st.session_state[state_key] = {"path": path, "preparedAt": datetime.now().strftime("%H:%M:%S")}
+    if not prepared or not os.path.exists(prepared["path"]):
+        return
+    with cols[1], open(prepared["path"], "rb") as handle:
+        st.download_button(
+            label=download_label,
+            data=handle,
+            file_name=f"class_{class_id}_{kind}.zip",
+            mime="application/zip",
+            key=f"{key_prefix}_{kind}_download_{class_id}",
+            help=help,
+        )
+    st.caption(f"{label[0].upper()}{label[1:]} prepared at {prepared['preparedAt']}")
+
+
+def class_archive_button(class_id: str, key_prefix: str) -> None:
+    """Render the class-wide exports: the CSV archive and the Parquet tables, each built only when asked for."""
+    _file_export(class_id, key_prefix, "sessions", "class archive", data.export_class_zip, "Download ZIP")
+    _file_export(
+        class_id, key_prefix, "parquet", "class Parquet", data.export_class_parquet, "Download Parquet",
+        help="Typed tables for notebooks: pandas.read_parquet on each file in the ZIP.",
+    )
@@ -1,19 +1,22 @@
 """Dedicated fullscreen leaderboard view for projection."""
 from __future__ import annotations
 
+import math
 import time
 from datetime import datetime
 from typing import Dict, List
 
-import altair as alt
 import pandas as pd
 import streamlit as st
 
-from . import data
+from . import charts, data, live
+from .cache import metadata
+from .ui_exports import export_buttons
 
-REFRESH_SECONDS = 5
-TEACHER_BAR_COLOR = "#3B82F6"
-PEER_BAR_COLOR = "#16A34A"
+REFRESH_SECONDS = 5  # slowest refresh for an open session; active sessions refresh faster
+MIN_REFRESH_SECONDS = 1
+IDLE_STEP_SECONDS = 30
+_VIEW_STATE_KEY = "leaderboard_view_state"
 
 
 def _get_query_param(name: str) -> str | None:
@@ -55,24 +58,21 @@ def _pick_class(classes: List[Dict]) -> str | None:
     return selected
 
 
-def _pick_session(class_id: str) -> Dict | None:
-    sessions = data.list_sessions(class_id)
-    if not sessions:
-        st.warning("No sessions found for this class yet.")
-        return None
-
-    visible_sessions = [s for s in sessions if s.get("status") in {"open", "scheduled", "closed"}]
+def _pick_session(class_id: str, current_id: str | None = None) -> Dict | None:
+    preselected = _get_query_param("session")
+    visible_sessions = data.recent_sessions(class_id, include=(current_id, preselected))
     if not visible_sessions:
         st.warning("No active or recent sessions to display.")
         return None
 
     session_lookup = {s["id"]: s for s in visible_sessions}
-    preselected = _get_query_param("session")
     default_id = preselected if preselected in session_lookup else None
 
+    if default_id is None and current_id in session_lookup:
+        default_id = current_id
     if default_id is None:
         open_sessions = [s for s in visible_sessions if s.get("status") == "open"]
-        default_id = (open_sessions[0]["id"] if open_sessions else visible_sessions[-1]["id"])
+        default_id = (open_sessions[0]["id"] if open_sessions else visible_sessions[0]["id"])
 
     selected = st.selectbox(
         "Session",
@@ -87,40 +87,100 @@ def _pick_session(class_id: str) -> Dict | None:
     return session_lookup[selected]
 
 
-def _build_leaderboard_rows(class_id: str, session: Dict) -> pd.DataFrame:
-    categories = session.get("categories", [])
-    weighting = session.get("weighting", {})
-    teacher_pct = int(weighting.get("teacherPct", 50))
-    peers_pct = int(weighting.get("peersPct", 50))
-
-    raw_scores = data.aggregate_scores(class_id, session["id"], categories, teacher_pct, peers_pct)
-    teams = data.list_teams(class_id)
-    team_lookup = {t["id"]: t for t in teams}
-
-    rows = []
-    all_ids = sorted({*raw_scores.keys(), *team_lookup.keys()})
-    for team_id in all_ids:
-        metrics = raw_scores.get(team_id, {})
-        combined = int(metrics.get("combined", 0))
-        teacher_sum = int(metrics.get("teacher_sum", 0)) if metrics else 0
-        peer_sum = int(metrics.get("peer_sum", 0)) if metrics else 0
-        team_name = team_lookup.get(team_id, {}).get("name", team_id)
-        rows.append({
-            "Rank": 0,
-            "Team": team_name,
-            "Team ID": team_id,
-            "Combined": combined,
-            "Teacher": teacher_sum,
-            "Peers": peer_sum,
-            "TeamColor": data.get_team_color(team_name or team_id),
-        })
-
-    df = pd.DataFrame(rows)
+_ROW_COLUMNS = {
+    "rank": "Rank",
+    "name": "Team",
+    "teamId": "Team ID",
+    "combined": "Combined",
+    "teacher": "Teacher",
+    "peers": "Peers",
+    "color": "TeamColor",
+}
+
+
+def _build_leaderboard_rows(
+    class_id: str, session: Dict, live_state: live.LiveSession | None = None, board: Dict | None = None,
+) -> pd.DataFrame:
+    if live_state is not None:
+        categories = session.get("categories", [])
+        weighting = session.get("weighting", {})
+        teacher_pct = int(weighting.get("teacherPct", 50))
+        peers_pct = int(weighting.get("peersPct", 50))
+        raw_scores = live_state.scores(categories, teacher_pct, peers_pct)
+        rows = data.leaderboard_rows(raw_scores, data.session_roster(class_id, session))
+    else:
+        if board is None:
+            board = data.get_leaderboard(class_id, session["id"]) or {}
+        rows = board.get("rows", [])
+
+    df = pd.DataFrame(rows, columns=list(_ROW_COLUMNS)).rename(columns=_ROW_COLUMNS)
     if df.empty:
         return df
-    df = df.sort_values("Combined", ascending=False).reset_index(drop=True)
-    df["Rank"] = df.index + 1
-    return df
+    return df.astype({"Rank": int, "Combined": int, "Teacher": int, "Peers": int})
+
+
+def refresh_interval(status: str | None, idle_seconds: float) -> float | None:
+    """Seconds until the next refresh: fast while votes arrive, backing off to `REFRESH_SECONDS`
+    as the session goes quiet, and never for a closed session. A viewer that has not seen a
+    change yet passes ``math.inf`` and starts at the idle cadence."""
+    if status == "closed":
+        return None
+    steps = int(min(idle_seconds, 8 * IDLE_STEP_SECONDS) // IDLE_STEP_SECONDS)
+    return min(REFRESH_SECONDS, MIN_REFRESH_SECONDS * 2 ** steps)
+
+
+def _tick_seconds(live_mode: bool, status: str | None, idle_seconds: float) -> float | None:
+    """Live ticks only read the listener's in-memory totals, so they stay at the 1 s floor;
+    polling ticks cost a read and back off with `refresh_interval`."""
+    if live_mode:
+        return None if status == "closed" else MIN_REFRESH_SECONDS
+    return refresh_interval(status, idle_seconds)
+
+
+def _view_state(class_id: str, session: Dict, live_state: live.LiveSession | None) -> Dict:
+    """Rows for the score region, rebuilt only when the session's change version moves.
+
+    A tick costs one projected read of the totals ``version`` (none with a live listener); the
+    board, rows and chart frames are rebuilt only when it moves. Live mode compares the
+    listener's ``revision``, which stays distinct when an idle listener is recreated.
+    """
+    key = (class_id, session["id"], live_state is not None)
+    state = st.session_state.get(_VIEW_STATE_KEY)
+    if state is None or state["key"] != key:
+        status = session.get("status")
+        state = {"key": key, "version": None, "changedAt": None, "status": status, "interval": _tick_seconds(key[2], status, math.inf)}
+    version = live_state.revision if live_state is not None else data.session_version(class_id, session["id"])
+    if version != state["version"]:
+        board, status = None, session.get("status")
+        if live_state is None:
+            board = data.get_leaderboard(class_id, session["id"]) or {}
+            status = board.get("status", status)
+        else:  # `session` is from the last full run; closing bumps the revision, so re-read it here
+            status = data.session_status(class_id, session["id"]) or status
+        state.update(
+            version=version,
+            status=status,
+            df=_build_leaderboard_rows(class_id, session, live_state, board=board),
+            frames={},
+            # the first load is not activity: only a change seen while watching speeds the timer up
+            changedAt=None if state["version"] is None else time.monotonic(),
+        )
+    st.session_state[_VIEW_STATE_KEY] = state
+    return state
+
+
+def _chart_frame(state: Dict, kind: str) -> pd.DataFrame:
+    frames = state["frames"]
+    if kind not in frames:
+        frames[kind] = (charts.ranking_frame if kind == "ranking" else charts.component_frame)(state["df"])
+    return frames[kind]
+
+
+def _scheduled_interval(class_id: str, session: Dict, live_mode: bool) -> float | None:
+    state = st.session_state.get(_VIEW_STATE_KEY)
+    if state is not None and state["key"] == (class_id, session["id"], live_mode):
+        return state["interval"]
+    return _tick_seconds(live_mode, session.get("status"), math.inf)
 
 
 def leaderboard_view(role: str = "student") -> None:
@@ -128,16 +188,10 @@ def leaderboard_view(role: str = "student") -> None:
     role_key = (role or "student").strip().lower()
     is_admin_view = role_key == "admin"
 
-    st.cache_data.clear()
-    st.cache_resource.clear()
-
     if st.button("🔄 Force Refresh", key="leaderboard_force_refresh"):
-        st.cache_data.clear()
-        st.cache_resource.clear()
+        metadata.clear()
         st.rerun()
 
-    cache_buster = int(time.time())
-
     st.markdown(
         """
         <style>
@@ -159,7 +213,19 @@ def leaderboard_view(role: str = "student") -> None:
         time.sleep(REFRESH_SECONDS)
         st.rerun()
 
-    session = _pick_session(class_id)
+    season_mode = st.radio(
+        "Leaderboard", ["Session", "Season"], index=1 if _get_query_param("mode") == "season" else 0,
+        horizontal=True, label_visibility="collapsed", key="leaderboard_mode",
+    ) == "Season"
+    if season_mode != (_get_query_param("mode") == "season"):
+        _update_query_params(mode="season" if season_mode else None)
+    if season_mode:
+        st.markdown("<div class='leaderboard-title'>🏆 Season Standings</div>", unsafe_allow_html=True)
+        st.experimental_fragment(run_every=REFRESH_SECONDS)(_season_region)(class_id)
+        return
+
+    current_id = next((c.get("currentSessionId") for c in classes if c["id"] == class_id), None)
+    session = _pick_session(class_id, current_id)
     if not session:
         time.sleep(REFRESH_SECONDS)
         st.rerun()
@@ -168,166 +234,98 @@ def leaderboard_view(role: str = "student") -> None:
 
     # Export buttons for admin view
     if is_admin_view:
-        export_cols = st.columns([1, 1, 1, 3])
+        export_cols = st.columns([3, 1])
         with export_cols[0]:
-            csv_data = data.export_to_csv(class_id, session["id"])
-            if csv_data:
-                st.download_button(
-                    label="Export CSV",
-                    data=csv_data,
-                    file_name=f"session_{session['id']}_rankings.csv",
-                    mime="text/csv",
-                    key="leaderboard_export_csv",
-                )
+            export_buttons(class_id, session["id"], key_prefix="leaderboard")
         with export_cols[1]:
-            excel_data = data.export_to_excel(class_id, session["id"])
-            if excel_data:
-                st.download_button(
-                    label="Export Excel",
-                    data=excel_data,
-                    file_name=f"session_{session['id']}_rankings.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    key="leaderboard_export_excel",
-                )
-        with export_cols[2]:
             if st.button("Back to Dashboard", key="back_to_dashboard"):
                 st.query_params.clear()
                 st.rerun()
 
-    df = _build_leaderboard_rows(class_id, session)
+    live_mode = st.toggle("Live updates", value=_get_query_param("live") == "1", key="leaderboard_live")
+    if live_mode != (_get_query_param("live") == "1"):
+        _update_query_params(live="1" if live_mode else None)
+
+    # Only the score region reruns on a timer; the chrome above stays rendered and no script
+    # thread sleeps between refreshes. The timer follows the adaptive schedule (none once closed).
+    interval = _scheduled_interval(class_id, session, live_mode)
+    st.experimental_fragment(run_every=interval)(_score_region)(class_id, session, is_admin_view, live_mode, interval)
+
+
+def _season_region(class_id: str) -> None:
+    season = data.season_standings(class_id)
     timestamp = datetime.now().strftime("%H:%M:%S")
     st.markdown(
-        f"<div class='leaderboard-caption'>Refreshing every {REFRESH_SECONDS}s · Last updated {timestamp}</div>",
+        f"<div class='leaderboard-caption'>{season['sessions']} session(s), {season['open']} open · "
+        f"Last updated {timestamp}</div>",
+        unsafe_allow_html=True,
+    )
+    df = pd.DataFrame(season["rows"], columns=[*_ROW_COLUMNS, "sessions"]).rename(columns={**_ROW_COLUMNS, "sessions": "Sessions"})
+    if df.empty:
+        st.info("No finished or running sessions yet.")
+        return
+
+    top_row = df.iloc[0]
+    st.metric("Season Leader", f"{top_row['Team']} (Score {top_row['Combined']})")
+    st.vega_lite_chart(
+        charts.ranking_frame(df),
+        charts.ranking_spec(len(df)),
+        use_container_width=True,
+        key="leaderboard_season_chart",
+    )
+    st.dataframe(
+        df[["Rank", "Team", "Team ID", "Combined", "Teacher", "Peers", "Sessions"]],
+        use_container_width=True,
+        hide_index=True,
+    )
+
+
+def _score_region(class_id: str, session: Dict, is_admin_view: bool, live_mode: bool, interval: float | None) -> None:
+    live_state = live.watch(class_id, session["id"]) if live_mode else None
+    state = _view_state(class_id, session, live_state)
+    idle = math.inf if state["changedAt"] is None else time.monotonic() - state["changedAt"]
+    wanted = _tick_seconds(live_mode, state["status"], idle)
+    if wanted != interval:
+        state["interval"] = wanted
+        st.rerun()  # run_every is fixed per fragment; a full rerun reschedules it
+
+    df = state["df"]
+    timestamp = datetime.now().strftime("%H:%M:%S")
+    if interval is None:
+        cadence = "Session closed"
+    else:
+        cadence = f"{'Live' if live_state else 'Refreshing'} every {interval:g}s"
+    st.markdown(
+        f"<div class='leaderboard-caption'>{cadence} · Last updated {timestamp}</div>",
         unsafe_allow_html=True,
     )
 
     if df.empty:
         st.info("Waiting for the first votes to arrive…")
-        time.sleep(REFRESH_SECONDS)
-        st.rerun()
+        return
 
     top_row = df.iloc[0]
     st.metric("Leaderboard Leader", f"{top_row['Team']} (Score {top_row['Combined']})")
 
-    team_order = df["Team"].tolist()
-    team_colors = df["TeamColor"].tolist()
-    df["CacheKey"] = cache_buster
-
     if not is_admin_view:
-        chart_height = max(280, 70 * len(df))
-        chart_data = df[["Team", "Combined", "TeamColor", "Rank", "CacheKey"]]
-        chart = (
-            alt.Chart(chart_data)
-            .mark_bar(cornerRadiusTopRight=6, cornerRadiusBottomRight=6)
-            .encode(
-                y=alt.Y(
-                    "Team:N",
-                    sort=team_order,
-                    title="Team",
-                    axis=alt.Axis(labelFontSize=16, titleFontSize=18),
-                ),
-                x=alt.X(
-                    "Combined:Q",
-                    title="Weighted Score",
-                    axis=alt.Axis(labelFontSize=16, titleFontSize=18),
-                ),
-                color=alt.Color(
-                    "Team:N",
-                    scale=alt.Scale(domain=team_order, range=team_colors),
-                    legend=None,
-                ),
-                detail=alt.Detail("CacheKey:Q"),
-                tooltip=[
-                    alt.Tooltip("Rank:O", title="Rank"),
-                    alt.Tooltip("Team:N", title="Team"),
-                    alt.Tooltip("Combined:Q", title="Weighted Score"),
-                ],
-            )
-            .properties(height=chart_height, width="container")
+        st.vega_lite_chart(
+            _chart_frame(state, "ranking"),
+            charts.ranking_spec(len(df)),
+            use_container_width=True,
+            key="leaderboard_ranking_chart",
         )
-        st.altair_chart(chart, use_container_width=True)
-
         st.dataframe(
             df[["Rank", "Team", "Team ID", "Combined"]],
             use_container_width=True,
             hide_index=True,
         )
     else:
-        admin_rows: List[Dict] = []
-        for _, row in df.iterrows():
-            base = {
-                "Team": row["Team"],
-                "Rank": int(row["Rank"]),
-                "TeamColor": row["TeamColor"],
-                "TeacherTotal": int(row["Teacher"]),
-                "PeerTotal": int(row["Peers"]),
-                "CombinedTotal": int(row["Combined"]),
-                "CacheKey": cache_buster,
-            }
-            admin_rows.append({**base, "ScoreType": "Teacher", "Value": int(row["Teacher"])})
-            admin_rows.append({**base, "ScoreType": "Peers", "Value": int(row["Peers"])})
-            admin_rows.append({**base, "ScoreType": "Combined", "Value": int(row["Combined"])})
-
-        admin_df = pd.DataFrame(admin_rows)
-        teacher_peer_chart = (
-            alt.Chart(admin_df[admin_df["ScoreType"].isin(["Teacher", "Peers"])])
-            .mark_bar(cornerRadiusTopLeft=2, cornerRadiusTopRight=2)
-            .encode(
-                x=alt.X(
-                    "Team:N",
-                    sort=team_order,
-                    title="Team",
-                    axis=alt.Axis(labelFontSize=14, labelAngle=-20),
-                ),
-                y=alt.Y("Value:Q", title="Score"),
-                color=alt.Color(
-                    "ScoreType:N",
-                    scale=alt.Scale(domain=["Teacher", "Peers"], range=[TEACHER_BAR_COLOR, PEER_BAR_COLOR]),
-                    legend=alt.Legend(title="Components"),
-                ),
-                xOffset=alt.XOffset("ScoreType:N"),
-                detail=alt.Detail("CacheKey:Q"),
-                tooltip=[
-                    alt.Tooltip("Team:N", title="Team"),
-                    alt.Tooltip("ScoreType:N", title="Component"),
-                    alt.Tooltip("Value:Q", title="Score"),
-                ],
-            )
-        )
-
-        combined_chart = (
-            alt.Chart(admin_df[admin_df["ScoreType"] == "Combined"])
-            .mark_bar(cornerRadiusTopLeft=2, cornerRadiusTopRight=2)
-            .encode(
-                x=alt.X(
-                    "Team:N",
-                    sort=team_order,
-                    title="Team",
-                    axis=alt.Axis(labelFontSize=14, labelAngle=-20),
-                ),
-                y=alt.Y("Value:Q", title="Score"),
-                color=alt.Color(
-                    "Team:N",
-                    scale=alt.Scale(domain=team_order, range=team_colors),
-                    legend=None,
-                ),
-                xOffset=alt.XOffset("ScoreType:N"),
-                detail=alt.Detail("CacheKey:Q"),
-                tooltip=[
-                    alt.Tooltip("Team:N", title="Team"),
-                    alt.Tooltip("CombinedTotal:Q", title="Weighted"),
-                    alt.Tooltip("TeacherTotal:Q", title="Teacher Sum"),
-                    alt.Tooltip("PeerTotal:Q", title="Student Sum"),
-                ],
-            )
-        )
-
-        chart = (
-            (teacher_peer_chart + combined_chart)
-            .properties(width="container", height=420)
-            .configure_axis(labelFontSize=14, titleFontSize=16)
+        st.vega_lite_chart(
+            _chart_frame(state, "component"),
+            charts.component_spec(),
+            use_container_width=True,
+            key="leaderboard_component_chart",
         )
-        st.altair_chart(chart, use_container_width=True)
         st.caption("Teacher (blue), Student (green), Combined (team color)")
 
         st.dataframe(
@@ -335,6 +333,3 @@ def leaderboard_view(role: str = "student") -> None:
             use_container_width=True,
             hide_index=True,
         )
-
-    time.sleep(REFRESH_SECONDS)
-    st.rerun()
@@ -1,20 +1,43 @@
-"""Student settings view stub."""
+"""Student settings view; saving writes the user's membership document for the chosen class."""
 from __future__ import annotations
 
 import streamlit as st
 
+from . import data, profiles
+
+DEFAULT_SETTINGS = {"notifySessionOpen": True, "notifyResults": True}
+
 
 def settings_view(user: dict | None) -> None:
-    """Render a placeholder settings panel for student users."""
+    """Render the student's account details and per-class notification settings."""
     st.header("Student Settings")
-    st.caption("Customize your voting experience. More options coming soon!")
+    st.caption("Customize your voting experience.")
+    user = user or {}
 
     st.subheader("Account")
-    st.text_input("Email", value=user.get("email", "") if user else "", disabled=True)
+    st.text_input("Email", value=user.get("email", ""), disabled=True)
+    st.text_input("Display name", value=user.get("displayName", ""), disabled=True)
 
-    st.subheader("Notifications")
-    st.checkbox("Email me when a new session opens", value=True)
-    st.checkbox("Notify me when results are published", value=True)
+    classes = {c["id"]: c.get("name", c["id"]) for c in data.list_classes()}
+    if not classes:
+        st.info("There are no active classes yet.")
+        return
 
-    st.info("Settings are in development. Reach out to your instructor for changes that need to stick across sessions.")
+    # Any class can be picked: saving creates the membership (merged), it is not a prerequisite.
+    memberships = user.get("settings", {})
+    options = sorted(classes, key=lambda cid: (cid not in memberships, classes[cid]))
+    class_id = st.selectbox("Class", options, format_func=lambda cid: classes[cid])
+    team = user.get("teams", {}).get(class_id)
+    st.caption(f"Team: **{team}**" if team else "No team assigned in this class yet.")
+
+    current = {**DEFAULT_SETTINGS, **memberships.get(class_id, {})}
+    st.subheader("Notifications")
+    notify_open = st.checkbox("Email me when a new session opens", value=current["notifySessionOpen"])
+    notify_results = st.checkbox("Notify me when results are published", value=current["notifyResults"])
 
+    if st.button("Save settings", type="primary"):
+        profiles.save_membership(
+            class_id, user["email"],
+            settings={"notifySessionOpen": notify_open, "notifyResults": notify_results},
+        )
+        st.success("Settings saved.")
@@ -13,8 +13,10 @@ def student_view(user):
         st.info("No active classes yet.")
         return
 
-    sessions = [s for s in data.list_sessions(class_id) if s.get("status") in ("open","scheduled","closed")]
-    sess = st.selectbox("Session", [s["id"] for s in sessions], format_func=lambda i: next(s["title"] for s in sessions if s["id"]==i)) if sessions else None
+    current_id = next((c.get("currentSessionId") for c in classes if c["id"]==class_id), None)
+    sessions = data.recent_sessions(class_id, include=(current_id,))
+    ids = [s["id"] for s in sessions]
+    sess = st.selectbox("Session", ids, index=ids.index(current_id) if current_id in ids else 0, format_func=lambda i: next(s["title"] for s in sessions if s["id"]==i)) if sessions else None
     if not sess:
         st.info("No sessions.")
         return
@@ -23,7 +25,11 @@ def student_view(user):
     cats = [Category(**c) for c in sess_obj.get("categories", [])]
 
     st.subheader("Vote")
-    team_id = st.text_input("Presenting Team ID (temporary field)")
+    roster = data.session_roster(class_id, sess_obj)
+    if not roster:
+        st.info("No teams are registered for this class yet.")
+        return
+    team_id = st.selectbox("Presenting team", list(roster), format_func=lambda t: roster[t]["name"])
     ratings = {}
     for c in cats:
         ratings[c.id] = st.slider(c.label, 1, 5, 3, key=f"cat_{c.id}")
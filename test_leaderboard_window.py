@@ -1,6 +1,7 @@
 """Ad-hoc tests for the Streamlit leaderboard projection view."""
 from __future__ import annotations
 
+import math
 import types
 from typing import List
 
@@ -75,3 +76,46 @@ def test_update_query_params_persists_existing_values(monkeypatch: pytest.Monkey
 
     leaderboard._update_query_params(session=None)
     assert dict(params) == {"view": "leaderboard", "class": "c1"}
+
+
+def test_refresh_backs_off_when_idle_and_stops_when_closed() -> None:
+    assert leaderboard.refresh_interval("open", 0) == leaderboard.MIN_REFRESH_SECONDS
+    assert leaderboard.refresh_interval("open", leaderboard.IDLE_STEP_SECONDS) == 2 * leaderboard.MIN_REFRESH_SECONDS
+    assert leaderboard.refresh_interval("open", 600) == leaderboard.REFRESH_SECONDS
+    assert leaderboard.refresh_interval("closed", 0) is None
+    assert leaderboard.refresh_interval("open", math.inf) == leaderboard.REFRESH_SECONDS
+
+
+def test_view_state_rebuilds_only_when_the_version_or_listener_moves(monkeypatch: pytest.MonkeyPatch) -> None:
+    builds: List[str] = []
+    boards: List[str] = []
+    versions = iter([3, 3, 4])
+    monkeypatch.setattr(leaderboard.st, "session_state", {})
+    monkeypatch.setattr(leaderboard.data, "session_version", lambda cid, sid: next(versions))
+    monkeypatch.setattr(leaderboard.data, "get_leaderboard", lambda cid, sid: boards.append(sid) or {"status": "open"})
+    monkeypatch.setattr(leaderboard, "_build_leaderboard_rows", lambda cid, session, live_state, board=None: builds.append(session["id"]))
+    session = {"id": "s1", "status": "open"}
+
+    first = leaderboard._view_state("c1", session, None)
+    assert (first["interval"], first["changedAt"]) == (leaderboard.REFRESH_SECONDS, None)  # no 1 s start
+    leaderboard._view_state("c1", session, None)
+    assert boards == builds == ["s1"]  # an unchanged tick reads only the version
+    assert leaderboard._view_state("c1", session, None)["changedAt"] is not None
+    assert boards == ["s1", "s1"]
+
+    statuses = iter(["open", "open", "closed"])
+    monkeypatch.setattr(leaderboard.data, "session_status", lambda cid, sid: next(statuses))
+    listener = types.SimpleNamespace(revision=(1, 5))
+    leaderboard._view_state("c1", session, listener)
+    listener.revision = (2, 5)  # recreated after going idle: same version, new listener
+    leaderboard._view_state("c1", session, listener)
+    assert len(builds) == 4 and len(boards) == 2
+    listener.revision = (2, 6)  # closed by the admin; `session` still says open
+    assert leaderboard._view_state("c1", session, listener)["status"] == "closed"
+
+
+def test_live_viewers_keep_the_one_second_tick_until_closed() -> None:
+    assert leaderboard._tick_seconds(True, "open", math.inf) == leaderboard.MIN_REFRESH_SECONDS
+    assert leaderboard._tick_seconds(True, "open", 600) == leaderboard.MIN_REFRESH_SECONDS
+    assert leaderboard._tick_seconds(True, "closed", 0) is None
+    assert leaderboard._tick_seconds(False, "open", math.inf) == leaderboard.REFRESH_SECONDS
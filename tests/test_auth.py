@@ -0,0 +1,123 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+import pytest
+
+from streamlit_app import auth
+
+
+class _FakeHTTP:
+    """Records posts and replays canned ``(status, body)`` responses."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def post(self, url, timeout=None, **kwargs):
+        self.calls.append((url, kwargs))
+        status, body = self.responses.pop(0)
+        return SimpleNamespace(ok=200 <= status < 300, status_code=status, json=lambda: body)
+
+
+@pytest.fixture
+def state(monkeypatch):
+    session_state = {}
+    monkeypatch.setattr(auth.st, "session_state", session_state)
+    monkeypatch.setattr(auth, "_get_api_key", lambda: "key")
+    yield session_state
+    auth.set_http_session(None)
+
+
+def test_signin_tokens_are_stored_and_refreshed_before_expiry(state):
+    http = _FakeHTTP(
+        (200, {"email": "ana@x.edu", "idToken": "id-1", "refreshToken": "r-1", "expiresIn": "3600"}),
+        (200, {"id_token": "id-2", "refresh_token": "r-2", "expires_in": "3600"}),
+    )
+    auth.set_http_session(http)
+
+    data, err = auth.signin("ana@x.edu", "pw")
+    assert err is None
+    auth.store_tokens(data, now=1000)
+    assert auth.current_id_token(now=1000 + 3600 - auth.REFRESH_MARGIN_SECONDS - 1) == "id-1"
+    assert len(http.calls) == 1
+
+    assert auth.current_id_token(now=1000 + 3600 - 60) == "id-2"
+    url, kwargs = http.calls[1]
+    assert url.startswith(auth.TOKEN_URL)
+    assert kwargs["data"] == {"grant_type": "refresh_token", "refresh_token": "r-1"}
+    assert state[auth.TOKENS_KEY]["refreshToken"] == "r-2"
+
+
+def test_expired_tokens_are_dropped_when_refresh_fails(state):
+    auth.set_http_session(_FakeHTTP((400, {"error": {"message": "TOKEN_EXPIRED"}})))
+    auth.store_tokens({"idToken": "id-1", "refreshToken": "r-1", "expiresIn": "3600"}, now=0)
+
+    assert auth.current_id_token(now=4000) is None
+    assert auth.TOKENS_KEY not in state
+
+
+def test_errors_and_unreachable_network_surface_messages(state, monkeypatch):
+    auth.set_http_session(_FakeHTTP((400, {"error": {"message": "INVALID_PASSWORD"}})))
+    assert auth.signin("ana@x.edu", "bad") == (None, "INVALID_PASSWORD")
+
+    def _offline(*args, **kwargs):
+        raise auth.requests.ConnectionError("offline")
+    auth.set_http_session(SimpleNamespace(post=_offline))
+    data, err = auth.signin("ana@x.edu", "pw")
+    assert data is None and "reach" in err
+    assert auth.send_password_reset("ana@x.edu") is False
+
+
+def _serve(statuses):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            status = statuses.pop(0)
+            body = json.dumps({"ok": status} if status == 200 else {"error": {"message": "BUSY"}}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            if status == 429:
+                self.send_header("Retry-After", "0")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def test_pooled_client_retries_throttled_requests(state, monkeypatch):
+    statuses = [429, 503, 200]
+    server = _serve(statuses)
+    monkeypatch.setattr(auth, "AUTH_URL", f"http://127.0.0.1:{server.server_address[1]}/v1")
+    try:
+        data, err = auth.signin("ana@x.edu", "pw")
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert (data, err) == ({"ok": 200}, None)
+    assert statuses == []
+
+
+def test_signup_and_reset_emails_are_not_retried_on_server_errors(state, monkeypatch):
+    statuses = [429, 502, 200, 503, 200]
+    server = _serve(statuses)
+    monkeypatch.setattr(auth, "AUTH_URL", f"http://127.0.0.1:{server.server_address[1]}/v1")
+    monkeypatch.setattr(auth, "_domain_ok", lambda email: True)
+    auth.set_http_session(None)  # mounts follow AUTH_URL
+    try:
+        data, err = auth.signup("ana@x.edu", "pw")  # throttled once, then a 502 that may have created the account
+        assert (data, err) == (None, "BUSY")
+        assert statuses == [200, 503, 200]
+        statuses.pop(0)
+        assert auth.send_password_reset("ana@x.edu") is False  # no second email after a 503
+        assert statuses == [200]
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,26 @@
+from streamlit_app import cache
+
+
+def test_ttl_cache_reuses_until_expiry(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: clock[0])
+    store = cache.TTLCache(maxsize=4, ttl=10)
+    loads = []
+    loader = lambda: loads.append(1) or len(loads)
+
+    assert store.get_or_load(("sessions", "c1"), loader) == 1
+    assert store.get_or_load(("sessions", "c1"), loader) == 1
+    clock[0] += 11
+    assert store.get_or_load(("sessions", "c1"), loader) == 2
+
+
+def test_ttl_cache_is_bounded_and_invalidates_by_prefix():
+    store = cache.TTLCache(maxsize=2, ttl=60)
+    store.get_or_load(("sessions", "c1"), lambda: "s1")
+    store.get_or_load(("teams", "c1"), lambda: "t1")
+    store.get_or_load(("sessions", "c1"), lambda: "stale")  # refresh LRU position
+    store.get_or_load(("classes",), lambda: "k")
+    assert store.get_or_load(("teams", "c1"), lambda: "reloaded") == "reloaded"
+
+    store.invalidate("sessions", "c1")
+    assert store.get_or_load(("sessions", "c1"), lambda: "fresh") == "fresh"
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import pandas as pd
+
+from streamlit_app import charts
+
+
+def _board(rows):
+    return pd.DataFrame(rows, columns=["Rank", "Team", "Team ID", "Combined", "Teacher", "Peers", "TeamColor"])
+
+
+def test_specs_do_not_change_when_scores_or_order_change():
+    before = _board([[1, "Alpha", "a", 9, 10, 8, "#111111"], [2, "Beta", "b", 5, 4, 6, "#222222"]])
+    after = _board([[1, "Beta", "b", 12, 14, 10, "#222222"], [2, "Alpha", "a", 9, 10, 8, "#111111"]])
+
+    assert charts.ranking_spec(len(before)) == charts.ranking_spec(len(after))
+    assert charts.component_spec() == charts.component_spec()
+    assert "data" not in charts.ranking_spec(2)
+    assert charts.ranking_frame(after)["Team"].tolist() == ["Beta", "Alpha"]
+
+
+def test_component_frame_has_one_row_per_team_and_component():
+    board = _board([[1, "Alpha", "a", 9, 10, 8, "#111111"], [2, "Beta", "b", 5, 4, 6, "#222222"]])
+    long = charts.component_frame(board)
+
+    assert len(long) == 6
+    alpha = long[long["Team"] == "Alpha"].set_index("ScoreType")
+    assert alpha["Value"].to_dict() == {"Teacher": 10, "Peers": 8, "Combined": 9}
+    assert set(alpha["Combined"]) == {9}
+    assert set(alpha["TeamColor"]) == {"#111111"}
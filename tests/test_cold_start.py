@@ -0,0 +1,13 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY = ["pandas", "altair", "numpy", "google.cloud.firestore", "streamlit_app.data"]
+
+
+def test_login_page_import_skips_heavy_dependencies():
+    probe = f"import sys, json, streamlit_app.app; print(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))"
+    result = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True)
+    assert json.loads(result.stdout.strip().splitlines()[-1]) == []
@@ -0,0 +1,227 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from streamlit_app import data as data_module
+
+SESSION = {
+    "id": "s1",
+    "title": "Pitch day",
+    "categories": [{"id": "clarity", "label": "Clarity"}, {"id": "delivery", "label": "Delivery"}],
+    "weighting": {"teacherPct": 40, "peersPct": 60},
+}
+VOTES = {
+    "votes": [
+        {"userId": "ana", "teamId": "a", "ratings": {"clarity": 4, "delivery": 5}, "createdAt": datetime(2024, 3, 1, 9)},
+        {"userId": "ben", "teamId": "b", "ratings": {"clarity": 2, "delivery": 3}, "createdAt": datetime(2024, 3, 1, 9, 5)},
+    ],
+    "teacherVotes": [
+        {"userId": "prof", "teamId": "b", "ratings": {"clarity": 5, "delivery": 5}, "createdAt": datetime(2024, 3, 1, 10)},
+    ],
+}
+
+
+def _load_data(monkeypatch, streams):
+    data = data_module
+
+    def collection(name):
+        def stream():
+            streams.append(name)
+            return [SimpleNamespace(to_dict=lambda d=d: dict(d)) for d in VOTES[name]]
+        return SimpleNamespace(select=lambda fields: SimpleNamespace(stream=stream))
+
+    monkeypatch.setattr(data, "session_ref", lambda *args: SimpleNamespace(collection=collection))
+    monkeypatch.setattr(data, "get_session", lambda *args: dict(SESSION))
+    monkeypatch.setattr(data, "list_teams", lambda class_id: [{"id": "a", "name": "Alpha"}, {"id": "b", "name": "Beta"}])
+    return data
+
+
+def test_export_session_data_reads_each_vote_stream_once(monkeypatch):
+    streams = []
+    data = _load_data(monkeypatch, streams)
+    export = data.export_session_data("c1", "s1")
+
+    assert sorted(streams) == ["teacherVotes", "votes"]
+    assert [v["vote_type"] for v in export["votes"]] == ["peer", "peer", "teacher"]
+    scores = {s["team_id"]: s for s in export["scores"]}
+    assert scores["b"] == {"team_id": "b", "team_name": "Beta", "peer_score": 5, "teacher_score": 10, "combined_score": 7}
+
+    csv_text = data.export_to_csv("c1", "s1", export).decode("utf-8")
+    assert csv_text.splitlines()[1].startswith("1,b,Beta,5,10,7")
+    assert data.export_to_excel("c1", "s1", export)[:2] == b"PK"
+    assert len(streams) == 2
+
+
+def test_session_bundle_reads_run_concurrently(monkeypatch):
+    import threading
+
+    data = _load_data(monkeypatch, [])
+    barrier = threading.Barrier(4, timeout=5)  # only passes if all four reads are in flight at once
+    real_stream = data._stream_dicts
+    monkeypatch.setattr(data, "get_session", lambda *args: barrier.wait() is not None and dict(SESSION))
+    monkeypatch.setattr(data, "list_teams", lambda class_id: barrier.wait() is not None and [{"id": "a", "name": "Alpha"}])
+    monkeypatch.setattr(data, "_stream_dicts", lambda *args: barrier.wait() is not None and real_stream(*args))
+
+    bundle = data.load_session_bundle("c1", "s1")
+    assert bundle["session"]["id"] == "s1"
+    assert [len(bundle["votes"]), len(bundle["teacherVotes"]), len(bundle["teams"])] == [2, 1, 1]
+
+
+def test_streamed_csv_and_class_archive_match_the_session_exports(monkeypatch):
+    import io
+    import os
+    import zipfile
+
+    import pandas as pd
+
+    from streamlit_app import storage
+    from streamlit_app.cache import metadata
+    from streamlit_app.storage.memory import MemoryBackend
+
+    data = data_module
+    monkeypatch.setattr(storage, "_backend", MemoryBackend())
+    monkeypatch.setattr(data, "CSV_CHUNK_ROWS", 2)
+    metadata.clear()
+    data.team_ref("c1", "a").set({"name": "Alpha"})
+    data.team_ref("c1", "b").set({"name": "Beta"})
+    spec = {"categories": SESSION["categories"], "weighting": SESSION["weighting"], "status": "open"}
+    first = data.create_session("c1", {"title": "Week 1: Pitches", **spec})
+    second = data.create_session("c1", {"title": "Week 2", **spec})
+    for i, user in enumerate(["ana", "ben", "cy", "dee", "eve"]):
+        data.submit_vote("c1", first["id"], user, "ab"[i % 2], {"clarity": 5 - i % 3, "delivery": 3})
+    data.submit_teacher_vote("c1", first["id"], "prof", "b", {"clarity": 5, "delivery": 5})
+
+    chunks = list(data.iter_votes_csv("c1", first["id"]))
+    assert len(chunks) == 3  # six votes, two rows per chunk (the header rides in the first)
+    export = data.export_session_data("c1", first["id"])
+    assert b"".join(chunks) == pd.DataFrame(export["votes"]).to_csv(index=False).encode("utf-8")
+
+    output = io.BytesIO()
+    assert data.write_class_archive("c1", output) == 2
+    with zipfile.ZipFile(output) as archive:
+        index = pd.read_csv(archive.open("sessions.csv"))
+        assert list(index["session_id"]) == [first["id"], second["id"]]
+        folder = index["folder"][0]
+        assert folder == f"week-1-pitches_{first['id']}"
+        assert archive.read(f"{folder}/rankings.csv") == data.export_to_csv("c1", first["id"], export)
+        assert archive.read(f"{folder}/votes.csv") == b"".join(chunks)
+        assert archive.read(f"{index['folder'][1]}/votes.csv").startswith(b"voter_id,team_id,team_name,vote_type")
+
+    path = data.export_class_zip("c1")  # spooled to disk for the download button
+    try:
+        with zipfile.ZipFile(path) as archive, zipfile.ZipFile(output) as in_memory:
+            assert archive.namelist() == in_memory.namelist()
+    finally:
+        os.unlink(path)
+
+
+def test_parquet_export_keeps_types_for_one_session_or_the_whole_class(monkeypatch):
+    import io
+    import os
+    import zipfile
+
+    import pandas as pd
+    import pyarrow as pa
+
+    from streamlit_app import storage
+    from streamlit_app.cache import metadata
+    from streamlit_app.storage.memory import MemoryBackend
+
+    data = data_module
+    monkeypatch.setattr(storage, "_backend", MemoryBackend())
+    metadata.clear()
+    data.team_ref("c1", "a").set({"name": "Alpha"})
+    data.team_ref("c1", "b").set({"name": "Beta"})
+    first = data.create_session("c1", {"title": "Week 1", "status": "open", "categories": SESSION["categories"], "weighting": SESSION["weighting"]})
+    second = data.create_session("c1", {"title": "Week 2", "status": "open", "categories": [{"id": "story", "label": "Story"}], "weighting": SESSION["weighting"]})
+    data.submit_vote("c1", first["id"], "ana", "a", {"clarity": 4, "delivery": 5})
+    data.submit_vote("c1", first["id"], "ben", "b", {"clarity": 2, "delivery": 3})
+    data.submit_teacher_vote("c1", first["id"], "prof", "b", {"clarity": 5, "delivery": 5})
+    data.submit_vote("c1", second["id"], "ana", "b", {"story": 3})
+
+    export = data.export_session_data("c1", first["id"])
+    tables = data.export_arrow_tables("c1", first["id"], export)
+    assert tables["votes"].schema.field("rating").type == pa.int16()
+    assert tables["votes"].schema.field("created_at").type == pa.timestamp("us", tz="UTC")
+    assert tables["votes"].num_rows == 4 and tables["teacher_votes"].num_rows == 2
+    scores = tables["scores"].to_pylist()
+    assert [(s["rank"], s["team_id"], s["peer_score"], s["teacher_score"], s["combined_score"]) for s in scores] == [
+        (1, "b", 5.0, 10.0, 7), (2, "a", 9.0, 0.0, 5),
+    ]
+    per_category = {(r["team_id"], r["category_id"]): (r["peer_sum"], r["teacher_sum"]) for r in tables["category_scores"].to_pylist()}
+    assert per_category[("b", "delivery")] == (3, 5)
+
+    with zipfile.ZipFile(io.BytesIO(data.export_to_parquet("c1"))) as archive:
+        assert sorted(archive.namelist()) == sorted(f"{name}.parquet" for name in tables)
+        votes = pd.read_parquet(io.BytesIO(archive.read("votes.parquet")))
+        sessions = pd.read_parquet(io.BytesIO(archive.read("sessions.parquet")))
+    assert list(sessions["session_id"]) == [first["id"], second["id"]]
+    assert list(sessions["category_ids"].map(list)) == [["clarity", "delivery"], ["story"]]
+    assert str(votes["created_at"].dtype) == "datetime64[us, UTC]"
+    assert votes.groupby("session_id")["rating"].sum().to_dict() == {first["id"]: 14, second["id"]: 3}
+
+    path = data.export_class_parquet("c1")
+    try:
+        with zipfile.ZipFile(path) as archive:
+            assert pd.read_parquet(archive.open("votes.parquet")).equals(votes)
+    finally:
+        os.unlink(path)
+
+
+def test_parquet_export_leaves_unrated_categories_null(monkeypatch):
+    from streamlit_app import storage
+    from streamlit_app.cache import metadata
+    from streamlit_app.storage.memory import MemoryBackend
+
+    data = data_module
+    monkeypatch.setattr(storage, "_backend", MemoryBackend())
+    metadata.clear()
+    created = data.create_session("c1", {"title": "Week 1", "status": "open", "categories": SESSION["categories"], "weighting": SESSION["weighting"]})
+    data.vote_ref("c1", created["id"], "ana").set({"userId": "ana", "teamId": "a", "ratings": {"clarity": 3}})  # predates "delivery"
+
+    votes = data.export_arrow_tables("c1", created["id"])["votes"].to_pylist()
+    assert {v["category_id"]: v["rating"] for v in votes} == {"clarity": 3, "delivery": None}
+    assert data.export_session_data("c1", created["id"])["votes"][0]["rating_delivery"] == 0  # CSV layout unchanged
+
+
+def test_prepared_class_exports_are_swept_once_stale(monkeypatch, tmp_path):
+    import os
+    import time
+
+    from streamlit_app import storage
+    from streamlit_app.cache import metadata
+    from streamlit_app.storage.memory import MemoryBackend
+
+    data = data_module
+    monkeypatch.setattr(storage, "_backend", MemoryBackend())
+    monkeypatch.setattr(data, "EXPORT_DIR", str(tmp_path / "exports"))
+    metadata.clear()
+    data.create_session("c1", {"title": "Week 1", "status": "open", "categories": SESSION["categories"], "weighting": SESSION["weighting"]})
+
+    abandoned = data.export_class_zip("c1")  # the admin's session ended without a download
+    old = time.time() - data.EXPORT_TTL_SECONDS - 1
+    os.utime(abandoned, (old, old))
+    recent = data.export_class_zip("c1")
+    fresh = data.export_class_parquet("c1")
+    assert not os.path.exists(abandoned)
+    assert sorted(os.listdir(tmp_path / "exports")) == sorted(os.path.basename(p) for p in (recent, fresh))
+
+
+def test_exported_votes_reimport_and_partial_ballots_report_missing_ratings(monkeypatch):
+    import io
+
+    from streamlit_app import storage
+    from streamlit_app.cache import metadata
+    from streamlit_app.storage.memory import MemoryBackend
+
+    data = data_module
+    monkeypatch.setattr(storage, "_backend", MemoryBackend())
+    metadata.clear()
+    created = data.create_session("c1", {"title": "Week 1", "status": "open", "categories": SESSION["categories"], "weighting": SESSION["weighting"]})
+    data.submit_vote("c1", created["id"], "ana", "a", {"clarity": 4, "delivery": 5})
+    data.vote_ref("c1", created["id"], "ben").set({"userId": "ben", "teamId": "a", "ratings": {"clarity": 3}})  # exported with delivery 0
+
+    ballots = data.ballots_from_csv(io.BytesIO(b"".join(data.iter_votes_csv("c1", created["id"]))))
+    assert [b["ratings"] for b in ballots] == [{"clarity": "4", "delivery": "5"}, {"clarity": "3"}]
+    report = data.bulk_submit_votes("c1", created["id"], ballots)
+    assert report["written"] == 1
+    assert [(e["userId"], e["error"]) for e in report["errors"]] == [("ben", "Missing ratings for: delivery")]
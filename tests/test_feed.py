@@ -0,0 +1,141 @@
+import json
+import threading
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pytest
+
+from streamlit_app import data, feed, live, storage
+from streamlit_app.cache import metadata
+from streamlit_app.storage.memory import MemoryBackend
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(storage, "_backend", MemoryBackend())
+    monkeypatch.setattr(feed, "_channels", {})
+    metadata.clear()
+    live.stop_all()
+    httpd = feed.make_server("127.0.0.1", 0)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+    live.stop_all()
+
+
+def _session():
+    data.team_ref("c1", "a").set({"name": "Alpha"})
+    return data.create_session("c1", {
+        "title": "Demo",
+        "status": "open",
+        "categories": [{"id": "clarity", "label": "Clarity"}],
+        "weighting": {"teacherPct": 50, "peersPct": 50},
+    })
+
+
+def _events(response):
+    """Yield decoded ``data:`` payloads from an SSE response."""
+    for raw in response:
+        line = raw.decode("utf-8").rstrip("\n")
+        if line.startswith("data: "):
+            yield json.loads(line[len("data: "):])
+
+
+def test_json_feed_serves_current_standings(server):
+    session = _session()
+    data.submit_vote("c1", session["id"], "ana", "a", {"clarity": 4})
+
+    with urlopen(f"{server}/classes/c1/sessions/{session['id']}/leaderboard", timeout=5) as response:
+        payload = json.loads(response.read())
+    assert payload["title"] == "Demo"
+    assert [(r["teamId"], r["peers"], r["combined"]) for r in payload["rows"]] == [("a", 4, 2)]
+
+    with pytest.raises(HTTPError) as missing:
+        urlopen(f"{server}/classes/c1/sessions/nope/leaderboard", timeout=5)
+    assert missing.value.code == 404
+
+
+def test_sse_subscribers_share_one_payload_per_change(server, monkeypatch):
+    session = _session()
+    builds = []
+    original = feed.Channel._build
+    monkeypatch.setattr(feed.Channel, "_build", lambda self, state: builds.append(1) or original(self, state))
+
+    url = f"{server}/classes/c1/sessions/{session['id']}/leaderboard"
+    streams = [urlopen(Request(url, headers={"Accept": "text/event-stream"}), timeout=5) for _ in range(3)]
+    firsts = [next(_events(s)) for s in streams]
+    assert all(f["rows"][0]["combined"] == 0 for f in firsts)
+
+    data.submit_vote("c1", session["id"], "ana", "a", {"clarity": 4})
+    seconds = [next(_events(s)) for s in streams]
+    assert all(s["rows"][0]["peers"] == 4 for s in seconds)
+    assert len(builds) == 2
+
+    data.set_session_status("c1", session["id"], "closed")
+    assert next(_events(streams[0]))["status"] == "closed"
+    for s in streams:
+        s.close()
+
+
+def test_unknown_sessions_allocate_nothing_and_watched_sessions_are_capped(server, monkeypatch):
+    for i in range(30):
+        with pytest.raises(HTTPError) as missing:
+            urlopen(f"{server}/classes/c1/sessions/made-up-{i}/leaderboard", timeout=5)
+        assert missing.value.code == 404
+    assert feed._channels == {} and live.watched() == set()
+
+    first, second = _session(), _session()
+    monkeypatch.setattr(feed, "MAX_CHANNELS", 1)
+    urlopen(f"{server}/classes/c1/sessions/{first['id']}/leaderboard", timeout=5).close()
+    with pytest.raises(HTTPError) as busy:
+        urlopen(f"{server}/classes/c1/sessions/{second['id']}/leaderboard", timeout=5)
+    assert busy.value.code == 503
+
+    monkeypatch.setattr(live, "IDLE_UNSUBSCRIBE_SECONDS", 0)  # the first session's listener goes idle
+    urlopen(f"{server}/classes/c1/sessions/{second['id']}/leaderboard", timeout=5).close()
+    assert list(feed._channels) == [("c1", second["id"])]
+
+
+def test_recreated_listener_never_serves_a_stale_cached_payload(server):
+    session = _session()
+    url = f"{server}/classes/c1/sessions/{session['id']}/leaderboard"
+    with urlopen(url, timeout=5) as response:
+        assert json.loads(response.read())["rows"][0]["peers"] == 0
+
+    live.stop_all()  # what the idle sweep in `live.watch` does; the new listener restarts its count
+    data.submit_vote("c1", session["id"], "ana", "a", {"clarity": 4})
+    with urlopen(url, timeout=5) as response:
+        assert json.loads(response.read())["rows"][0]["peers"] == 4
+
+
+def test_feed_polls_sqlite_written_by_another_process_and_refuses_memory(tmp_path, monkeypatch):
+    import time
+
+    from streamlit_app.storage.sqlite import SQLiteBackend
+
+    path = str(tmp_path / "leaderboard.db")
+    streamlit_process, feed_process = SQLiteBackend(path), SQLiteBackend(path)  # two connections, one file
+    monkeypatch.setattr(storage, "_backend", streamlit_process)
+    monkeypatch.setattr(feed, "_channels", {})
+    monkeypatch.setattr(feed, "SQLITE_POLL_SECONDS", 0.05)
+    monkeypatch.setattr(live, "_poll_seconds", None)
+    metadata.clear()
+    live.stop_all()
+    session = _session()
+
+    with pytest.raises(SystemExit):
+        feed.configure_for_backend("memory", lambda message: (_ for _ in ()).throw(SystemExit(message)))
+    feed.configure_for_backend("sqlite", pytest.fail)
+    monkeypatch.setattr(storage, "_backend", feed_process)
+    channel = feed.channel("c1", session["id"])
+    assert channel.payload()[1]["rows"][0]["peers"] == 0
+
+    monkeypatch.setattr(storage, "_backend", streamlit_process)
+    data.submit_vote("c1", session["id"], "ana", "a", {"clarity": 4})
+    deadline = time.monotonic() + 5
+    while channel.payload()[1]["rows"][0]["peers"] != 4 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert channel.payload()[1]["rows"][0]["peers"] == 4
+    live.stop_all()
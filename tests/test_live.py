@@ -0,0 +1,63 @@
+import threading
+from types import SimpleNamespace
+
+from streamlit_app import live as live_module
+
+
+def _load_live(monkeypatch):
+    live_module.stop_all()
+    return live_module
+
+
+class _FakeTotalsRef:
+    def __init__(self):
+        self.callbacks = []
+        self.unsubscribed = False
+
+    def on_snapshot(self, callback):
+        self.callbacks.append(callback)
+        return SimpleNamespace(unsubscribe=lambda: setattr(self, "unsubscribed", True))
+
+    def push(self, totals):
+        doc = SimpleNamespace(exists=totals is not None, to_dict=lambda: totals)
+        for callback in self.callbacks:
+            callback([doc], [], None)
+
+
+def test_watch_shares_one_listener_per_session(monkeypatch):
+    live = _load_live(monkeypatch)
+    ref = _FakeTotalsRef()
+    monkeypatch.setattr(live.data, "totals_ref", lambda *args: ref)
+    monkeypatch.setattr(live, "FIRST_SNAPSHOT_SECONDS", 0)
+
+    first = live.watch("c", "s")
+    second = live.watch("c", "s")
+    assert first is second
+    assert len(ref.callbacks) == 1
+
+    live.stop_all()
+    assert ref.unsubscribed is True
+
+
+def test_snapshot_wakes_waiting_viewers_and_feeds_scores(monkeypatch):
+    live = _load_live(monkeypatch)
+    ref = _FakeTotalsRef()
+    monkeypatch.setattr(live.data, "totals_ref", lambda *args: ref)
+    monkeypatch.setattr(live, "FIRST_SNAPSHOT_SECONDS", 0)
+    state = live.watch("c", "s")
+
+    woke = []
+    waiter = threading.Thread(target=lambda: woke.append(state.wait_for_change(0, timeout=5)))
+    waiter.start()
+    ref.push({"seeded": True, "teams": {"a": {"peer": {"clarity": 4}, "peerVotes": 1}}})
+    waiter.join(timeout=5)
+
+    assert woke == [True]
+    assert state.version == 1
+    scores = state.scores([{"id": "clarity"}], teacher_pct=50, peers_pct=50)
+    assert scores["a"]["peer_sum"] == 4
+
+    ref.push({"seeded": True, "teams": {"a": {"peer": {"clarity": 4}, "peerVotes": 1}}})
+    assert state.version == 1
+    assert state.wait_for_change(1, timeout=0) is False
+    live.stop_all()
@@ -0,0 +1,16 @@
+import load_test
+from streamlit_app import storage
+from streamlit_app.storage.memory import MemoryBackend
+
+
+def test_load_test_reports_every_operation(monkeypatch):
+    monkeypatch.setattr(storage, "_backend", MemoryBackend())
+    scenario = load_test.Scenario(voters=12, teams=3, categories=2, edit_rate=1.5, viewers=2, view_interval=0.01, think_time=0.01)
+    result = load_test.run_scenario(scenario)
+
+    ops = {row["operation"]: row for row in result["operations"]}
+    assert set(ops) == {"submit_vote", "aggregate_scores", "build_leaderboard_rows"}
+    assert 12 * 2 <= ops["submit_vote"]["count"] <= 12 * 3
+    assert all(row["errors"] == 0 for row in ops.values())
+    assert ops["submit_vote"]["p50_ms"] <= ops["submit_vote"]["p99_ms"]
+    assert result["teams_scored"] <= 3
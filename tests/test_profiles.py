@@ -0,0 +1,55 @@
+from streamlit_app import data, firebase, profiles, storage
+from streamlit_app.cache import metadata
+from streamlit_app.storage.memory import MemoryBackend
+
+
+def _setup(monkeypatch):
+    monkeypatch.setattr(storage, "_backend", MemoryBackend())
+    monkeypatch.setattr(profiles.st, "session_state", _State())
+    monkeypatch.setattr(profiles, "admin_emails", lambda: frozenset({"prof@x.edu"}))
+    metadata.clear()
+    for cid in ("c1", "c2"):
+        data.class_ref(cid).set({"id": cid, "name": cid.upper(), "archived": False})
+
+
+class _State(dict):
+    __getattr__ = dict.get
+
+    def __setattr__(self, key, value):
+        self[key] = value
+
+
+def test_login_resolves_role_and_memberships_once(monkeypatch):
+    _setup(monkeypatch)
+    data.user_ref("c2", "ana@x.edu").set({"displayName": "Ana", "teamId": "t7", "settings": {"notifyResults": False}})
+
+    profile = profiles.login("Ana@x.edu")
+    assert profile == {
+        "email": "ana@x.edu",
+        "role": "student",
+        "displayName": "Ana",
+        "teams": {"c2": "t7"},
+        "settings": {"c2": {"notifyResults": False}},
+    }
+    assert profiles.st.session_state.user == profile
+    assert profiles.is_admin(profiles.login("prof@x.edu"))
+
+    data.user_ref("c1", "ana@x.edu").set({"teamId": "t1"})
+    assert profiles.load_profile("ana@x.edu")["teams"] == {"c2": "t7"}  # cached until invalidated
+
+
+def test_saving_a_membership_invalidates_the_cached_profile(monkeypatch):
+    _setup(monkeypatch)
+    profiles.login("ana@x.edu")
+
+    profiles.save_membership("c1", "ana@x.edu", teamId="t1", settings={"notifySessionOpen": False})
+    user = profiles.st.session_state.user
+    assert user["teams"] == {"c1": "t1"}
+    assert user["settings"] == {"c1": {"notifySessionOpen": False}}
+
+
+def test_legacy_session_users_fall_back_to_admin_emails(monkeypatch):
+    _setup(monkeypatch)
+    assert profiles.role({"email": "PROF@x.edu"}) == "admin"
+    assert profiles.role(None) == "student"
+    assert firebase._parse_emails(" A@x.edu, ,b@x.edu") == frozenset({"a@x.edu", "b@x.edu"})
@@ -1,47 +1,164 @@
-import importlib
-from types import SimpleNamespace
-
 import pytest
-import streamlit_app.firebase as firebase
+
+from streamlit_app import data, storage
+from streamlit_app.cache import metadata
+from streamlit_app.storage.memory import MemoryBackend
 
 
 def _load_data(monkeypatch):
-    monkeypatch.setattr(firebase, "get_db", lambda: SimpleNamespace())
-    return importlib.reload(importlib.import_module("streamlit_app.data"))
+    monkeypatch.setattr(storage, "_backend", MemoryBackend())
+    metadata.clear()
+    return data
 
 
-def _fake_teacher_votes(monkeypatch, data):
-    store = {}
-    class Doc:
-        def __init__(self, key):
-            self.key = key
-        def set(self, payload):
-            store[self.key] = payload
-    monkeypatch.setattr(data, "teacher_vote_ref", lambda *args: Doc(args[2]))
-    return store
+def _doc(ref):
+    return ref.get().to_dict()
 
 
 def test_submit_teacher_vote_writes_expected(monkeypatch):
     data = _load_data(monkeypatch)
-    store = _fake_teacher_votes(monkeypatch, data)
     doc = data.submit_teacher_vote("class", "session", "admin", "team", {"clarity": 4})
-    assert doc == store["admin"]
+    assert doc == _doc(data.teacher_vote_ref("class", "session", "admin"))
     assert doc["ratings"] == {"clarity": 4}
 
 
 def test_submit_teacher_vote_validates_rating_range(monkeypatch):
     data = _load_data(monkeypatch)
-    _fake_teacher_votes(monkeypatch, data)
     with pytest.raises(ValueError):
         data.submit_teacher_vote("class", "session", "admin", "team", {"clarity": 6})
 
 
 def test_submit_teacher_vote_overwrites_duplicate(monkeypatch):
     data = _load_data(monkeypatch)
-    store = _fake_teacher_votes(monkeypatch, data)
     data.submit_teacher_vote("class", "session", "admin", "team", {"clarity": 4})
     data.submit_teacher_vote("class", "session", "admin", "team", {"clarity": 2})
-    assert store["admin"]["ratings"]["clarity"] == 2
+    assert _doc(data.teacher_vote_ref("class", "session", "admin"))["ratings"]["clarity"] == 2
+    totals = _doc(data.totals_ref("class", "session"))
+    assert totals["teams"]["team"] == {"teacher": {"clarity": 2}, "teacherVotes": 1}
+
+
+def test_vote_edits_keep_document_small_and_cap_history(monkeypatch):
+    data = _load_data(monkeypatch)
+    monkeypatch.setattr(data, "VOTE_HISTORY_LIMIT", 3)
+    data.vote_ref("class", "session", "ana").set({
+        "userId": "ana", "teamId": "a", "ratings": {"clarity": 1}, "createdAt": "t0",
+        "editedHistory": [{"ts": "old", "ratings": {"clarity": 5}}],
+    })
+
+    for score in (2, 3, 4, 5):
+        data.submit_vote("class", "session", "ana", "a", {"clarity": score})
+
+    vote = _doc(data.vote_ref("class", "session", "ana"))
+    assert vote["ratings"] == {"clarity": 5}
+    assert vote["createdAt"] == "t0"
+    assert "editedHistory" not in vote
+    entries = _doc(data.vote_history_ref("class", "session", "ana"))["entries"]
+    assert [e["ratings"]["clarity"] for e in entries] == [2, 3, 4]
+
+
+def test_first_vote_precondition_rejects_concurrent_create(monkeypatch):
+    data = _load_data(monkeypatch)
+    ref = data.vote_ref("class", "session", "ana")
+
+    def build(prev):
+        ref.set({"userId": "ana", "teamId": "a", "ratings": {"clarity": 1}})  # a racing double submit
+        return data._peer_vote_doc(prev, "ana", "a", {"clarity": 3}, False, "now")
+
+    with pytest.raises(storage.AlreadyExists):
+        data._upsert_vote(ref, data.totals_ref("class", "session"), "peer", build)
+    assert _doc(ref)["ratings"] == {"clarity": 1}
+
+
+def test_rating_deltas_move_totals_between_teams(monkeypatch):
+    data = _load_data(monkeypatch)
+    prev = {"teamId": "a", "ratings": {"clarity": 4, "delivery": 2}}
+    new = {"teamId": "b", "ratings": {"clarity": 5, "delivery": 2}}
+    assert data._rating_deltas("peer", prev, new) == {
+        "a": {"peer": {"clarity": -4, "delivery": -2}, "peerVotes": -1},
+        "b": {"peer": {"clarity": 5, "delivery": 2}, "peerVotes": 1},
+    }
+    edit = {"teamId": "a", "ratings": {"clarity": 5, "delivery": 2}}
+    assert data._rating_deltas("peer", prev, edit) == {"a": {"peer": {"clarity": 1}, "peerVotes": 0}}
+    assert data._rating_deltas("peer", prev, dict(prev)) == {}
+
+
+def test_submit_vote_requires_team(monkeypatch):
+    data = _load_data(monkeypatch)
+    with pytest.raises(ValueError):
+        data.submit_vote("class", "session", "student", "", {"clarity": 3})
+
+
+def test_opening_a_session_snapshots_the_roster_and_votes_must_match_it(monkeypatch):
+    data = _load_data(monkeypatch)
+    alpha = data.create_team("class", "Alpha", color="#123456")
+    session = data.create_session("class", {"title": "Demo", "categories": [{"id": "clarity", "label": "Clarity"}], "status": "scheduled"})
+    data.set_session_status("class", session["id"], "open")
+    data.create_team("class", "Late")  # added after opening: not on this session's roster
+
+    roster = data.session_roster("class", data.get_session("class", session["id"]))
+    assert roster == {alpha["id"]: {"name": "Alpha", "color": "#123456"}}
+
+    data.submit_vote("class", session["id"], "ana", alpha["id"], {"clarity": 4})
+    with pytest.raises(ValueError, match="Unknown team"):
+        data.submit_vote("class", session["id"], "ben", "ghost", {"clarity": 4})
+    with pytest.raises(ValueError, match="Unknown team"):
+        data.submit_teacher_vote("class", session["id"], "prof", "ghost", {"clarity": 4})
+    assert _doc(data.vote_ref("class", session["id"], "ben")) is None
+    report = data.bulk_submit_votes("class", session["id"], [{"userId": "cy", "teamId": "ghost", "ratings": {"clarity": 3}}])
+    assert report["written"] == 0 and "Unknown team" in report["errors"][0]["error"]
+
+    rows = data.get_leaderboard("class", session["id"])["rows"]
+    assert [(r["name"], r["color"], r["peers"]) for r in rows] == [("Alpha", "#123456", 4)]
+
+
+def test_bulk_submit_votes_validates_rows_and_batches_totals(monkeypatch):
+    data = _load_data(monkeypatch)
+    monkeypatch.setattr(data, "BULK_BATCH_SIZE", 2)
+    monkeypatch.setattr(data, "get_session", lambda c, s: {"categories": [{"id": "clarity"}, {"id": "delivery"}]})
+    data.submit_vote("c", "s", "ana", "a", {"clarity": 2, "delivery": 2})
+    created = _doc(data.vote_ref("c", "s", "ana"))["createdAt"]
+
+    rows = [
+        {"userId": "ana", "teamId": "b", "ratings": {"clarity": "4", "delivery": 5}},
+        {"userId": "ben", "teamId": "b", "ratings": {"clarity": 9, "delivery": 5}},
+        {"userId": "cy", "teamId": "a", "ratings": {"clarity": 3}},
+        {"userId": "prof", "teamId": "b", "voteType": "teacher", "ratings": {"clarity": 5, "delivery": 5}},
+        {"userId": "ana", "teamId": "a", "ratings": {"clarity": 1, "delivery": 1}},
+    ]
+    report = data.bulk_submit_votes("c", "s", rows)
+
+    assert report["written"] == 2
+    assert [(e["row"], e["userId"]) for e in report["errors"]] == [(1, "ben"), (2, "cy"), (4, "ana")]
+    vote = _doc(data.vote_ref("c", "s", "ana"))
+    assert vote["createdAt"] == created
+    assert vote["ratings"] == {"clarity": 4, "delivery": 5}
+    assert _doc(data.vote_history_ref("c", "s", "ana"))["entries"][0]["ratings"] == {"clarity": 2, "delivery": 2}
+    teams = _doc(data.totals_ref("c", "s"))["teams"]
+    assert teams["a"]["peerVotes"] == 0
+    assert teams["b"] == {"peer": {"clarity": 4, "delivery": 5}, "peerVotes": 1, "teacher": {"clarity": 5, "delivery": 5}, "teacherVotes": 1}
+
+
+def test_bulk_submit_votes_rereads_a_batch_raced_by_a_live_vote(monkeypatch):
+    data = _load_data(monkeypatch)
+    monkeypatch.setattr(data, "get_session", lambda c, s: {"categories": [{"id": "clarity"}]})
+    data.submit_vote("c", "s", "ben", "a", {"clarity": 2})
+    original, raced = data._peer_vote_doc, []
+
+    def racing_vote_doc(prev, user_id, *args):
+        if not raced:  # both voters change their ballots live after the import read them
+            raced.append(True)
+            data.submit_vote("c", "s", "ana", "a", {"clarity": 3})
+            data.submit_vote("c", "s", "ben", "a", {"clarity": 1})
+        return original(prev, user_id, *args)
+
+    monkeypatch.setattr(data, "_peer_vote_doc", racing_vote_doc)
+    rows = [{"userId": "ana", "teamId": "b", "ratings": {"clarity": 4}}, {"userId": "ben", "teamId": "b", "ratings": {"clarity": 5}}]
+    report = data.bulk_submit_votes("c", "s", rows)
+
+    assert report == {"written": 2, "errors": []}
+    teams = _doc(data.totals_ref("c", "s"))["teams"]
+    assert (teams["a"]["peerVotes"], teams["b"]["peerVotes"], teams["b"]["peer"]) == (0, 2, {"clarity": 9})
+    assert teams["b"] == data.rebuild_score_totals("c", "s")["teams"]["b"]
 
 
 def test_student_must_rate_all_categories_placeholder():
@@ -6,3 +6,53 @@ def test_combined_weighting_arithmetic_example():
     peersPct, teacherPct = 60, 40
     combined = int(peer_sum*(peersPct/100.0) + teacher_sum*(teacherPct/100.0))
     assert isinstance(combined, int)
+
+
+def test_scores_from_totals_matches_full_scan_shape():
+    from streamlit_app import data
+
+    cats = [{"id": "clarity"}, {"id": "delivery"}]
+    votes = [
+        {"teamId": "a", "ratings": {"clarity": 4, "delivery": 5}},
+        {"teamId": "a", "ratings": {"clarity": 2, "delivery": 3, "retired": 5}},
+        {"teamId": "b", "ratings": {"clarity": 1}},
+    ]
+    tvotes = [{"teamId": "a", "ratings": {"clarity": 5, "delivery": 4}}]
+    totals = {"teams": data._totals_from_votes(votes, tvotes)}
+    scores = data.scores_from_totals(totals, cats, teacherPct=40, peersPct=60)
+
+    assert scores["a"]["peer_sum"] == 14
+    assert scores["a"]["teacher_sum"] == 9
+    assert scores["a"]["cats"]["clarity"] == {"peer": 6, "teacher": 5}
+    assert scores["a"]["combined"] == int(14 * 0.6 + 9 * 0.4)
+    assert scores["b"] == {"peer_sum": 1, "teacher_sum": 0, "cats": {"clarity": {"peer": 1, "teacher": 0}, "delivery": {"peer": 0, "teacher": 0}}, "combined": 0}
+
+    totals["teams"]["c"] = {"peer": {"clarity": 0}, "peerVotes": 0}
+    assert "c" not in data.scores_from_totals(totals, cats, 50, 50)
+
+
+def test_score_votes_matches_totals_and_applies_category_weights():
+    from streamlit_app import scoring
+
+    votes = [
+        {"teamId": "a", "ratings": {"clarity": 4, "delivery": 5}},
+        {"teamId": "b", "ratings": {"clarity": 3, "delivery": 3}},
+        {"teamId": "a", "ratings": {"clarity": 2}},
+    ]
+    tvotes = [{"teamId": "c", "ratings": {"clarity": 5, "delivery": 1}}]
+    plain = [{"id": "clarity"}, {"id": "delivery"}]
+    totals = {"teams": {
+        "a": {"peer": {"clarity": 6, "delivery": 5}, "peerVotes": 2},
+        "b": {"peer": {"clarity": 3, "delivery": 3}, "peerVotes": 1},
+        "c": {"teacher": {"clarity": 5, "delivery": 1}, "teacherVotes": 1},
+    }}
+    assert scoring.score_votes(votes, tvotes, plain, 50, 50) == scoring.score_totals(totals, plain, 50, 50)
+    assert list(scoring.score_votes(votes, tvotes, plain, 50, 50)) == ["a", "b", "c"]
+
+    weighted = [{"id": "clarity", "weight": 2.0}, {"id": "delivery", "weight": 0.5}]
+    scores = scoring.score_votes(votes, tvotes, weighted, teacher_pct=40, peers_pct=60)
+    assert scores["a"]["peer_sum"] == 14.5
+    assert scores["c"]["teacher_sum"] == 10.5
+    assert scores["a"]["cats"]["clarity"] == {"peer": 6, "teacher": 0}
+    assert scores["a"]["combined"] == int(14.5 * 0.6)
+    assert scoring.score_votes([], [], weighted, 50, 50) == {}
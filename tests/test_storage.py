@@ -0,0 +1,259 @@
+from datetime import datetime
+
+import pytest
+
+from streamlit_app import data, storage
+from streamlit_app.cache import metadata
+from streamlit_app.storage.memory import MemoryBackend
+from streamlit_app.storage.sqlite import SQLiteBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path, monkeypatch):
+    store = MemoryBackend() if request.param == "memory" else SQLiteBackend(str(tmp_path / "leaderboard.db"))
+    monkeypatch.setattr(storage, "_backend", store)
+    metadata.clear()
+    return store
+
+
+def test_writes_follow_firestore_merge_and_update_semantics(backend):
+    ref = backend.collection("classes").document("c1")
+    ref.set({"name": "Pitch", "stats": {"votes": 1, "teams": {"a": 2}}, "createdAt": datetime(2024, 3, 1, 9)})
+    ref.set({"stats": {"votes": backend.increment(2), "teams": {"b": 1}}}, merge=True)
+    ref.update({"stats.teams": {"c": 3}, "name": backend.DELETE_FIELD})
+
+    snap = ref.get()
+    assert snap.exists and snap.id == "c1"
+    assert snap.to_dict() == {"stats": {"votes": 3, "teams": {"c": 3}}, "createdAt": datetime(2024, 3, 1, 9)}
+    with pytest.raises(storage.FailedPrecondition):
+        ref.update({"name": "x"}, option=backend.write_option(last_update_time=snap.update_time - 1))
+    with pytest.raises(storage.NotFound):
+        backend.collection("classes").document("missing").update({"name": "x"})
+
+
+def test_queries_filter_order_and_paginate(backend):
+    sessions = backend.collection("classes").document("c1").collection("sessions")
+    for i, status in enumerate(["closed", "open", "closed", "scheduled", "closed"]):
+        sessions.document(f"s{i}").set({"status": status, "createdAt": datetime(2024, 1, i + 1)})
+    sessions.document("s0").collection("votes").document("ana").set({"status": "closed"})
+
+    closed = sessions.where("status", "==", "closed").order_by("createdAt", direction="DESCENDING")
+    assert [s.id for s in closed.stream()] == ["s4", "s2", "s0"]
+    first = list(closed.limit(1).stream())
+    assert [s.id for s in closed.start_after(first[-1]).limit(5).stream()] == ["s2", "s0"]
+
+
+def test_failed_transaction_leaves_no_writes_and_listeners_see_commits(backend):
+    ref = backend.collection("totals").document("t")
+    seen = []
+    watch = ref.on_snapshot(lambda docs, changes, read_time: seen.append(docs[0].to_dict()))
+
+    def boom(transaction):
+        transaction.set(ref, {"n": 1})
+        raise RuntimeError("abort")
+
+    with pytest.raises(RuntimeError):
+        backend.run_transaction(boom)
+    assert not ref.get().exists
+    backend.run_transaction(lambda transaction: transaction.set(ref, {"n": 2}))
+    watch.unsubscribe()
+    ref.set({"n": 3})
+    assert seen == [None, {"n": 2}]
+
+
+def test_data_layer_runs_end_to_end_offline(backend):
+    created = data.create_session("c1", {
+        "title": "Demo",
+        "status": "open",
+        "categories": [{"id": "clarity", "label": "Clarity"}],
+        "weighting": {"teacherPct": 50, "peersPct": 50},
+    })
+    data.submit_vote("c1", created["id"], "ana", "a", {"clarity": 4})
+    data.submit_vote("c1", created["id"], "ben", "a", {"clarity": 2})
+    data.submit_vote("c1", created["id"], "ana", "b", {"clarity": 5})
+    data.submit_teacher_vote("c1", created["id"], "prof", "a", {"clarity": 3})
+
+    scores = data.aggregate_scores("c1", created["id"], [{"id": "clarity"}], 50, 50)
+    assert {t: (v["peer_sum"], v["teacher_sum"]) for t, v in scores.items()} == {"a": (2, 3), "b": (5, 0)}
+    assert [s["id"] for s in data.list_sessions("c1")] == [created["id"]]
+
+
+def test_readers_bring_the_materialized_leaderboard_up_to_date_after_votes(backend):
+    data.team_ref("c1", "a").set({"name": "Alpha"})
+    data.team_ref("c1", "z").set({"name": "Zulu"})
+    created = data.create_session("c1", {
+        "title": "Demo",
+        "status": "open",
+        "categories": [{"id": "clarity", "label": "Clarity"}],
+        "weighting": {"teacherPct": 50, "peersPct": 50},
+    })
+    assert [r["combined"] for r in data.get_leaderboard("c1", created["id"])["rows"]] == [0, 0]
+
+    data.submit_vote("c1", created["id"], "ana", "z", {"clarity": 4})
+    data.submit_teacher_vote("c1", created["id"], "prof", "a", {"clarity": 2})
+    assert data.leaderboard_ref("c1", created["id"]).get().to_dict()["version"] == 0  # votes never write the board
+    board = data.get_leaderboard("c1", created["id"])
+    assert board["version"] == 2
+    assert data.refresh_leaderboard("c1", created["id"]) == data.leaderboard_ref("c1", created["id"]).get().to_dict()
+    assert [(r["rank"], r["name"], r["combined"], r["peers"], r["teacher"]) for r in board["rows"]] == [
+        (1, "Zulu", 2, 4, 0),
+        (2, "Alpha", 1, 0, 2),
+    ]
+    assert board["status"] == "open"
+
+    data.set_session_status("c1", created["id"], "closed")
+    assert data.get_leaderboard("c1", created["id"])["status"] == "closed"
+
+
+def test_a_refresh_that_loses_the_race_never_restores_an_older_board(backend, monkeypatch):
+    created = data.create_session("c1", {
+        "title": "Demo",
+        "status": "open",
+        "categories": [{"id": "clarity", "label": "Clarity"}],
+        "weighting": {"teacherPct": 0, "peersPct": 100},
+    })
+    sid = created["id"]
+    data.submit_vote("c1", sid, "ana", "a", {"clarity": 4})
+    original, raced = data._board, []
+
+    def racing_board(*args):
+        board = original(*args)
+        if not raced:  # a vote and a faster reader land between this refresh's read and its write
+            raced.append(True)
+            data.submit_vote("c1", sid, "ben", "a", {"clarity": 2})
+            data.refresh_leaderboard("c1", sid)
+        return board
+
+    monkeypatch.setattr(data, "_board", racing_board)
+    board = data.refresh_leaderboard("c1", sid)
+    assert board["version"] == data.leaderboard_ref("c1", sid).get().to_dict()["version"] == 2
+    assert board["rows"][0]["peers"] == 6
+
+
+def test_writes_bump_the_session_change_version(backend):
+    created = data.create_session("c1", {
+        "title": "Demo",
+        "status": "open",
+        "categories": [{"id": "clarity", "label": "Clarity"}],
+        "weighting": {"teacherPct": 50, "peersPct": 50},
+    })
+    assert data.get_leaderboard("c1", created["id"])["version"] == 0
+
+    data.submit_vote("c1", created["id"], "ana", "a", {"clarity": 4})
+    data.submit_vote("c1", created["id"], "ana", "a", {"clarity": 4})  # unchanged resubmit still counts
+    data.bulk_submit_votes("c1", created["id"], [{"userId": "ben", "teamId": "a", "ratings": {"clarity": 3}}])
+    assert data.get_leaderboard("c1", created["id"])["version"] == 3
+
+    data.rebuild_score_totals("c1", created["id"])
+    data.set_session_status("c1", created["id"], "closed")
+    board = data.get_leaderboard("c1", created["id"])
+    assert (board["version"], board["status"]) == (5, "closed")
+
+
+def test_sessions_page_newest_first_with_status_filter_and_current_pointer(backend):
+    data.class_ref("c1").set({"id": "c1", "name": "C1", "archived": False})
+    created = [
+        data.create_session("c1", {"title": f"S{i}", "status": "closed" if i % 3 else "archived"})
+        for i in range(7)
+    ]
+    visible = [s["id"] for s in created if s["status"] == "closed"][::-1]
+
+    first, cursor = data.page_sessions("c1", statuses=("closed",), page_size=3)
+    second, last = data.page_sessions("c1", statuses=("closed",), page_size=3, after=cursor)
+    assert [s["id"] for s in first + second] == visible
+    assert last is None
+    assert [s["id"] for s in data.list_sessions("c1", statuses=("archived",))] == [created[0]["id"], created[3]["id"], created[6]["id"]]
+
+    data.set_session_status("c1", created[1]["id"], "open")
+    assert data.list_classes()[0]["currentSessionId"] == created[1]["id"]
+    assert created[1]["id"] in [s["id"] for s in data.recent_sessions("c1", include=(created[1]["id"],))]
+    data.set_session_status("c1", created[1]["id"], "archived")
+    assert data.list_classes()[0]["currentSessionId"] is None
+
+
+def test_session_pages_break_created_at_ties_by_document_id(backend):
+    created = [data.create_session("c1", {"title": f"S{i}", "status": "closed"}) for i in range(5)]
+    for session in created[1:4]:  # imported together: one timestamp for three sessions
+        data.session_ref("c1", session["id"]).update({"createdAt": created[1]["createdAt"]})
+    metadata.clear()
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = data.page_sessions("c1", page_size=2, after=cursor)
+        seen += [s["id"] for s in page]
+        if cursor is None:
+            break
+    assert sorted(seen) == sorted(s["id"] for s in created) and len(seen) == 5
+    assert seen[0] == created[4]["id"] and seen[-1] == created[0]["id"]
+
+
+def test_season_standings_reuse_finalized_rollups_and_rescore_open_sessions(backend, monkeypatch):
+    data.team_ref("c1", "a").set({"name": "Alpha"})
+    data.team_ref("c1", "b").set({"name": "Beta"})
+    spec = {"categories": [{"id": "clarity", "label": "Clarity"}], "weighting": {"teacherPct": 0, "peersPct": 100}}
+    first = data.create_session("c1", {"title": "Week 1", "status": "open", **spec})
+    data.submit_vote("c1", first["id"], "ana", "a", {"clarity": 4})
+    data.set_session_status("c1", first["id"], "closed")
+    second = data.create_session("c1", {"title": "Week 2", "status": "open", **spec})
+    data.submit_vote("c1", second["id"], "ana", "b", {"clarity": 5})
+    data.submit_vote("c1", second["id"], "ben", "a", {"clarity": 3})
+    data.create_session("c1", {"title": "Week 3", "status": "scheduled", **spec})
+
+    assert data.rollup_ref("c1", first["id"]).get().exists
+    rescored = []
+    original = data.refresh_leaderboard
+    monkeypatch.setattr(data, "refresh_leaderboard", lambda cid, sid: rescored.append(sid) or original(cid, sid))
+
+    season = data.season_standings("c1")
+    assert [(r["rank"], r["teamId"], r["combined"], r["sessions"]) for r in season["rows"]] == [(1, "a", 7, 2), (2, "b", 5, 1)]
+    assert (season["sessions"], season["open"]) == (2, 1)
+    assert rescored == [second["id"]]  # the closed week came from its rollup; only the open board trailed its votes
+    data.season_standings("c1")
+    assert rescored == [second["id"]]
+
+    data.submit_vote("c1", second["id"], "cy", "b", {"clarity": 5})
+    assert [r["combined"] for r in data.season_standings("c1")["rows"]] == [10, 7]
+    data.set_session_status("c1", first["id"], "open")
+    assert not data.rollup_ref("c1", first["id"]).get().exists
+
+
+def test_ballots_added_after_close_reach_the_season_standings(backend):
+    spec = {"categories": [{"id": "clarity", "label": "Clarity"}], "weighting": {"teacherPct": 0, "peersPct": 100}}
+    session = data.create_session("c1", {"title": "Week 1", "status": "open", **spec})
+    data.submit_vote("c1", session["id"], "ana", "a", {"clarity": 5})
+    data.set_session_status("c1", session["id"], "closed")
+    assert [(r["teamId"], r["combined"]) for r in data.season_standings("c1")["rows"]] == [("a", 5)]
+
+    paper = [{"userId": u, "teamId": "b", "ratings": {"clarity": 5}} for u in ("ben", "cy")]
+    assert data.bulk_submit_votes("c1", session["id"], paper)["written"] == 2
+    data.submit_vote("c1", session["id"], "dee", "b", {"clarity": 5})
+    assert [(r["teamId"], r["combined"]) for r in data.season_standings("c1")["rows"]] == [("b", 15), ("a", 5)]
+
+    data.rollup_ref("c1", session["id"]).update({"version": 0})  # finalized by another process, before the import
+    metadata.clear()
+    assert data.season_standings("c1")["rows"][0]["combined"] == 15
+    assert data.rollup_ref("c1", session["id"]).get().to_dict()["version"] == data.session_version("c1", session["id"])
+
+
+def test_vote_reads_are_projected_to_the_fields_each_caller_needs(backend):
+    created = data.create_session("c1", {
+        "title": "Demo",
+        "status": "open",
+        "categories": [{"id": "clarity", "label": "Clarity"}],
+        "weighting": {"teacherPct": 50, "peersPct": 50},
+    })
+    history = [{"ts": datetime(2024, 3, 1, 9), "teamId": "b", "ratings": {"clarity": 1}}] * 50
+    data.vote_ref("c1", created["id"], "ana").set({
+        "userId": "ana", "teamId": "a", "ratings": {"clarity": 4}, "superVote": False,
+        "createdAt": datetime(2024, 3, 1, 9), "updatedAt": datetime(2024, 3, 1, 10), "editedHistory": history,
+    })
+
+    votes = backend.collection("classes").document("c1").collection("sessions").document(created["id"]).collection("votes")
+    assert [s.to_dict() for s in votes.select(["teamId", "ratings.clarity"]).stream()] == [{"teamId": "a", "ratings": {"clarity": 4}}]
+    assert data._stream_dicts("c1", created["id"], "votes") == [{
+        "userId": "ana", "teamId": "a", "ratings": {"clarity": 4},
+        "createdAt": datetime(2024, 3, 1, 9), "updatedAt": datetime(2024, 3, 1, 10),
+    }]
+    totals = data.rebuild_score_totals("c1", created["id"])
+    assert totals["teams"] == {"a": {"peer": {"clarity": 4}, "peerVotes": 1}}
+    assert data.vote_ref("c1", created["id"], "ana").get().to_dict()["editedHistory"] == history